@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+"""Fixtures compartilhadas dos testes: servidor sisarv_mock local com o ws apontado para ele."""
+
+import random
+
+import pytest
+
+import sisarv_mock
+import ws
+
+
+@pytest.fixture
+def servidor_mock(monkeypatch):
+    """Servidor mock sem latência, um inventário vazio; ws sem jornal, telemetria exportada ou cache de sessões."""
+    servidor = sisarv_mock.iniciar_mock(num_inventarios=1, arvores_por_inventario=0)
+    monkeypatch.setattr(ws, "base_url", servidor.url)
+    monkeypatch.setattr(ws, "USAR_JORNAL", False)
+    monkeypatch.setattr(ws, "EXPORTAR_TELEMETRIA", False)
+    monkeypatch.setattr(ws, "USAR_CACHE_SESSOES", False)
+    random.seed(0)
+    yield servidor
+    servidor.parar()
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+SisArv - benchmark de ponta a ponta do envio (ws.run_sisarv e, se disponível, ws_async) contra o sisarv_mock.
+Para cada cenário mede linhas/s, latência p50/p95 das requisições (tempo de atendimento no servidor, incluindo
+a latência simulada), número de requisições e bytes trafegados, e confere se o inventário final está correto.
+Uso: python sisarv_benchmark.py [--linhas 300] [--latencia 0.05] [--jitter 0.02] [--erros 0.0] [--json saida.json]
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import sisarv_mock
+import ws
+
+try:
+    import ws_async
+except ImportError:
+    ws_async = None
+
+# (nome, motor, opções de run_sisarv, inventário já preenchido com a mesma planilha antes da medição)
+CENARIOS = (
+    ("sequencial", "requests", {"num_workers_inclusao": 1, "confirmacao_inclusao": "pagina"}, False),
+    ("paralelo-4", "requests", {"num_workers_inclusao": 4, "confirmacao_inclusao": "pagina"}, False),
+    ("reconciliacao-8", "requests", {"num_workers_inclusao": 8, "confirmacao_inclusao": "reconciliacao"}, False),
+    ("adaptativa", "requests", {"num_workers_inclusao": 2, "confirmacao_inclusao": "reconciliacao",
+                                "concorrencia_adaptativa": True}, False),
+    ("diferencial-sem-alteracao", "requests", {"num_workers_inclusao": 4, "modo_sincronizacao": "diferencial"}, True),
+    ("assincrono", "asyncio", {}, False),
+)
+
+
+def gerar_planilha(linhas, semente=0):
+    """Planilha sintética (já no formato de preprocessar_df) com espécies do catálogo do mock."""
+    rnd = random.Random(semente)
+    especies = [rnd.choice(sisarv_mock.ESPECIES_MOCK) for _ in range(linhas)]
+    return pd.DataFrame({
+        "Nº": range(1, linhas + 1),
+        "Nome Vulgar": [p for p, _ in especies],
+        "Nome Científico": [c for _, c in especies],
+        "Estado de Conservação": ["NÃO ENQUADRADAS"] * linhas,
+        "Área Pública": ["NÃO"] * linhas,
+        "Motivação": [rnd.choice(("PROJETO", "MORTE", "SEM MOTIVO")) for _ in range(linhas)],
+        "Intenção": [rnd.choice(("CORTE", "PRESERVAR", "TRANSPLANTIO")) for _ in range(linhas)],
+        "H": [round(rnd.uniform(2, 15), 2) for _ in range(linhas)],
+        "Copa": [round(rnd.uniform(1, 8), 2) for _ in range(linhas)],
+        "DAP 1": [rnd.randint(5, 60) for _ in range(linhas)],
+        "DAP 2": [0] * linhas, "DAP 3": [0] * linhas, "DAP 4": [0] * linhas, "DAP 5": [0] * linhas,
+    })
+
+
+def executar_motor(motor, df, opcoes):
+    argumentos = dict(progress_callback=lambda msg: None, cache_catalogos=ws.CacheCatalogos(ttl=0), **opcoes)
+    if motor == "asyncio":
+        return ws_async.run_sisarv_assincrono("benchmark", "benchmark", df, **argumentos)
+    return ws.run_sisarv("benchmark", "benchmark", df, cache_sessoes=False, **argumentos)
+
+
+def medir_cenario(servidor, nome, motor, opcoes, preenchido, df):
+    servidor.recriar_inventarios(0)
+    if preenchido:
+        # Jornal próprio do cenário: a sincronização diferencial confere nele os campos que a tabela não exibe
+        diretorio = tempfile.mkdtemp(prefix="sisarv_benchmark_")
+        opcoes = dict(opcoes, jornal=ws.JornalExecucao(os.path.join(diretorio, "jornal.sqlite3")))
+        executar_motor("requests", df, {"num_workers_inclusao": 8, "confirmacao_inclusao": "reconciliacao",
+                                        "jornal": opcoes["jornal"]})
+        with servidor.estado.lock:
+            servidor.estado.registros = []
+    inicio = time.perf_counter()
+    sucesso, nao_encontradas, erro = executar_motor(motor, df, opcoes)
+    duracao = time.perf_counter() - inicio
+    with servidor.estado.lock:
+        registros = list(servidor.estado.registros)
+    id_inventario = next(iter(servidor.estado.inventarios))
+    correto = servidor.estado.numeros(id_inventario) == sorted(int(n) for n in df["Nº"])
+    latencias = np.array([r.duracao for r in registros]) if registros else np.zeros(1)
+    return {
+        "cenario": nome,
+        "motor": motor,
+        "sucesso": bool(sucesso) and not erro,
+        "inventario_correto": correto,
+        "linhas": len(df),
+        "segundos": round(duracao, 3),
+        "linhas_por_segundo": round(len(df) / duracao, 2) if duracao else 0.0,
+        "requisicoes": len(registros),
+        "latencia_p50_ms": round(float(np.percentile(latencias, 50)) * 1000, 1),
+        "latencia_p95_ms": round(float(np.percentile(latencias, 95)) * 1000, 1),
+        "bytes_enviados": sum(r.bytes_recebidos for r in registros),
+        "bytes_recebidos": sum(r.bytes_enviados for r in registros),
+        "erros_http": sum(1 for r in registros if r.status >= 400),
+    }
+
+
+def executar_benchmark(linhas=300, latencia=0.05, jitter=0.02, erros=0.0, cenarios=None, semente=0):
+    """Roda os cenários (nomes de CENARIOS; padrão: todos os disponíveis) e retorna a lista de resultados."""
+    servidor = sisarv_mock.iniciar_mock(
+        latencia=latencia, jitter=jitter, taxa_erros=erros, num_inventarios=1, arvores_por_inventario=0,
+    )
+    originais = ws.base_url, ws.USAR_JORNAL, ws.EXPORTAR_TELEMETRIA
+    ws.base_url, ws.USAR_JORNAL, ws.EXPORTAR_TELEMETRIA = servidor.url, False, False
+    random.seed(semente)
+    df = gerar_planilha(linhas, semente)
+    resultados = []
+    try:
+        for nome, motor, opcoes, preenchido in CENARIOS:
+            if cenarios and nome not in cenarios:
+                continue
+            if motor == "asyncio" and ws_async is None:
+                print(f"{nome}: ignorado (aiohttp não instalado).")
+                continue
+            resultados.append(medir_cenario(servidor, nome, motor, opcoes, preenchido, df))
+    finally:
+        ws.base_url, ws.USAR_JORNAL, ws.EXPORTAR_TELEMETRIA = originais
+        servidor.parar()
+    return resultados
+
+
+def imprimir_resultados(resultados):
+    colunas = (
+        ("cenario", "Cenário", 26), ("linhas_por_segundo", "linhas/s", 9), ("segundos", "s", 8),
+        ("requisicoes", "req.", 6), ("latencia_p50_ms", "p50 ms", 8), ("latencia_p95_ms", "p95 ms", 8),
+        ("bytes_recebidos", "KiB rec.", 9), ("erros_http", "erros", 6), ("inventario_correto", "ok", 5),
+    )
+    print(" ".join(f"{titulo:>{largura}}" for _, titulo, largura in colunas))
+    for r in resultados:
+        valores = dict(r, bytes_recebidos=round(r["bytes_recebidos"] / 1024))
+        print(" ".join(f"{str(valores[chave]):>{largura}}" for chave, _, largura in colunas))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark do envio ao SisArv contra o servidor mock local.")
+    parser.add_argument("--linhas", type=int, default=300)
+    parser.add_argument("--latencia", type=float, default=0.05, help="latência simulada por requisição (s)")
+    parser.add_argument("--jitter", type=float, default=0.02, help="variação da latência (+/- s)")
+    parser.add_argument("--erros", type=float, default=0.0, help="fração de respostas 503")
+    parser.add_argument("--cenarios", nargs="*", help=f"subconjunto de: {', '.join(c[0] for c in CENARIOS)}")
+    parser.add_argument("--json", help="grava os resultados neste arquivo JSON")
+    args = parser.parse_args()
+    resultados = executar_benchmark(args.linhas, args.latencia, args.jitter, args.erros, args.cenarios)
+    imprimir_resultados(resultados)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
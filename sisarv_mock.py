@@ -0,0 +1,378 @@
+# -*- coding: utf-8 -*-
+"""
+SisArv - servidor local que imita as ações do index.php usadas pelo ws.py (login, consulta de inventários,
+tela de edição, inclusão e exclusão de árvores), para medir e testar o envio sem tocar o site de produção.
+Latência, variação (jitter), taxas de erro, validade da sessão e tamanho dos inventários são configuráveis.
+Uso: python sisarv_mock.py [porta] [árvores por inventário]  (e ws.base_url = "http://127.0.0.1:<porta>")
+"""
+
+import html
+import itertools
+import random
+import secrets
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+# Catálogo de espécies do mock: (nome popular, nome científico), na ordem dos values 1, 2, 3...
+ESPECIES_MOCK = (
+    ("Ipê-roxo", "Handroanthus impetiginosus"),
+    ("Ipê-amarelo", "Handroanthus chrysotrichus"),
+    ("Figueira-branca", "Ficus guaranitica"),
+    ("Goiaba", "Psidium guajava"),
+    ("Aroeira", "Schinus terebinthifolius"),
+    ("Abacate", "Persea americana"),
+    ("Sibipiruna", "Cenostigma sp."),
+    ("Pau-brasil", "Paubrasilia echinata"),
+    ("Jacarandá", "Jacaranda mimosifolia"),
+    ("Oiti", "Moquilea tomentosa"),
+    ("Amendoeira", "Terminalia catappa"),
+    ("Mangueira", "Mangifera indica"),
+    ("Jaqueira", "Artocarpus heterophyllus"),
+    ("Palmeira-imperial", "Roystonea oleracea"),
+    ("Flamboyant", "Delonix regia"),
+    ("Quaresmeira", "Pleroma granulosum"),
+    ("Pata-de-vaca", "Bauhinia forficata"),
+    ("Pitangueira", "Eugenia uniflora"),
+    ("Jambolão", "Syzygium cumini"),
+    ("Leucena", "Leucaena leucocephala"),
+    ("Castanheira", "Bertholletia excelsa"),
+    ("Cássia-imperial", "Cassia fistula"),
+    ("Sapucaia", "Lecythis pisonis"),
+    ("Paineira", "Ceiba speciosa"),
+    ("Embaúba", "Cecropia pachystachya"),
+    ("Angico", "Anadenanthera colubrina"),
+    ("Jequitibá", "Cariniana legalis"),
+    ("Tamarindeiro", "Tamarindus indica"),
+    ("Cajueiro", "Anacardium occidentale"),
+    ("não-identificada", "ni"),
+)
+
+# Demais selects da tela de edição: id -> [(value, texto)]
+SELECTS_MOCK = {
+    "estado_conservacao": [
+        ("6", "ESPÉCIMES NATIVAS DO BIOMA MATA ATLÂNTICA COM DAP >= 70CM"),
+        ("7", "ESPECIES DE ORIGEM EXÓTICA OU NATIVA NÃO PERTENCENTE AO BIOMA MATA ATLÂNTICA, COM DAP >= 80CM"),
+        ("8", "ESPÉCIES NÃO ENQUADRADAS"),
+    ],
+    "local_especime": [("1", "CALÇADA"), ("2", "CANTEIRO"), ("9", "NÃO INFORMADO")],
+    "fcb": [("3", "Espécime não enquadrada nos casos acima")],
+    "motivacao": [("1", "PROJETO"), ("2", "MORTE"), ("3", "SEM MOTIVO")],
+    "intencao": [("1", "CORTE"), ("2", "PRESERVAÇÃO"), ("3", "TRANSPLANTIO"), ("4", "AUTORIZAÇÃO ANTERIOR")],
+}
+
+# Ações que não exigem sessão autenticada
+ACOES_PUBLICAS = ("AbreTelaLogin", "AutenticaUsuario")
+
+
+@dataclass
+class ConfiguracaoMock:
+    """Parâmetros do servidor; podem ser alterados com o servidor rodando (valem para as próximas requisições)."""
+
+    num_inventarios: int = 2
+    arvores_por_inventario: int = 0
+    latencia: float = 0.0            # segundos por requisição
+    jitter: float = 0.0              # variação uniforme (+/-) sobre a latência
+    taxa_erros: float = 0.0          # fração das requisições respondidas com 503 antes de processar
+    taxa_erros_apos_inclusao: float = 0.0  # fração das inclusões gravadas mas respondidas com 502
+    ttl_sessao: float = 0.0          # segundos até a sessão expirar (0: não expira)
+    usuario: str = ""                # credenciais aceitas (vazio: qualquer uma)
+    senha: str = ""
+    tamanho_layout: int = 20000      # bytes de menu/scripts em cada página, como no site
+
+
+@dataclass
+class RegistroRequisicao:
+    acao: str
+    inicio: float
+    duracao: float
+    status: int
+    bytes_recebidos: int
+    bytes_enviados: int
+
+
+@dataclass
+class EstadoMock:
+    inventarios: dict = field(default_factory=dict)   # id_inventario -> {id_arvore: campos}
+    sessoes: dict = field(default_factory=dict)       # PHPSESSID -> {"autenticada", "criada_em", "csrf", ...}
+    registros: list = field(default_factory=list)     # RegistroRequisicao por requisição atendida
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    sequencia: object = field(default_factory=lambda: itertools.count(100000))
+
+    def contagem_acoes(self):
+        with self.lock:
+            contagem = {}
+            for r in self.registros:
+                contagem[r.acao] = contagem.get(r.acao, 0) + 1
+            return contagem
+
+    def numeros(self, id_inventario):
+        with self.lock:
+            return sorted(int(a["numero_especie_projeto"]) for a in self.inventarios.get(str(id_inventario), {}).values())
+
+
+def _opcoes(pares, selecionado=""):
+    return "".join(
+        f'<option value="{v}"{" selected" if v == selecionado else ""}>{html.escape(t)}</option>' for v, t in pares
+    )
+
+
+def _texto_opcao(pares, value):
+    return next((t for v, t in pares if v == str(value)), str(value or ""))
+
+
+class ServidorMockSisArv(ThreadingHTTPServer):
+    """Servidor HTTP do mock. iniciar() roda em thread daemon e retorna a URL base para ws.base_url."""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, porta=0, configuracao=None):
+        super().__init__(("127.0.0.1", porta), _TratadorMock)
+        self.configuracao = configuracao or ConfiguracaoMock()
+        self.estado = EstadoMock()
+        self.populares = [(str(i), p) for i, (p, _) in enumerate(ESPECIES_MOCK, start=1)]
+        self.cientificos = [(str(i), c) for i, (_, c) in enumerate(ESPECIES_MOCK, start=1)]
+        self.recriar_inventarios()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def iniciar(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self.url
+
+    def parar(self):
+        self.shutdown()
+        self.server_close()
+
+    def recriar_inventarios(self, arvores_por_inventario=None):
+        """Recria os inventários com árvores sintéticas (Nº 1..n) e limpa os registros de requisições."""
+        cfg = self.configuracao
+        n = cfg.arvores_por_inventario if arvores_por_inventario is None else arvores_por_inventario
+        rnd = random.Random(0)
+        with self.estado.lock:
+            self.estado.inventarios = {}
+            self.estado.registros = []
+            for i in range(cfg.num_inventarios):
+                arvores = {}
+                for numero in range(1, n + 1):
+                    especie = str(rnd.randint(1, len(ESPECIES_MOCK)))
+                    arvores[str(next(self.estado.sequencia))] = {
+                        "numero_especie_projeto": str(numero),
+                        "nome_popular": especie,
+                        "nome_cientifico": especie,
+                        "estado_conservacao": "8",
+                        "altura_arvore": f"{rnd.uniform(2, 15):.2f}".replace(".", ","),
+                        "diametro_copa": f"{rnd.uniform(1, 8):.2f}".replace(".", ","),
+                        "dap1": str(rnd.randint(5, 60)), "dap2": "0", "dap3": "0", "dap4": "0", "dap5": "0",
+                    }
+                self.estado.inventarios[str(1001 + i)] = arvores
+
+    def expirar_sessoes(self):
+        with self.estado.lock:
+            self.estado.sessoes.clear()
+
+    # --- Páginas ---
+
+    def _layout(self, titulo, corpo):
+        cfg = self.configuracao
+        menu = (
+            '<nav class="navbar"><ul class="nav">'
+            '<li class="dropdown"><a class="dropdown-toggle" href="#">Inventário Botânico</a><ul class="dropdown-menu">'
+            '<li><a id="opcaoMenu-ConsultarInventarioBotanico" href="#">Consultar Inventário Botânico</a></li>'
+            "</ul></li></ul></nav>"
+        )
+        scripts = "<script>/* " + "x" * max(0, cfg.tamanho_layout - len(menu)) + " */</script>"
+        return (
+            f'<!DOCTYPE html><html lang="pt-br"><head><meta charset="utf-8"><title>SisArv - {titulo}</title>'
+            f"{scripts}</head><body>{menu}<div class=\"container\">{corpo}</div></body></html>"
+        )
+
+    def pagina_redirect(self):
+        return (
+            '<html><body onload="document.redir.submit()"><form name="redir" method="post" action="index.php">'
+            "</form><script>document.redir.submit();</script></body></html>"
+        )
+
+    def pagina_login(self, csrf):
+        return self._layout("Login", (
+            f'<form id="logForm" method="post" action="index.php"><input type="hidden" name="action" value="AutenticaUsuario">'
+            f'<input type="hidden" name="csrf_key" value="{csrf}"><input type="text" name="formusuario">'
+            '<input type="password" name="formsenha"><button type="submit">Entrar</button></form>'
+        ))
+
+    def pagina_inicio(self):
+        return self._layout("Início", "<h1>Bem-vindo ao SisArv</h1>")
+
+    def pagina_consulta(self):
+        with self.estado.lock:
+            linhas = "".join(
+                f"<tr><td>{id_inv}</td><td>Inventário {id_inv}</td><td>{len(arvores)}</td><td>"
+                f"<button type=\"button\" onclick=\"abreTelaCadastroInventarioBotanico('{id_inv}','consulta')\">Editar</button>"
+                "</td></tr>"
+                for id_inv, arvores in self.estado.inventarios.items()
+            )
+        return self._layout("Consultar Inventário Botânico", (
+            '<table class="table"><thead><tr><th>Id</th><th>Nome</th><th>Árvores</th><th></th></tr></thead>'
+            f"<tbody>{linhas}</tbody></table>"
+        ))
+
+    def pagina_edicao(self, id_inventario):
+        with self.estado.lock:
+            arvores = list(self.estado.inventarios.get(str(id_inventario), {}).items())
+        linhas = []
+        for id_arvore, a in arvores:
+            celulas = (
+                a.get("numero_especie_projeto", ""),
+                _texto_opcao(self.populares, a.get("nome_popular")),
+                _texto_opcao(self.cientificos, a.get("nome_cientifico")),
+                _texto_opcao(SELECTS_MOCK["estado_conservacao"], a.get("estado_conservacao")),
+                a.get("altura_arvore", ""), a.get("diametro_copa", ""),
+                a.get("dap1", ""), a.get("dap2", ""), a.get("dap3", ""), a.get("dap4", ""), a.get("dap5", ""),
+            )
+            linhas.append(
+                "<tr>" + "".join(f"<td>{html.escape(str(c))}</td>" for c in celulas)
+                + f"<td><button type=\"button\" onclick=\"excluiArvore('{id_arvore}')\">Excluir</button></td></tr>"
+            )
+        selects = "".join(
+            f'<select id="{id_form}" name="{id_form}"><option value="">Selecione</option>{_opcoes(pares)}</select>'
+            for id_form, pares in (
+                ("nome_popular", self.populares), ("nome_cientifico", self.cientificos), *SELECTS_MOCK.items(),
+            )
+        )
+        return self._layout("Inventário Botânico", (
+            f'<form id="formArvore"><input type="hidden" name="id_inventario_botanico" value="{id_inventario}">'
+            f'<input type="text" id="numero_especie_projeto" name="numero_especie_projeto">{selects}'
+            '<select id="notabilidade" name="notabilidade"><option>SIM</option><option>NÃO</option></select>'
+            '<button type="button" onclick="incluiArvoreInventario()">Incluir Árvore na Lista</button></form>'
+            '<div id="panelArvores" class="panel"><table class="table"><thead><tr><th>Nº</th><th>Nome Popular</th>'
+            "<th>Nome Científico</th><th>Estado</th><th>Altura</th><th>Copa</th><th>DAP 1</th><th>DAP 2</th>"
+            "<th>DAP 3</th><th>DAP 4</th><th>DAP 5</th><th></th></tr></thead>"
+            f"<tbody>{''.join(linhas)}</tbody></table></div>"
+        ))
+
+    # --- Ações ---
+
+    def atender(self, sessao_id, dados):
+        """Processa um POST em index.php; retorna (status, html, novo PHPSESSID ou None)."""
+        cfg = self.configuracao
+        acao = dados.get("action", "")
+        if cfg.taxa_erros and random.random() < cfg.taxa_erros:
+            return 503, "Serviço temporariamente indisponível", None
+        novo_cookie = None
+        with self.estado.lock:
+            sessao = self.estado.sessoes.get(sessao_id)
+            if sessao is None:
+                sessao_id = novo_cookie = secrets.token_hex(16)
+                sessao = self.estado.sessoes[sessao_id] = {"autenticada": False, "criada_em": time.time()}
+            if cfg.ttl_sessao and time.time() - sessao["criada_em"] > cfg.ttl_sessao:
+                sessao.update(autenticada=False, criada_em=time.time())
+            autenticada = sessao["autenticada"]
+        if acao == "AbreTelaLogin" or (not autenticada and acao not in ACOES_PUBLICAS):
+            sessao["csrf"] = secrets.token_hex(8)
+            return 200, self.pagina_login(sessao["csrf"]), novo_cookie
+        if acao == "AutenticaUsuario":
+            ok = dados.get("csrf_key") == sessao.get("csrf") and (
+                not cfg.usuario or (dados.get("formusuario") == cfg.usuario and dados.get("formsenha") == cfg.senha)
+            )
+            if not ok:
+                sessao["csrf"] = secrets.token_hex(8)
+                return 200, self.pagina_login(sessao["csrf"]), novo_cookie
+            sessao.update(autenticada=True, criada_em=time.time(), destino=None)
+            return 200, self.pagina_redirect(), novo_cookie
+        if acao == "AbreTelaConsultaInventarioBotanico":
+            return 200, self.pagina_consulta(), novo_cookie
+        id_inventario = str(dados.get("id_inventario_botanico") or sessao.get("destino") or "")
+        if acao == "AbreTelaCadastroInventarioBotanico":
+            if id_inventario not in self.estado.inventarios:
+                return 404, "Inventário não encontrado", novo_cookie
+            sessao["destino"] = id_inventario
+            return 200, self.pagina_edicao(id_inventario), novo_cookie
+        if acao == "IncluiArvoreInventarioBotanico":
+            campos = {k: v for k, v in dados.items() if k not in ("action", "origem", "id_inventario_botanico")}
+            with self.estado.lock:
+                arvores = self.estado.inventarios.get(id_inventario)
+                if arvores is None:
+                    return 404, "Inventário não encontrado", novo_cookie
+                id_arvore = campos.pop("id_em_edicao", "") or str(next(self.estado.sequencia))
+                arvores[id_arvore] = campos
+            sessao["destino"] = id_inventario
+            if cfg.taxa_erros_apos_inclusao and random.random() < cfg.taxa_erros_apos_inclusao:
+                return 502, "Bad Gateway", novo_cookie
+            return 200, self.pagina_redirect(), novo_cookie
+        if acao == "ExcluiArvoreInventarioBotanico":
+            with self.estado.lock:
+                self.estado.inventarios.get(id_inventario, {}).pop(dados.get("id_inventario_botanico_especie"), None)
+            sessao["destino"] = id_inventario
+            return 200, self.pagina_redirect(), novo_cookie
+        if acao == "" and sessao.get("destino"):
+            return 200, self.pagina_edicao(sessao["destino"]), novo_cookie
+        return 200, self.pagina_inicio(), novo_cookie
+
+
+class _TratadorMock(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _cookie_sessao(self):
+        for parte in (self.headers.get("Cookie") or "").split(";"):
+            nome, _, valor = parte.strip().partition("=")
+            if nome == "PHPSESSID":
+                return valor
+        return None
+
+    def _responder(self, acao, inicio, recebidos, status, corpo, novo_cookie):
+        cfg = self.server.configuracao
+        espera = cfg.latencia + (random.uniform(-cfg.jitter, cfg.jitter) if cfg.jitter else 0.0)
+        if espera > 0:
+            time.sleep(espera)
+        dados = corpo.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(dados)))
+        if novo_cookie:
+            self.send_header("Set-Cookie", f"PHPSESSID={novo_cookie}; path=/")
+        self.end_headers()
+        self.wfile.write(dados)
+        with self.server.estado.lock:
+            self.server.estado.registros.append(RegistroRequisicao(
+                acao, inicio, time.perf_counter() - inicio, status, recebidos, len(dados),
+            ))
+
+    def do_GET(self):
+        inicio = time.perf_counter()
+        novo_cookie = None if self._cookie_sessao() else secrets.token_hex(16)
+        self._responder("GET", inicio, 0, 200, self.server.pagina_redirect(), novo_cookie)
+
+    def do_POST(self):
+        inicio = time.perf_counter()
+        tamanho = int(self.headers.get("Content-Length") or 0)
+        corpo = self.rfile.read(tamanho).decode("utf-8", errors="replace")
+        dados = {k: v[0] for k, v in parse_qs(corpo, keep_blank_values=True).items()}
+        status, pagina, novo_cookie = self.server.atender(self._cookie_sessao(), dados)
+        self._responder(dados.get("action", ""), inicio, tamanho, status, pagina, novo_cookie)
+
+
+def iniciar_mock(porta=0, **configuracao):
+    """Cria e inicia um ServidorMockSisArv em thread daemon (configuracao: campos de ConfiguracaoMock)."""
+    servidor = ServidorMockSisArv(porta, ConfiguracaoMock(**configuracao))
+    servidor.iniciar()
+    return servidor
+
+
+if __name__ == "__main__":
+    porta = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    arvores = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    servidor = ServidorMockSisArv(porta, ConfiguracaoMock(arvores_por_inventario=arvores))
+    print(f"Mock do SisArv em {servidor.url} (inventários: {', '.join(servidor.estado.inventarios)})")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        servidor.server_close()
@@ -1,306 +1,502 @@
-# -*- coding: utf-8 -*-
-"""
-SisArv - Envio de inventário botânico via Streamlit
-Login/senha configuráveis e upload de planilha (xlsx, csv, etc.).
-Design de referência: Direcional (Simulador Imobiliário).
-"""
-
-import streamlit as st
-import pandas as pd
-import io
-import sys
-import os
-import threading
-import time
-
-# Cores e estilo (referência Direcional)
-COR_AZUL_ESC = "#002c5d"
-COR_VERMELHO = "#e30613"
-COR_FUNDO = "#fcfdfe"
-COR_BORDA = "#eef2f6"
-COR_TEXTO_MUTED = "#64748b"
-COR_INPUT_BG = "#f0f2f6"
-
-# Importa o módulo ws (mesmo diretório)
-try:
-    import ws
-    from ws import run_sisarv, preprocessar_df
-except ImportError:
-    ws = None
-    run_sisarv = None
-    preprocessar_df = None
-
-
-def aplicar_estilo():
-    st.markdown(f"""
-        <style>
-        @import url('https://fonts.googleapis.com/css2?family=Montserrat:wght@400;500;600;700;800;900&family=Inter:wght@300;400;500;600;700&display=swap');
-
-        html, body, [data-testid="stAppViewContainer"] {{
-            font-family: 'Inter', sans-serif;
-            color: {COR_AZUL_ESC};
-            background-color: {COR_FUNDO};
-        }}
-
-        h1, h2, h3, h4 {{
-            font-family: 'Montserrat', sans-serif !important;
-            color: {COR_AZUL_ESC} !important;
-            font-weight: 800;
-            text-align: center;
-        }}
-
-        .block-container {{ max-width: 900px !important; padding: 2rem !important; }}
-
-        div[data-baseweb="input"] {{
-            border-radius: 8px !important;
-            border: 1px solid #e2e8f0 !important;
-            background-color: {COR_INPUT_BG} !important;
-        }}
-
-        /* Container do botão: mesma largura dos inputs (sobrescreve estilo inline do Streamlit) */
-        .row-widget.stButton,
-        div[data-testid="column"]:has(.stButton),
-        div[data-testid="stVerticalBlock"] > div:has(.stButton),
-        .stButton {{
-            width: 100% !important;
-            max-width: 100% !important;
-        }}
-
-        .stButton {{
-            display: block !important;
-        }}
-
-        .stButton button {{
-            font-family: 'Inter', sans-serif;
-            border-radius: 8px !important;
-            padding: 0 20px !important;
-            box-sizing: border-box !important;
-            width: 100% !important;
-            max-width: 100% !important;
-            height: 38px !important;
-            min-height: 38px !important;
-            font-weight: 700 !important;
-            text-transform: uppercase;
-            letter-spacing: 0.05em;
-        }}
-
-        .stButton button[kind="primary"] {{
-            background: {COR_VERMELHO} !important;
-            color: #ffffff !important;
-            border: none !important;
-        }}
-
-        .stButton button[kind="primary"]:hover {{
-            background: #c40510 !important;
-        }}
-
-        .header-container {{
-            text-align: center;
-            padding: 40px 0;
-            background: #ffffff;
-            margin-bottom: 40px;
-            border-radius: 0 0 24px 24px;
-            border-bottom: 1px solid {COR_BORDA};
-            box-shadow: 0 10px 25px -15px rgba(0,44,93,0.15);
-        }}
-
-        .header-title {{
-            font-family: 'Montserrat', sans-serif;
-            color: {COR_AZUL_ESC};
-            font-size: 2rem;
-            font-weight: 900;
-            margin: 0;
-            text-transform: uppercase;
-            letter-spacing: 0.15em;
-        }}
-
-        .header-subtitle {{
-            color: {COR_AZUL_ESC};
-            font-size: 0.95rem;
-            font-weight: 600;
-            margin-top: 10px;
-            opacity: 0.85;
-        }}
-
-        .card {{
-            background: #ffffff;
-            padding: 24px;
-            border-radius: 16px;
-            border: 1px solid {COR_BORDA};
-            margin-bottom: 24px;
-        }}
-
-        .footer {{ text-align: center; padding: 40px 0; color: {COR_AZUL_ESC}; font-size: 0.8rem; opacity: 0.7; }}
-        </style>
-    """, unsafe_allow_html=True)
-
-
-def carregar_planilha(uploaded_file):
-    """Lê xlsx, csv ou similar e retorna DataFrame."""
-    nome = (uploaded_file.name or "").lower()
-    raw = uploaded_file.read()
-    if nome.endswith(".xlsx") or nome.endswith(".xls"):
-        return pd.read_excel(io.BytesIO(raw))
-    if nome.endswith(".csv"):
-        try:
-            return pd.read_csv(io.BytesIO(raw), encoding="utf-8", sep=";")
-        except Exception:
-            return pd.read_csv(io.BytesIO(raw), encoding="utf-8", sep=",")
-    if nome.endswith(".ods"):
-        try:
-            return pd.read_excel(io.BytesIO(raw), engine="odf")
-        except Exception:
-            st.error("Para arquivos .ods instale: pip install odfpy")
-            return None
-    st.warning("Formato não suportado. Use .xlsx, .csv ou .ods.")
-    return None
-
-
-def main():
-    st.set_page_config(page_title="SisArv - Inventário Botânico", page_icon="🌳", layout="centered")
-    aplicar_estilo()
-
-    st.markdown(
-        '<div class="header-container">'
-        '<div class="header-title">SisArv</div>'
-        '<div class="header-subtitle">Envio de inventário botânico ao sistema</div>'
-        '</div>',
-        unsafe_allow_html=True,
-    )
-
-    if run_sisarv is None or preprocessar_df is None:
-        st.error("Módulo **ws.py** não encontrado. Coloque **sisarv_streamlit.py** na mesma pasta que **ws.py** e execute: `streamlit run sisarv_streamlit.py`")
-        st.markdown('<div class="footer">Direcional Engenharia</div>', unsafe_allow_html=True)
-        return
-
-    with st.form("form_sisarv"):
-        st.markdown("#### Credenciais do SisArv")
-        login = st.text_input("E-mail (login)", placeholder="seu@email.com", key="login")
-        senha = st.text_input("Senha", type="password", placeholder="••••••••", key="senha")
-        st.markdown("---")
-        st.markdown("#### Planilha de dados")
-        uploaded = st.file_uploader(
-            "Envie a planilha (XLSX, CSV ou ODS) com as colunas do inventário (Nº, Nome Vulgar, Nome Científico, etc.)",
-            type=["xlsx", "xls", "csv", "ods"],
-            key="upload",
-        )
-        enviar = st.form_submit_button("ENVIAR DADOS AO SISARV", type="primary", use_container_width=True)
-
-    # Estado da execução em background
-    if "sisarv_running" not in st.session_state:
-        st.session_state.sisarv_running = False
-    if "sisarv_stop_requested" not in st.session_state:
-        st.session_state.sisarv_stop_requested = False
-    if "sisarv_logs" not in st.session_state:
-        st.session_state.sisarv_logs = []
-    if "sisarv_result" not in st.session_state:
-        st.session_state.sisarv_result = None
-    if "sisarv_progress_current" not in st.session_state:
-        st.session_state.sisarv_progress_current = 0
-    if "sisarv_progress_total" not in st.session_state:
-        st.session_state.sisarv_progress_total = 0
-
-    # Se está rodando, mostrar progresso (tqdm-like) + log + botão Stop e atualizar a página periodicamente
-    if st.session_state.sisarv_running:
-        total = st.session_state.get("sisarv_progress_total", 0)
-        current = st.session_state.get("sisarv_progress_current", 0)
-        if total > 0:
-            st.progress(current / total, text=f"Árvore **{current}** de **{total}**")
-        else:
-            st.caption("Aguardando início do preenchimento...")
-        st.markdown("#### Log de execução")
-        log_text = "\n".join(st.session_state.sisarv_logs[-50:]) if st.session_state.sisarv_logs else "(aguardando...)"
-        st.code(log_text, language=None)
-        stop_clicked = st.button("⏹ PARAR", type="secondary", use_container_width=True)
-        if stop_clicked:
-            st.session_state.sisarv_stop_requested = True
-            st.rerun()
-        time.sleep(1)
-        st.rerun()
-
-    # Se terminou (resultado disponível), mostrar e limpar
-    if st.session_state.sisarv_result is not None:
-        sucesso, arvores_nao_encontradas, erro = st.session_state.sisarv_result
-        st.session_state.sisarv_result = None
-        st.session_state.sisarv_running = False
-        st.session_state.sisarv_stop_requested = False
-        if erro:
-            st.error(f"**Erro:** {erro}")
-        elif sucesso:
-            st.success("Processamento concluído.")
-            if arvores_nao_encontradas:
-                st.markdown("#### Árvores não encontradas nos selects")
-                for n, vulg, cien in arvores_nao_encontradas:
-                    st.caption(f"Nº {n}: {vulg!r} / {cien!r}")
-                st.info(f"Total: **{len(arvores_nao_encontradas)}** árvore(s) não encontrada(s).")
-        else:
-            st.warning("Processamento finalizado com avisos. Veja o log acima.")
-        st.markdown('<div class="footer">Direcional Engenharia | SisArv Inventário Botânico</div>', unsafe_allow_html=True)
-        return
-
-    if not enviar:
-        st.markdown('<div class="footer">Informe login, senha e envie a planilha para continuar.</div>', unsafe_allow_html=True)
-        return
-
-    if not login or not senha:
-        st.error("Preencha **e-mail** e **senha** do SisArv.")
-        return
-
-    if uploaded is None:
-        st.error("Envie um arquivo (XLSX, CSV ou ODS).")
-        return
-
-    df_raw = carregar_planilha(uploaded)
-    if df_raw is None or df_raw.empty:
-        st.error("Não foi possível ler a planilha ou ela está vazia.")
-        return
-
-    df = preprocessar_df(df_raw)
-    if df.empty:
-        st.warning("Após o pré-processamento a planilha ficou vazia.")
-        return
-
-    st.success(f"Planilha carregada: **{len(df)}** linha(s).")
-    with st.expander("Visualizar primeiras linhas"):
-        st.dataframe(df.head(20), use_container_width=True, hide_index=True)
-
-    def progress_callback(msg):
-        st.session_state.sisarv_logs.append(msg)
-
-    def progress_range_callback(atual, total):
-        st.session_state.sisarv_progress_current = atual
-        st.session_state.sisarv_progress_total = total
-
-    def run_in_thread():
-        try:
-            result = run_sisarv(
-                login.strip(),
-                senha.strip(),
-                df,
-                progress_callback=progress_callback,
-                should_stop=lambda: st.session_state.get("sisarv_stop_requested", False),
-                progress_range_callback=progress_range_callback,
-            )
-            st.session_state.sisarv_result = result
-        except Exception as e:
-            st.session_state.sisarv_result = (False, [], str(e))
-        finally:
-            st.session_state.sisarv_running = False
-
-    st.session_state.sisarv_logs = []
-    st.session_state.sisarv_stop_requested = False
-    st.session_state.sisarv_running = True
-    st.session_state.sisarv_progress_current = 0
-    st.session_state.sisarv_progress_total = len(df)
-    thread = threading.Thread(target=run_in_thread)
-    thread.start()
-
-    # Redesenha a página em 1s para entrar no bloco "sisarv_running" (log + botão PARAR)
-    st.markdown("#### Log de execução")
-    st.code("(iniciando...)", language=None)
-    time.sleep(1)
-    st.rerun()
-
-
-if __name__ == "__main__":
-    main()
+# -*- coding: utf-8 -*-
+"""
+SisArv - Envio de inventário botânico via Streamlit
+Login/senha configuráveis e upload de planilha (xlsx, csv, etc.).
+Design de referência: Direcional (Simulador Imobiliário).
+"""
+
+import streamlit as st
+import pandas as pd
+import sys
+import hashlib
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Cores e estilo (referência Direcional)
+COR_AZUL_ESC = "#002c5d"
+COR_VERMELHO = "#e30613"
+COR_FUNDO = "#fcfdfe"
+COR_BORDA = "#eef2f6"
+COR_TEXTO_MUTED = "#64748b"
+COR_INPUT_BG = "#f0f2f6"
+
+# Envios executados ao mesmo tempo no processo (os demais aguardam na fila) e intervalo de atualização do progresso
+MAX_TAREFAS_SIMULTANEAS = 4
+INTERVALO_ATUALIZACAO = 1.0
+# Tarefas concluídas e não exibidas são descartadas após este tempo (segundos)
+TTL_TAREFAS_CONCLUIDAS = 3600
+
+# Importa o módulo ws (mesmo diretório)
+try:
+    import ws
+    from ws import run_sisarv, preprocessar_df
+except ImportError:
+    ws = None
+    run_sisarv = None
+    preprocessar_df = None
+
+# Motor assíncrono (opcional: requer aiohttp)
+try:
+    import ws_async
+except ImportError:
+    ws_async = None
+
+
+def aplicar_estilo():
+    st.markdown(f"""
+        <style>
+        @import url('https://fonts.googleapis.com/css2?family=Montserrat:wght@400;500;600;700;800;900&family=Inter:wght@300;400;500;600;700&display=swap');
+
+        html, body, [data-testid="stAppViewContainer"] {{
+            font-family: 'Inter', sans-serif;
+            color: {COR_AZUL_ESC};
+            background-color: {COR_FUNDO};
+        }}
+
+        h1, h2, h3, h4 {{
+            font-family: 'Montserrat', sans-serif !important;
+            color: {COR_AZUL_ESC} !important;
+            font-weight: 800;
+            text-align: center;
+        }}
+
+        .block-container {{ max-width: 900px !important; padding: 2rem !important; }}
+
+        div[data-baseweb="input"] {{
+            border-radius: 8px !important;
+            border: 1px solid #e2e8f0 !important;
+            background-color: {COR_INPUT_BG} !important;
+        }}
+
+        /* Container do botão: mesma largura dos inputs (sobrescreve estilo inline do Streamlit) */
+        .row-widget.stButton,
+        div[data-testid="column"]:has(.stButton),
+        div[data-testid="stVerticalBlock"] > div:has(.stButton),
+        .stButton {{
+            width: 100% !important;
+            max-width: 100% !important;
+        }}
+
+        .stButton {{
+            display: block !important;
+        }}
+
+        .stButton button {{
+            font-family: 'Inter', sans-serif;
+            border-radius: 8px !important;
+            padding: 0 20px !important;
+            box-sizing: border-box !important;
+            width: 100% !important;
+            max-width: 100% !important;
+            height: 38px !important;
+            min-height: 38px !important;
+            font-weight: 700 !important;
+            text-transform: uppercase;
+            letter-spacing: 0.05em;
+        }}
+
+        .stButton button[kind="primary"] {{
+            background: {COR_VERMELHO} !important;
+            color: #ffffff !important;
+            border: none !important;
+        }}
+
+        .stButton button[kind="primary"]:hover {{
+            background: #c40510 !important;
+        }}
+
+        .header-container {{
+            text-align: center;
+            padding: 40px 0;
+            background: #ffffff;
+            margin-bottom: 40px;
+            border-radius: 0 0 24px 24px;
+            border-bottom: 1px solid {COR_BORDA};
+            box-shadow: 0 10px 25px -15px rgba(0,44,93,0.15);
+        }}
+
+        .header-title {{
+            font-family: 'Montserrat', sans-serif;
+            color: {COR_AZUL_ESC};
+            font-size: 2rem;
+            font-weight: 900;
+            margin: 0;
+            text-transform: uppercase;
+            letter-spacing: 0.15em;
+        }}
+
+        .header-subtitle {{
+            color: {COR_AZUL_ESC};
+            font-size: 0.95rem;
+            font-weight: 600;
+            margin-top: 10px;
+            opacity: 0.85;
+        }}
+
+        .card {{
+            background: #ffffff;
+            padding: 24px;
+            border-radius: 16px;
+            border: 1px solid {COR_BORDA};
+            margin-bottom: 24px;
+        }}
+
+        .footer {{ text-align: center; padding: 40px 0; color: {COR_AZUL_ESC}; font-size: 0.8rem; opacity: 0.7; }}
+        </style>
+    """, unsafe_allow_html=True)
+
+
+@st.cache_resource
+def obter_cache_catalogos():
+    """Cache de catálogos de espécies compartilhado entre todas as sessões do processo."""
+    return ws.CacheCatalogos()
+
+
+class TarefaSisArv:
+    """
+    Um envio em background. A thread do envio só publica eventos na fila (log, progresso, fim); a página consome
+    a fila em drenar() e mantém o estado exibido (últimas linhas de log, progresso, resultado).
+    """
+
+    def __init__(self, executar, telemetria, total):
+        self.id = uuid.uuid4().hex
+        self.executar = executar
+        self.telemetria = telemetria
+        self.eventos = queue.Queue()
+        self.parada = threading.Event()
+        self.logs = deque(maxlen=500)
+        self.atual = 0
+        self.total = total
+        self.iniciada = False
+        self.resultado = None
+        self.finalizada_em = None
+
+    def log(self, msg):
+        self.eventos.put(("log", msg))
+
+    def progresso(self, atual, total):
+        self.eventos.put(("progresso", (atual, total)))
+
+    def parar(self):
+        self.parada.set()
+
+    def rodar(self):
+        self.eventos.put(("inicio", None))
+        try:
+            resultado = self.executar(self)
+        except Exception as e:
+            resultado = (False, [], str(e))
+        self.eventos.put(("fim", resultado))
+        self.finalizada_em = time.time()
+
+    def drenar(self):
+        """Aplica os eventos pendentes ao estado exibido. Retorna True se algo mudou."""
+        mudou = False
+        while True:
+            try:
+                tipo, dado = self.eventos.get_nowait()
+            except queue.Empty:
+                return mudou
+            mudou = True
+            if tipo == "log":
+                self.logs.append(dado)
+            elif tipo == "progresso":
+                self.atual, self.total = dado
+            elif tipo == "inicio":
+                self.iniciada = True
+            elif tipo == "fim":
+                self.resultado = dado
+
+    @property
+    def concluida(self):
+        return self.resultado is not None
+
+
+class GerenciadorTarefas:
+    """Tarefas de todas as sessões do processo; no máximo MAX_TAREFAS_SIMULTANEAS envios rodam ao mesmo tempo."""
+
+    def __init__(self, max_simultaneas=MAX_TAREFAS_SIMULTANEAS):
+        self._executor = ThreadPoolExecutor(max_workers=max_simultaneas, thread_name_prefix="sisarv")
+        self._tarefas = {}
+        self._lock = threading.Lock()
+
+    def submeter(self, executar, telemetria, total):
+        tarefa = TarefaSisArv(executar, telemetria, total)
+        with self._lock:
+            self._descartar_antigas()
+            self._tarefas[tarefa.id] = tarefa
+        self._executor.submit(tarefa.rodar)
+        return tarefa
+
+    def obter(self, id_tarefa):
+        with self._lock:
+            return self._tarefas.get(id_tarefa)
+
+    def remover(self, id_tarefa):
+        with self._lock:
+            self._tarefas.pop(id_tarefa, None)
+
+    def tem_ativas(self):
+        """True se algum envio está na fila ou rodando."""
+        with self._lock:
+            return any(tarefa.finalizada_em is None for tarefa in self._tarefas.values())
+
+    def _descartar_antigas(self):
+        # Resultados que nenhuma sessão veio buscar (aba fechada durante o envio)
+        limite = time.time() - TTL_TAREFAS_CONCLUIDAS
+        for id_tarefa, tarefa in list(self._tarefas.items()):
+            if tarefa.finalizada_em is not None and tarefa.finalizada_em < limite:
+                del self._tarefas[id_tarefa]
+
+
+@st.cache_resource
+def obter_gerenciador_tarefas():
+    """Gerenciador de tarefas compartilhado entre todas as sessões do processo."""
+    return GerenciadorTarefas()
+
+
+def formatar_duracao(segundos):
+    """Ex.: 75 -> '1min15s'."""
+    segundos = int(round(segundos))
+    if segundos < 60:
+        return f"{segundos}s"
+    minutos, segundos = divmod(segundos, 60)
+    if minutos < 60:
+        return f"{minutos}min{segundos:02d}s"
+    horas, minutos = divmod(minutos, 60)
+    return f"{horas}h{minutos:02d}min"
+
+
+def painel_progresso(tarefa):
+    """Progresso, log e botão PARAR; só este trecho é redesenhado enquanto o envio roda (exibir_progresso)."""
+    tarefa.drenar()
+    if tarefa.concluida:
+        # Página inteira uma única vez, para exibir o resultado
+        st.rerun()
+    if tarefa.total > 0 and tarefa.iniciada:
+        current, total = tarefa.atual, tarefa.total
+        excluindo = tarefa.telemetria.fase == "exclusao"
+        texto = f"{'Excluindo árvore' if excluindo else 'Árvore'} **{current}** de **{total}**"
+        taxa, restante = tarefa.telemetria.ritmo()
+        if taxa > 0:
+            texto += f" · {taxa:.1f} {'exclusão(ões)' if excluindo else 'árvore(s)'}/s"
+        if restante is not None and current < total:
+            texto += f" · restam ~{formatar_duracao(restante)}"
+        st.progress(current / total, text=texto)
+    elif not tarefa.iniciada:
+        st.caption("Aguardando na fila: outros envios em andamento neste servidor...")
+    else:
+        st.caption("Aguardando início do preenchimento...")
+    st.markdown("#### Log de execução")
+    log_text = "\n".join(list(tarefa.logs)[-50:]) if tarefa.logs else "(aguardando...)"
+    st.code(log_text, language=None)
+    if tarefa.parada.is_set():
+        st.caption("Parada solicitada; aguardando as requisições em andamento...")
+    elif st.button("⏹ PARAR", type="secondary", use_container_width=True):
+        tarefa.parar()
+        st.rerun(scope="fragment")
+
+
+def exibir_progresso(tarefa, gerenciador):
+    """painel_progresso como fragmento, atualizado a cada INTERVALO_ATUALIZACAO só enquanto há envio ativo."""
+    run_every = INTERVALO_ATUALIZACAO if gerenciador.tem_ativas() else None
+    st.fragment(painel_progresso, run_every=run_every)(tarefa)
+
+
+@st.cache_data(max_entries=16, show_spinner="Lendo planilha...")
+def ler_planilha_em_cache(digest, nome, _raw):
+    """Planilha lida e pré-processada, em cache pelo hash do conteúdo (reenvio do mesmo arquivo não relê nada)."""
+    df_raw = ws.ler_planilha(_raw, nome)
+    return len(df_raw), preprocessar_df(df_raw)
+
+
+def carregar_planilha(uploaded_file):
+    """Lê xlsx, csv ou ods e retorna (linhas lidas, DataFrame pré-processado), ou None se não for possível ler."""
+    nome = (uploaded_file.name or "").lower()
+    raw = uploaded_file.getvalue()
+    try:
+        return ler_planilha_em_cache(hashlib.sha256(raw).hexdigest(), nome, raw)
+    except ValueError as e:
+        st.warning(str(e))
+    except ImportError:
+        st.error("Para arquivos .ods instale: pip install odfpy (ou python-calamine)")
+    return None
+
+
+def main():
+    st.set_page_config(page_title="SisArv - Inventário Botânico", page_icon="🌳", layout="centered")
+    aplicar_estilo()
+
+    st.markdown(
+        '<div class="header-container">'
+        '<div class="header-title">SisArv</div>'
+        '<div class="header-subtitle">Envio de inventário botânico ao sistema</div>'
+        '</div>',
+        unsafe_allow_html=True,
+    )
+
+    if run_sisarv is None or preprocessar_df is None:
+        st.error("Módulo **ws.py** não encontrado. Coloque **sisarv_streamlit.py** na mesma pasta que **ws.py** e execute: `streamlit run sisarv_streamlit.py`")
+        st.markdown('<div class="footer">Direcional Engenharia</div>', unsafe_allow_html=True)
+        return
+
+    with st.form("form_sisarv"):
+        st.markdown("#### Credenciais do SisArv")
+        login = st.text_input("E-mail (login)", placeholder="seu@email.com", key="login")
+        senha = st.text_input("Senha", type="password", placeholder="••••••••", key="senha")
+        st.markdown("---")
+        st.markdown("#### Planilha de dados")
+        uploaded = st.file_uploader(
+            "Envie a planilha (XLSX, CSV ou ODS) com as colunas do inventário (Nº, Nome Vulgar, Nome Científico, etc.)",
+            type=["xlsx", "xls", "csv", "ods"],
+            key="upload",
+        )
+        with st.expander("Opções avançadas"):
+            num_workers = st.number_input(
+                "Inclusões simultâneas (requisições em paralelo)",
+                min_value=1, max_value=16, value=ws.NUM_WORKERS_INCLUSAO, step=1, key="num_workers",
+            )
+            reconciliar = st.checkbox(
+                "Confirmar inclusões em lote ao final (mais rápido para inventários grandes)",
+                value=ws.CONFIRMACAO_INCLUSAO == "reconciliacao", key="reconciliar",
+            )
+            diferencial = st.checkbox(
+                "Sincronizar apenas as alterações (não exclui o inventário inteiro)",
+                value=ws.MODO_SINCRONIZACAO == "diferencial", key="diferencial",
+            )
+            adaptativa = st.checkbox(
+                f"Ajustar a concorrência automaticamente (até {ws.CONCORRENCIA_MAXIMA} requisições)",
+                value=ws.CONCORRENCIA_ADAPTATIVA, key="adaptativa",
+            )
+            assincrono = st.checkbox(
+                f"Usar o motor assíncrono (até {ws_async.CONCORRENCIA_ASYNC if ws_async else 0} requisições em um único event loop)",
+                value=False, key="assincrono", disabled=ws_async is None,
+                help=None if ws_async else "Instale o pacote aiohttp para habilitar.",
+            )
+        enviar = st.form_submit_button("ENVIAR DADOS AO SISARV", type="primary", use_container_width=True)
+        validar = st.form_submit_button("VALIDAR PLANILHA (SEM LOGIN)", use_container_width=True)
+
+    # Envio em background: a sessão guarda apenas o id da tarefa
+    gerenciador = obter_gerenciador_tarefas()
+    tarefa = gerenciador.obter(st.session_state.get("sisarv_tarefa"))
+
+    if tarefa is not None and not tarefa.concluida:
+        tarefa.drenar()
+    if tarefa is not None and not tarefa.concluida:
+        exibir_progresso(tarefa, gerenciador)
+        return
+
+    # Se terminou (resultado disponível), mostrar e limpar
+    if tarefa is not None:
+        sucesso, arvores_nao_encontradas, erro = tarefa.resultado
+        gerenciador.remover(tarefa.id)
+        st.session_state.sisarv_tarefa = None
+        st.markdown("#### Log de execução")
+        st.code("\n".join(list(tarefa.logs)[-50:]) or "(sem mensagens)", language=None)
+        if erro:
+            st.error(f"**Erro:** {erro}")
+        elif sucesso:
+            st.success("Processamento concluído.")
+            if arvores_nao_encontradas:
+                st.markdown("#### Árvores não encontradas nos selects")
+                for n, vulg, cien in arvores_nao_encontradas:
+                    st.caption(f"Nº {n}: {vulg!r} / {cien!r}")
+                st.info(f"Total: **{len(arvores_nao_encontradas)}** árvore(s) não encontrada(s).")
+        else:
+            st.warning("Processamento finalizado com avisos. Veja o log acima.")
+        relatorio = tarefa.telemetria.relatorio()
+        with st.expander("Tempo por fase e por ação"):
+            st.caption(
+                f"{relatorio['linhas']['por_segundo']:.2f} árvore(s)/s em {formatar_duracao(relatorio['duracao_segundos'])}: "
+                + ", ".join(f"{fase} {formatar_duracao(seg)}" for fase, seg in relatorio["fases"].items())
+            )
+            if relatorio["acoes"]:
+                st.dataframe(pd.DataFrame(relatorio["acoes"]).drop(columns=["status"]), use_container_width=True, hide_index=True)
+        st.markdown('<div class="footer">Direcional Engenharia | SisArv Inventário Botânico</div>', unsafe_allow_html=True)
+        return
+
+    if not enviar and not validar:
+        st.markdown('<div class="footer">Informe login, senha e envie a planilha para continuar.</div>', unsafe_allow_html=True)
+        return
+
+    if enviar and (not login or not senha):
+        st.error("Preencha **e-mail** e **senha** do SisArv.")
+        return
+
+    if uploaded is None:
+        st.error("Envie um arquivo (XLSX, CSV ou ODS).")
+        return
+
+    planilha = carregar_planilha(uploaded)
+    if planilha is None or not planilha[0]:
+        st.error("Não foi possível ler a planilha ou ela está vazia.")
+        return
+
+    df = planilha[1]
+    if df.empty:
+        st.warning("Após o pré-processamento a planilha ficou vazia.")
+        return
+
+    st.success(f"Planilha carregada: **{len(df)}** linha(s).")
+    with st.expander("Visualizar primeiras linhas"):
+        st.dataframe(df.head(20), use_container_width=True, hide_index=True)
+
+    if validar:
+        # Simulação offline: mesmas regras do envio, com o último catálogo de espécies em cache
+        relatorio = ws.validar_planilha(df, cache_catalogos=obter_cache_catalogos())
+        if relatorio.ok:
+            st.success("Validação concluída: nenhum problema encontrado.")
+        else:
+            st.warning(
+                f"Validação: **{len(relatorio.nomes_nao_encontrados)}** nome(s) não encontrado(s), "
+                f"**{len(relatorio.numeros_duplicados)}** Nº repetido(s), **{len(relatorio.linhas_sem_numero)}** "
+                f"linha(s) sem Nº e **{len(relatorio.medidas_invalidas)}** medida(s) inválida(s)."
+            )
+        if not relatorio.catalogo_verificado:
+            st.info("Nenhum catálogo de espécies em cache: os nomes só são conferidos após um envio a este servidor.")
+        st.code("\n".join(relatorio.resumo()), language=None)
+        return
+
+    cache_catalogos = obter_cache_catalogos()
+    telemetria = ws.TelemetriaExecucao(motor="asyncio" if assincrono and ws_async is not None else "requests")
+
+    def executar(tarefa):
+        # Roda na thread do gerenciador: não acessa st.session_state
+        if assincrono and ws_async is not None:
+            return ws_async.run_sisarv_assincrono(
+                login.strip(),
+                senha.strip(),
+                df,
+                progress_callback=tarefa.log,
+                should_stop=tarefa.parada.is_set,
+                progress_range_callback=tarefa.progresso,
+                modo_sincronizacao="diferencial" if diferencial else "substituir",
+                cache_catalogos=cache_catalogos,
+                telemetria=telemetria,
+            )
+        return run_sisarv(
+            login.strip(),
+            senha.strip(),
+            df,
+            progress_callback=tarefa.log,
+            should_stop=tarefa.parada.is_set,
+            progress_range_callback=tarefa.progresso,
+            num_workers_inclusao=int(num_workers),
+            confirmacao_inclusao="reconciliacao" if reconciliar else "pagina",
+            modo_sincronizacao="diferencial" if diferencial else "substituir",
+            cache_catalogos=cache_catalogos,
+            concorrencia_adaptativa=adaptativa,
+            telemetria=telemetria,
+        )
+
+    tarefa = gerenciador.submeter(executar, telemetria, len(df))
+    st.session_state.sisarv_tarefa = tarefa.id
+    exibir_progresso(tarefa, gerenciador)
+
+if __name__ == "__main__":
+    main()
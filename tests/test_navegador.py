@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+from contextlib import contextmanager
+
+from selenium.common.exceptions import StaleElementReferenceException
+from selenium.webdriver.support.ui import WebDriverWait
+
+import sisarv_benchmark
+import ws
+
+
+class NavegadorFalso:
+    page_source = ""
+
+    def find_element(self, *args):
+        return self
+
+    def find_elements(self, *args):
+        return []
+
+    def execute_script(self, *args):
+        return None
+
+    def click(self):
+        pass
+
+
+class PoolFalso:
+    """Pool de um navegador; cada empréstimo entrega um navegador novo."""
+    tamanho = 1
+
+    def __init__(self):
+        self.emprestimos = 0
+
+    @contextmanager
+    def emprestar(self):
+        self.emprestimos += 1
+        yield NavegadorFalso()
+
+
+def preencher(monkeypatch, quedas, quedas_apos_incluir=None):
+    """
+    Preenchimento rápido de 5 árvores; quedas: {Nº: quantas vezes o navegador cai ao preenchê-lo};
+    quedas_apos_incluir: Nº em que o navegador cai depois de Incluir (a árvore já entrou na lista).
+    """
+    enviados = []
+    quedas_apos_incluir = set(quedas_apos_incluir or ())
+
+    def preencher_arvore_rapido(driver, wait, registro):
+        if quedas.get(registro.numero):
+            quedas[registro.numero] -= 1
+            raise RuntimeError("navegador caiu")
+        enviados.append(registro.numero)
+        return [], driver
+
+    def aguardar_recarga(*args):
+        if enviados[-1] in quedas_apos_incluir:
+            quedas_apos_incluir.discard(enviados[-1])
+            raise RuntimeError("navegador caiu depois de Incluir")
+
+    monkeypatch.setattr(ws, "ENTRAR_NAVEGADOR_COM_SESSAO", True)
+    monkeypatch.setattr(ws, "abrir_edicao_com_sessao", lambda *args: True)
+    monkeypatch.setattr(ws, "aguardar_recarga", aguardar_recarga)
+    monkeypatch.setattr(ws, "preencher_arvore_rapido", preencher_arvore_rapido)
+    tabela = ws.montar_tabela_payloads(sisarv_benchmark.gerar_planilha(5))
+    tabela[["nome_popular", "nome_cientifico"]] = "1"
+    pool = PoolFalso()
+    resultado = ws.preencher_via_navegador(
+        "u", "s", [], "1", ws.registros_arvores(tabela), True, lambda msg: None, lambda: False, None,
+        perfil_ritmo="rapido", pool=pool, numeros_no_servidor=lambda: set(enviados),
+    )
+    return resultado, enviados, pool
+
+
+def test_arvore_em_andamento_volta_para_a_fila(monkeypatch):
+    (sucesso, _, erro), enviados, pool = preencher(monkeypatch, {3: 1})
+    assert sucesso and erro is None
+    assert sorted(enviados) == [1, 2, 3, 4, 5]
+    assert pool.emprestimos == 2
+
+
+def test_segunda_queda_na_mesma_arvore_conta_como_falha(monkeypatch):
+    (sucesso, _, erro), enviados, _ = preencher(monkeypatch, {3: 2})
+    assert not sucesso
+    # O limite de quedas é por árvore: só o Nº 3 se perde, o trabalhador segue com as demais
+    assert sorted(enviados) == [1, 2, 4, 5]
+    assert erro.startswith("Falha no navegador (1 linha(s) não enviada(s))")
+
+
+def test_quedas_em_arvores_diferentes_nao_param_o_trabalhador(monkeypatch):
+    (sucesso, _, erro), enviados, pool = preencher(monkeypatch, {2: 1, 3: 1, 4: 1})
+    assert sucesso and erro is None
+    assert sorted(enviados) == [1, 2, 3, 4, 5]
+    assert pool.emprestimos == 4
+
+
+def test_queda_depois_de_incluir_nao_duplica(monkeypatch):
+    (sucesso, _, erro), enviados, pool = preencher(monkeypatch, {}, quedas_apos_incluir={3})
+    assert sucesso and erro is None
+    assert enviados == [1, 2, 3, 4, 5]
+    assert pool.emprestimos == 2
+
+
+class PainelFalso:
+    def __init__(self, removido=False):
+        self.removido = removido
+
+    def is_enabled(self):
+        if self.removido:
+            raise StaleElementReferenceException()
+        return True
+
+
+class NavegadorLinhas:
+    """Tabela com 3 linhas que passa a ter 4 a partir da terceira consulta."""
+
+    def __init__(self):
+        self.consultas = 0
+
+    def find_elements(self, *args):
+        self.consultas += 1
+        return [object()] * (4 if self.consultas >= 3 else 3)
+
+
+def test_aguardar_recarga_com_tabela_atualizada_no_lugar():
+    navegador = NavegadorLinhas()
+    ws.aguardar_recarga(WebDriverWait(navegador, 2, poll_frequency=0.01), PainelFalso(), 3)
+    assert navegador.consultas >= 3
+
+
+def test_aguardar_recarga_com_pagina_recarregada():
+    navegador = NavegadorLinhas()
+    ws.aguardar_recarga(WebDriverWait(navegador, 2, poll_frequency=0.01), PainelFalso(removido=True), 3)
+    assert navegador.consultas == 1
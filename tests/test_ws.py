@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import sisarv_benchmark
+import ws
+
+# Linhas já pré-processadas e os valores que o envio linha a linha original (obter_valores_mapeamento +
+# normalizar_payload_requests) gerava para elas
+PLANILHA = pd.DataFrame({
+    "Nº": [1, 2.0, 3.7, "4", np.nan, 6],
+    "Nome Vulgar": ["Ipê Roxo", "", "Goiabeira", "Jerivá", "x", "Toco"],
+    "Nome Científico": ["Handroanthus impetiginosus", "", "Psidium guajava", "Syagrus romanzoffiana", "y", "ni"],
+    "Estado de Conservação": [
+        "NÃO ENQUADRADAS", "EXÓTICA OU NATIVA, NÃO MA, >=80CM", "NATIVAS MA >= 70CM", "", "8", "qualquer",
+    ],
+    "Área Pública": ["NÃO", "SIM", "", "NÃO", "NÃO", "NÃO"],
+    "Motivação": ["PROJETO", "árvore MORTA", "SEM MOTIVO", "CUPIM", "", "TERRAPLENAGEM"],
+    "Intenção": ["CORTE", "PRESERVAR", "TRANSPLANTIO", "REMOVER", "", "AUTORIZAÇÃO ANTERIOR"],
+    "H": [3, "2,5", 10.456, "", np.nan, "abc"],
+    "Copa": [1, 2.25, "3,1", "", "x", 0],
+    "DAP 1": [10, "12,7", 33.9, "", "abc", 0],
+    "DAP 2": [0] * 6, "DAP 3": [0] * 6, "DAP 4": [0] * 6, "DAP 5": [0] * 6,
+})
+ESPERADO = {
+    "numero_especie_projeto": ["1", "2", "3", "4", "", "6"],
+    # A linha 2 era enviada como "8" (não enquadrada) pelo envio original; "7" é o value correto da opção
+    "estado_conservacao": ["8", "7", "6", "", "8", "8"],
+    "fcb": ["3"] * 6,
+    "local_especime": ["9"] * 6,
+    "area_publica": ["NÃO", "SIM", "", "NÃO", "NÃO", "NÃO"],
+    "motivacao": ["1", "2", "3", "2", "1", "1"],
+    "intencao": ["1", "2", "3", "1", "", "4"],
+    "altura_arvore": ["3,00", "2,50", "10,46", "", "", "abc"],
+    "diametro_copa": ["1,00", "2,25", "3,10", "", "x", "0,00"],
+    "dap1": ["10", "12", "33", "", "0", "0"],
+    "dap2": ["0"] * 6,
+}
+
+
+def test_montar_tabela_payloads_codificacao():
+    tabela = ws.montar_tabela_payloads(PLANILHA)
+    for id_form, valores in ESPERADO.items():
+        assert list(tabela[id_form]) == valores, id_form
+
+
+def test_montar_tabela_payloads_numero_truncado():
+    tabela = ws.montar_tabela_payloads(PLANILHA.assign(**{"Nº": [1, 2.5, 4.7, "inf", None, "abc"]}))
+    assert tabela["_n"].tolist() == [1, 2, 4, pd.NA, pd.NA, pd.NA]
+
+
+def test_codificador_igual_por_valor_e_por_coluna():
+    textos = ["EXÓTICA OU NATIVA, NÃO MA, >=80CM", "7", "nativas ma >= 70cm", "", "outro"]
+    coluna = ws.codificador_campos.coluna("estado_conservacao", pd.Series(textos))
+    assert list(coluna) == [ws.codificador_campos.valor("estado_conservacao", t) for t in textos]
+    assert list(coluna) == ["7", "7", "6", "", "8"]
+
+
+def test_codificador_memoria_limitada():
+    codificador = ws.CodificadorCampos(ws.REGRAS_CAMPOS, tamanho_memoria=2)
+    for texto in ("PROJETO", "MORTA", "CUPIM", "PROJETO"):
+        codificador.valor("motivacao", texto)
+    assert codificador._codificar.cache_info().currsize == 2
+    assert codificador.valor("motivacao", "PROJETO") == ws.codificador_campos.valor("motivacao", "PROJETO")
+
+
+@pytest.mark.parametrize("conteudo", ['{"motivacao": {"exato": {"X": "1"}', '["motivacao"]', '{"motivacao": {"exato": ["X"]}}'])
+def test_arquivo_de_regras_invalido_usa_as_padrao(tmp_path, capsys, conteudo):
+    arquivo = tmp_path / "regras_campos.json"
+    arquivo.write_text(conteudo, encoding="utf-8")
+    codificador = ws.CodificadorCampos.carregar(arquivo=str(arquivo))
+    assert "ignoradas" in capsys.readouterr().out
+    textos = ["EXÓTICA OU NATIVA, NÃO MA, >=80CM", "nativas ma >= 70cm", "outro"]
+    assert [codificador.valor("estado_conservacao", t) for t in textos] == ["7", "6", "8"]
+
+
+def test_run_sisarv_numero_fracionario(servidor_mock):
+    df = sisarv_benchmark.gerar_planilha(5)
+    df["Nº"] = [1, 2.5, 3, 4.9, 6]
+    sucesso, _, erro = ws.run_sisarv(
+        "teste", "teste", df, progress_callback=lambda msg: None, cache_catalogos=ws.CacheCatalogos(ttl=0),
+    )
+    assert sucesso and erro is None
+    assert servidor_mock.estado.numeros(next(iter(servidor_mock.estado.inventarios))) == [1, 2, 3, 4, 6]
+
+
+def test_diferencial_com_numero_nao_numerico(servidor_mock):
+    def executar(df, **opcoes):
+        sucesso, _, erro = ws.run_sisarv(
+            "teste", "teste", df, progress_callback=lambda msg: None, cache_catalogos=ws.CacheCatalogos(ttl=0), **opcoes,
+        )
+        assert sucesso and erro is None
+
+    df = sisarv_benchmark.gerar_planilha(6)
+    executar(df)
+    df["Nº"] = [1, "abc", "3.0", 4, None, "6"]
+    assert ws.numeros_da_planilha(df) == {1, 3, 4, 6}
+    executar(df, modo_sincronizacao="diferencial")
+    assert servidor_mock.estado.numeros(next(iter(servidor_mock.estado.inventarios))) == [1, 3, 4, 6]
+
+
+def test_validar_planilha_linhas_invalidas():
+    df = PLANILHA.assign(**{"Nº": [1, 2.5, 1, "abc", None, 6]})
+    relatorio = ws.validar_planilha(df, catalogo={})
+    assert not relatorio.ok
+    assert relatorio.linhas == 6
+    assert relatorio.linhas_sem_numero == [6, 7]
+    assert relatorio.numeros_fracionarios == [(4, 2.5, 2)]
+    assert relatorio.numeros_duplicados == {1: 2}
+    assert (6, "H", "abc") in relatorio.medidas_invalidas
+    assert (1, "DAP 1", "abc") not in relatorio.medidas_invalidas
+    assert any("2.5" in linha for linha in relatorio.resumo())
+
+
+def test_validar_planilha_nomes_contra_catalogo(servidor_mock):
+    catalogo = ws.CacheCatalogos(ttl=0).catalogo_da_pagina(
+        ws.base_url, "1", ws.analisar_pagina(servidor_mock.pagina_edicao(next(iter(servidor_mock.estado.inventarios)))),
+    )
+    df = sisarv_benchmark.gerar_planilha(3)
+    df.loc[1, ["Nome Vulgar", "Nome Científico"]] = ["Planta inexistente", "Genus inexistens"]
+    relatorio = ws.validar_planilha(df, catalogo)
+    assert relatorio.catalogo_verificado
+    assert [n for n, *_ in relatorio.nomes_nao_encontrados] == [2]
+
+
+def test_catalogo_em_cache_nao_analisa_os_selects(servidor_mock, tmp_path):
+    cache = ws.CacheCatalogos(diretorio=str(tmp_path))
+    html = servidor_mock.pagina_edicao(next(iter(servidor_mock.estado.inventarios)))
+    catalogo = cache.catalogo_da_pagina(ws.base_url, "1", ws.analisar_pagina(html))
+    pagina = ws.analisar_pagina(html)
+    assert cache.catalogo_da_pagina(ws.base_url, "1", pagina) == catalogo
+    assert "selects" not in pagina.__dict__
+
+    # Qualquer mudança nas opções de espécies invalida o cache
+    alterada = ws.analisar_pagina(html.replace("</select>", '<option value="999">Nova espécie</option></select>', 1))
+    assert "Nova espécie" in cache.catalogo_da_pagina(ws.base_url, "1", alterada)["popular"]
+
+
+def test_analisar_pagina_tabela_e_selects():
+    html = (
+        '<input type="hidden" name="csrf_key" value="k1">'
+        "<select id='nome_popular'><option value=''>Selecione</option><option value=\"10\"> Ipê&nbsp;Roxo </option>"
+        '<option value="11">Goiaba<option value="x">Inválida</select>'
+        '<table><tbody><tr><td>99</td></tr></tbody></table>'
+        '<div id="panelArvores"><table><thead><tr><th>Nº</th></tr></thead><tbody>'
+        "<tr><td> 7 </td><td><b>Ipê</b> &amp; cia</td><td><button onclick=\"excluiArvore('501')\">X</button></td></tr>"
+        "<tr><td>8<td>Goiaba<td><a onclick='excluiArvore( \"502\" )'>X</a>"
+        "<tr><td>-</td></tr>"
+        "</tbody></table></div>"
+    )
+    pagina = ws.analisar_pagina(html)
+    assert pagina.csrf_key == "k1"
+    assert pagina.ids_arvores == ["501", "502"]
+    assert pagina.numeros_arvores() == {7, 8}
+    assert pagina.selects["nome_popular"] == {"Ipê Roxo": "10", "Goiaba": "11"}
+    assert [(linha.numero, linha.id_arvore, linha.celulas) for linha in pagina.linhas_arvores] == [
+        (7, "501", ["7", "Ipê & cia", "X"]), (8, "502", ["8", "Goiaba", "X"]), (None, None, ["-"]),
+    ]
+    assert pagina.numeros_arvores() == {7, 8}
+
+
+def test_cache_sessoes_sem_senha_no_disco(servidor_mock, tmp_path):
+    cache = ws.CacheSessoes(diretorio=str(tmp_path), ttl=600)
+    legado = tmp_path / ("sessao_" + "0" * 64 + ".json")
+    legado.write_text("{}")
+    html = ws.iniciar_sessao(ws.TransporteSisArv(1), "conta", "senha-secreta", cache_sessoes=cache)
+    assert ws.analisar_pagina(html).ids_inventario
+    arquivos = [p.name for p in tmp_path.iterdir()]
+    assert len(arquivos) == 1 and arquivos[0] == os.path.basename(cache._caminho("conta"))
+    assert "senha-secreta" not in (tmp_path / arquivos[0]).read_text()
+
+    assert cache.carregar("conta", "senha-secreta", ws.TransporteSisArv(1).cookies)
+    # Outra senha para a mesma conta não reaproveita a sessão, também em outro processo (nova instância)
+    assert not cache.carregar("conta", "outra", ws.TransporteSisArv(1).cookies)
+    novo_processo = ws.CacheSessoes(diretorio=str(tmp_path), ttl=600)
+    assert not novo_processo.carregar("conta", "qualquer", ws.TransporteSisArv(1).cookies)
+    assert novo_processo.carregar("conta", "senha-secreta", ws.TransporteSisArv(1).cookies)
+
+
+def test_senha_errada_nao_reaproveita_sessao(servidor_mock, tmp_path, monkeypatch):
+    servidor_mock.configuracao.usuario, servidor_mock.configuracao.senha = "dona", "certa"
+    monkeypatch.setattr(ws, "cache_sessoes_padrao", ws.CacheSessoes(diretorio=str(tmp_path), ttl=600))
+    monkeypatch.setattr(ws, "USAR_CACHE_SESSOES", True)
+    df = sisarv_benchmark.gerar_planilha(3)
+    opcoes = dict(cache_catalogos=ws.CacheCatalogos(ttl=0))
+    assert ws.run_sisarv("dona", "certa", df, progress_callback=lambda msg: None, **opcoes)[0]
+    logs = []
+    sucesso, _, erro = ws.run_sisarv("dona", "ERRADA", df.head(1), progress_callback=logs.append, **opcoes)
+    assert not any("reaproveitada" in linha for linha in logs)
+    assert not sucesso or servidor_mock.estado.numeros(next(iter(servidor_mock.estado.inventarios))) == [1, 2, 3]
+
+
+def test_telemetria_mantem_os_relatorios_recentes(tmp_path, monkeypatch):
+    monkeypatch.setattr(ws, "MAX_RELATORIOS_TELEMETRIA", 3)
+    for i in range(5):
+        (tmp_path / f"relatorio_2026010{i}-000000_1.json").write_text("{}")
+    telemetria = ws.TelemetriaExecucao(motor="requests")
+    telemetria.encerrar()
+    telemetria.exportar(str(tmp_path))
+    relatorios = sorted(p.name for p in tmp_path.glob("relatorio_*.json"))
+    assert len(relatorios) == 3 and relatorios[:2] == ["relatorio_20260103-000000_1.json", "relatorio_20260104-000000_1.json"]
+    assert (tmp_path / "sisarv.prom").exists()
+
+
+def test_colunas_tabela_pela_ordem_do_cabecalho():
+    html = (
+        '<div id="panelArvores"><table><thead><tr><th>Nº</th><th>Nome Científico</th><th>Nome Popular</th>'
+        "<th>Copa (m)</th><th>Altura (m)</th><th>Estado</th><th>DAP 1</th><th>DAP 2</th><th>DAP 3</th>"
+        "<th>DAP 4</th><th>DAP 5</th><th>Ações</th></tr></thead><tbody></tbody></table></div>"
+    )
+    colunas = ws.colunas_tabela_arvores(html)
+    assert colunas[:6] == (
+        "numero_especie_projeto", "nome_cientifico", "nome_popular", "diametro_copa", "altura_arvore", "estado_conservacao",
+    )
+    assert colunas[-1] is None
+    payload = {"numero_especie_projeto": "3", "nome_cientifico": "Ficus", "altura_arvore": "4,00", "diametro_copa": "2,00"}
+    celulas = ["3", "Ficus", "Figueira", "2,00", "4,00", "", "", "", "", "", "", ""]
+    assert not ws.arvore_alterada(payload, celulas, {}, colunas)
+    assert ws.arvore_alterada(payload, celulas, {})  # na ordem fixa, altura e copa trocadas
+
+    assert ws.colunas_tabela_arvores(html.replace("<th>Estado</th>", "<th>Situação</th>")) is None
+
+
+def test_diferencial_com_cabecalho_desconhecido_substitui_tudo(servidor_mock, monkeypatch):
+    pagina_edicao = servidor_mock.pagina_edicao
+    monkeypatch.setattr(
+        servidor_mock, "pagina_edicao", lambda id_inv: pagina_edicao(id_inv).replace("<th>Estado</th>", "<th>Situação</th>"),
+    )
+    df = sisarv_benchmark.gerar_planilha(10)
+    logs = []
+    for _ in range(2):
+        sucesso, _, erro = ws.run_sisarv(
+            "teste", "teste", df, progress_callback=logs.append, cache_catalogos=ws.CacheCatalogos(ttl=0),
+            modo_sincronizacao="diferencial",
+        )
+        assert sucesso and erro is None
+    assert any("substituição completa" in linha for linha in logs)
+    assert servidor_mock.estado.numeros(next(iter(servidor_mock.estado.inventarios))) == list(range(1, 11))
+
+
+def test_diferencial_confere_campos_fora_da_tabela(servidor_mock, tmp_path):
+    jornal = ws.JornalExecucao(str(tmp_path / "jornal.sqlite3"))
+    df = sisarv_benchmark.gerar_planilha(10)
+    id_inventario = next(iter(servidor_mock.estado.inventarios))
+
+    def executar(planilha, logs, jornal=jornal):
+        sucesso, _, erro = ws.run_sisarv(
+            "teste", "teste", planilha, progress_callback=logs.append, cache_catalogos=ws.CacheCatalogos(ttl=0),
+            modo_sincronizacao="diferencial", jornal=jornal,
+        )
+        assert sucesso and erro is None
+
+    executar(df, [])
+    logs = []
+    executar(df, logs)
+    assert any("10 árvore(s) sem alteração" in linha for linha in logs)
+
+    # Motivação não aparece na tabela do inventário: só o hash do payload no jornal acusa a mudança
+    alterada = df.copy()
+    motivacao, value = ("PROJETO", "1") if df.loc[0, "Motivação"] != "PROJETO" else ("MORTE", "2")
+    alterada.loc[0, "Motivação"] = motivacao
+    logs = []
+    executar(alterada, logs)
+    assert any("9 árvore(s) sem alteração" in linha for linha in logs)
+    arvores = servidor_mock.estado.inventarios[id_inventario].values()
+    assert [a["motivacao"] for a in arvores if a["numero_especie_projeto"] == "1"] == [value]
+
+    # Sem jornal não há como conferir esses campos: todas as árvores existentes são editadas
+    logs = []
+    executar(alterada, logs, jornal=None)
+    assert any("0 árvore(s) sem alteração" in linha for linha in logs)
+    assert servidor_mock.estado.numeros(id_inventario) == list(range(1, 11))
+
+
+def test_exclusao_em_lote_verifica_e_interrompe(servidor_mock):
+    servidor_mock.recriar_inventarios(60)
+    id_inventario = next(iter(servidor_mock.estado.inventarios))
+    transporte = ws.TransporteSisArv(8)
+    ws.iniciar_sessao(transporte, "teste", "teste")
+    ids = ws.analisar_pagina(ws.abrir_tela_edicao(transporte.sessao(), id_inventario)).ids_arvores
+
+    progresso = []
+    resultado = ws.excluir_em_lote(
+        transporte, id_inventario, ids[:40], num_workers=4,
+        progress_callback=lambda atual, total: progresso.append((atual, total)),
+        should_stop=lambda: len(progresso) >= 10,
+    )
+    assert resultado.interrompida and not resultado.falhas
+    assert 10 <= resultado.excluidas < 40
+    assert len(servidor_mock.estado.numeros(id_inventario)) == 60 - resultado.excluidas
+
+    restantes = ws.analisar_pagina(ws.abrir_tela_edicao(transporte.sessao(), id_inventario)).ids_arvores
+    resultado = ws.excluir_em_lote(transporte, id_inventario, restantes, num_workers=8)
+    assert not resultado.interrompida and not resultado.falhas
+    assert resultado.excluidas == len(restantes)
+    assert resultado.pagina.ids_arvores == [] and servidor_mock.estado.numeros(id_inventario) == []
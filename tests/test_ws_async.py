@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+pytest.importorskip("aiohttp")
+
+import sisarv_benchmark
+import ws
+import ws_async
+
+
+def executar(df, **opcoes):
+    logs = []
+    resultado = ws_async.run_sisarv_assincrono(
+        "teste", "teste", df, progress_callback=logs.append, cache_catalogos=ws.CacheCatalogos(ttl=0), **opcoes,
+    )
+    return resultado, logs
+
+
+def numeros_no_inventario(servidor):
+    return servidor.estado.numeros(next(iter(servidor.estado.inventarios)))
+
+
+def test_erro_http_tem_mensagem():
+    erro = ws_async.ErroHttpSisArv(502, "Bad Gateway")
+    assert str(erro) == "HTTP 502: Bad Gateway"
+    assert erro.status == 502
+
+
+def test_falhas_transitorias_sao_repetidas(servidor_mock):
+    servidor_mock.configuracao.taxa_erros = 0.1
+    df = sisarv_benchmark.gerar_planilha(40)
+    (sucesso, nao_encontradas, erro), _ = executar(df)
+    assert sucesso and erro is None and nao_encontradas == []
+    assert numeros_no_inventario(servidor_mock) == list(range(1, 41))
+
+
+def test_erro_http_apos_repeticoes_so_e_registrado(servidor_mock, monkeypatch):
+    # Sem repetições, cada 502 chega ao enviar(); a linha é registrada no log e a reconciliação a confirma
+    monkeypatch.setattr(ws, "TENTATIVAS_REQUISICAO", 1)
+    servidor_mock.configuracao.taxa_erros_apos_inclusao = 0.3
+    df = sisarv_benchmark.gerar_planilha(40)
+    (sucesso, _, erro), logs = executar(df)
+    assert sucesso and erro is None
+    assert any("HTTP 502" in linha for linha in logs)
+    assert numeros_no_inventario(servidor_mock) == list(range(1, 41))
+
+
+def test_diferencial_com_numero_nao_numerico(servidor_mock):
+    df = sisarv_benchmark.gerar_planilha(6)
+    assert executar(df)[0][0]
+    df["Nº"] = [1, "abc", "3.0", 4, None, "6"]
+    (sucesso, _, erro), _ = executar(df, modo_sincronizacao="diferencial")
+    assert sucesso and erro is None
+    assert numeros_no_inventario(servidor_mock) == [1, 3, 4, 6]
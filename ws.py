@@ -1,776 +1,3352 @@
-import re
-import time
-import random
-import unicodedata
-from concurrent.futures import ThreadPoolExecutor
-import requests
-import pandas as pd
-from tqdm import tqdm
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options as ChromeOptions
-from selenium.webdriver.chrome.service import Service as ChromeService
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait, Select
-from selenium.webdriver.support import expected_conditions as EC
-
-try:
-    from webdriver_manager.chrome import ChromeDriverManager
-    USAR_WEBDRIVER_MANAGER = True
-except ImportError:
-    USAR_WEBDRIVER_MANAGER = False
-
-try:
-    from listar_sem_correspondencia import gerar_arquivo_sem_correspondencia
-except ImportError:
-    gerar_arquivo_sem_correspondencia = None
-
-try:
-    from correspondencias_editar import (
-        CORRESPONDENCIAS_NOME_POPULAR,
-        CORRESPONDENCIAS_NOME_CIENTIFICO,
-    )
-except ImportError:
-    CORRESPONDENCIAS_NOME_POPULAR = {}
-    CORRESPONDENCIAS_NOME_CIENTIFICO = {}
-
-base_url = "https://sisarv.rio.gov.br"
-# True = utilizar apenas requests (não abre navegador); False = tenta Selenium
-USAR_APENAS_REQUESTS = True  # utilizar requests
-# True = não preenche o formulário; apenas gera o arquivo com valores sem correspondência no site
-NAO_PREENCHER = False
-
-# =============================================================================
-# MAPEAMENTO DE PREENCHIMENTO (Coluna DF → Campo no site)
-# =============================================================================
-# Formato: Campo no site (para preenchimento) = origem do valor.
-# Origem = nome da coluna do DF (valor vem da planilha) OU valor fixo (não é coluna).
-# Valores fixos (entre chaves na especificação): "", "NÃO", "Espécime não enquadrada...".
-# Fácil de editar: altere a coluna ou o valor fixo conforme a necessidade.
-#
-# Correspondência (Coluna DF - Campo no site):
-#   Nº → Nº no Projeto
-#   Nome Vulgar → Nome Popular
-#   Nome Científico → Nome Científico
-#   {VAZIO} → Observação
-#   Estado de Conservação → Estado de Conservação
-#   Local → Local do Espécime
-#   {"Espécime não enquadrada nos casos acima"} → Políticas Municipais
-#   {NÃO} → Notabilidade
-#   Área Pública → Área Pública
-#   Motivação → Motivação
-#   Intenção → Intenção
-#   H → Altura (m)
-#   Copa → Diâmetro da copa(m)
-#   DAP 1..5 → DAP 1(cm) .. DAP 5(cm)
-#   {NÃO} → Utilidade Pública
-# =============================================================================
-MAPEAMENTO_PREENCHIMENTO = {
-    # Campo no site (preenchimento) : coluna do DF ou valor fixo
-    "Nº no Projeto": "Nº",                                     # coluna DF
-    "Nome Popular": "Nome Vulgar",                             # coluna DF
-    "Nome Científico": "Nome Científico",                      # coluna DF
-    "Observação": "",                                          # fixo
-    "Estado de Conservação": "Estado de Conservação",          # coluna DF
-    "Local do Espécime": "9",                                  # fixo (value da opção "NÃO INFORMADO" no select)
-    "Políticas Municipais": "Espécime não enquadrada nos casos acima",  # fixo
-    "Notabilidade": "NÃO",                                     # fixo
-    "Utilidade Pública": "NÃO",                                # fixo
-    "Área Pública": "Área Pública",                            # coluna DF
-    "Motivação": "Motivação",                                  # coluna DF
-    "Intenção": "Intenção",                                    # coluna DF
-    "Altura (m)": "H",                                         # coluna DF
-    "Diâmetro da copa(m)": "Copa",                             # coluna DF
-    "DAP 1(cm)": "DAP 1",                                      # coluna DF
-    "DAP 2(cm)": "DAP 2",                                      # coluna DF
-    "DAP 3(cm)": "DAP 3",                                      # coluna DF
-    "DAP 4(cm)": "DAP 4",                                      # coluna DF
-    "DAP 5(cm)": "DAP 5",                                      # coluna DF
-}
-
-# Campo no site (chave de MAPEAMENTO_PREENCHIMENTO) -> id do elemento/parâmetro no formulário
-CAMPO_SITE_PARA_ID_FORM = {
-    "Nº no Projeto": "numero_especie_projeto",
-    "Nome Popular": "nome_popular",
-    "Nome Científico": "nome_cientifico",
-    "Observação": "observacao",
-    "Estado de Conservação": "estado_conservacao",
-    "Local do Espécime": "local_especime",
-    "Políticas Municipais": "fcb",
-    "Notabilidade": "notabilidade",
-    "Utilidade Pública": "utilidade_publica",
-    "Área Pública": "area_publica",
-    "Motivação": "motivacao",
-    "Intenção": "intencao",
-    "Altura (m)": "altura_arvore",
-    "Diâmetro da copa(m)": "diametro_copa",
-    "DAP 1(cm)": "dap1",
-    "DAP 2(cm)": "dap2",
-    "DAP 3(cm)": "dap3",
-    "DAP 4(cm)": "dap4",
-    "DAP 5(cm)": "dap5",
-}
-
-
-def obter_valores_mapeamento(row, colunas_df):
-    """
-    Retorna um dicionário id_form -> valor a enviar, usando MAPEAMENTO_PREENCHIMENTO.
-    Se a origem for coluna do DF, usa row[col]; senão usa o valor fixo.
-    Nome Popular e Nome Científico ficam como texto (serão convertidos para id depois).
-    """
-    valores = {}
-    for campo_site, origem in MAPEAMENTO_PREENCHIMENTO.items():
-        id_form = CAMPO_SITE_PARA_ID_FORM.get(campo_site)
-        if not id_form:
-            continue
-        if origem in colunas_df:
-            v = row.get(origem)
-            if pd.isna(v):
-                v = ""
-            else:
-                v = str(v).strip()
-        else:
-            v = "" if origem is None else str(origem).strip()
-            
-        # --- REGRAS ESPECÍFICAS DE PREENCHIMENTO ---
-        if campo_site == "Estado de Conservação":
-            val_upper = v.upper()
-            if "NÃO ENQUADRADAS" in val_upper:
-                v = "Espécime não enquadrada nos casos acima"
-            elif "EXÓTICA OU NATIVA, NÃO MA, >=80CM" in val_upper:
-                v = "Especies de origem exótica ou nativa não pertencente ao Bioma Mata Atlântica, com DAP >= 80cm"
-            elif "NATIVAS MA >= 70CM" in val_upper:
-                v = "Espécimes nativas do bioma Mata Atlântica com DAP >= 70cm"
-                
-        elif campo_site == "Motivação":
-            val_upper = v.upper()
-            if "SEM MOTIVO" in val_upper:
-                v = "SEM MOTIVO"
-            elif any(x in val_upper for x in ["MORTA", "QUEBRADA", "CUPIM", "TOMBADA", "PODRE"]):
-                v = "MORTE"
-            else:
-                v = "PROJETO"  # Restante fica como PROJETO
-                
-        elif campo_site == "Intenção":
-            val_upper = v.upper()
-            if "PRESERVAR" in val_upper:
-                v = "PRESERVAÇÃO"
-            elif "REMOVER" in val_upper:
-                v = "CORTE"
-        # -------------------------------------------
-
-        valores[id_form] = v
-    return valores
-
-
-# Mapeamento texto (planilha) -> value (id) para selects que o servidor só aceita por id
-MAPEAMENTO_ESTADO_CONSERVACAO_TEXTO_PARA_VALUE = {
-    "8": "8",
-    "NÃO ENQUADRADAS": "8",
-    "Espécies não enquadradas nos casos acima": "8",
-    "ESPÉCIES NÃO ENQUADRADAS": "8",
-    "ESPÉCIME NÃO ENQUADRADA NOS CASOS ACIMA": "8",
-    "ESPECIES DE ORIGEM EXÓTICA OU NATIVA NÃO PERTENCENTE AO BIOMA MATA ATLÂNTICA, COM DAP >= 80CM": "7",
-    "EXÓTICA OU NATIVA, NÃO MA, >=80CM": "7",
-    "ESPÉCIMES NATIVAS DO BIOMA MATA ATLÂNTICA COM DAP >= 70CM": "6",
-    "NATIVAS MA >= 70CM": "6",
-}
-MAPEAMENTO_FCB_TEXTO_PARA_VALUE = {
-    "3": "3",
-    "Espécime não enquadrada nos casos acima": "3",
-}
-MAPEAMENTO_MOTIVACAO_TEXTO_PARA_VALUE = {
-    "1": "1", "PROJETO": "1", "2": "2", "MORTE": "2", "MORTA": "2", "3": "3", "SEM MOTIVO": "3",
-    "TERRAPLENAGEM": "1", "REMOVER": "1",
-    "QUEBRADA": "2", "CUPIM": "2", "TOMBADA": "2", "PODRE": "2",
-}
-MAPEAMENTO_INTENCAO_TEXTO_PARA_VALUE = {
-    "1": "1", "CORTE": "1", "REMOVER": "1", "2": "2", "PRESERVAÇÃO": "2", "PRESERVAR": "2",
-    "3": "3", "TRANSPLANTIO": "3", "4": "4", "AUTORIZAÇÃO ANTERIOR": "4",
-}
-
-# Mapeamento planilha → texto exato do select no site (quando difere por grafia/acento/hífen)
-# Sibipiruna: igual no site (normalização resolve). Cenostigma sp / samanea sp: ponto após "sp" no site é tratado pela normalização.
-NOME_POPULAR_PLANILHA_PARA_SITE = {
-    "Figueira Branca": "Figueira-Branca",
-    "Aroeirinha": "Aroerinha",
-    "Ipê Roxo": "Ipê-rOXO",
-    "Árvore samambaia": "árvore-samambaia",
-    "Ficus italiano": "ficus-italiano",
-    "ficus italiano": "ficus-italiano",
-    "Ficus lyrata": "ficus-lira",
-    "ficus lyrata": "ficus-lira",
-    # Mapeamentos novos solicitados
-    "Abacateiro": "Abacate",
-    "Areca-bambu": "Areca",
-    "Aroeira-vermelha": "Aroerinha",
-    "aroeira-vermelha": "aroerinha", 
-    "Arvore da chuva": "Samanea",
-    "Cassia-rosa": "Cassia",
-    "Clusia": "Abaneiro",
-    "Eucalipto Citriodora": "Eucalipto",
-    "Felicio": "Arvore Samambaia",
-    "Ficus Benjamina": "Ficus-Bejamina",
-    "Ficus Lirata": "Ficus-Lira",
-    "Figueira brava": "Figueira Branca",
-    "Figueira Religiosa": "Árvore-do-buda",
-    "Figueira-elastica": "Ficus Italiano",
-    "Goiabeira": "Goiaba",
-    "Ingá do brejo": "Ingá-Banana",
-    "Ipê Amarelo": "Ipê Tabaco",
-    "Ipê-rOXO": "IPÊ-ROXO",
-    "Jerivá": "Baba-de-boi",
-    "Morta": "não-identificada",
-    "Palmeira Fênix": "Tâmara-mirim",
-    "Tapiá": "Tapiá-de-bola",
-    "Toco": "não-identificada",
-    "toco": "não-identificada",
-}
-NOME_CIENTIFICO_PLANILHA_PARA_SITE = {
-    "Cratateva tapia": "Crataeva tapia",
-    "Crataeva tapia": "Crataeva tapia",
-    # Mapeamentos novos solicitados
-    "Handroanthus avellanedae": "Handroanthus Heptaphyllus",
-    "Mimosa caesalpiniifolia": "Mimosa Caesalpiniaefolia",
-    "Cenostigma pluviosum": "Cenostigma sp.",
-    "Crateva tapia": "Crataeva tapia",
-    "Schinus terebinthifolia": "Schinus Terebinthifolius",
-    "Corymbia citriodora": "Eucalyptus sp.", 
-    "corymbia citriodora": "eucalyptus sp.", 
-    "Samanea saman": "Samanea sp.",          
-    "samanea saman": "samanea sp.",          
-}
-
-
-def normalizar_payload_requests(payload):
-    """
-    Ajusta o payload para o formato que o servidor SisArv aceita:
-    - numero_especie_projeto: inteiro (64 não 64.0)
-    - estado_conservacao, fcb, motivacao, intencao: value (id) do select, não texto
-    - altura_arvore, diametro_copa: formato "X,XX" (vírgula)
-    - dap1..dap5: inteiro como string
-    """
-    p = dict(payload)
-    if "numero_especie_projeto" in p and p["numero_especie_projeto"]:
-        try:
-            p["numero_especie_projeto"] = str(int(float(str(p["numero_especie_projeto"]).strip().replace(",", "."))))
-        except (ValueError, TypeError):
-            pass
-    if "estado_conservacao" in p and p["estado_conservacao"] and not str(p["estado_conservacao"]).strip().isdigit():
-        v = str(p["estado_conservacao"]).strip().upper()
-        for k, id_val in MAPEAMENTO_ESTADO_CONSERVACAO_TEXTO_PARA_VALUE.items():
-            if k.upper() in v or v in k.upper():
-                p["estado_conservacao"] = id_val
-                break
-        else:
-            p["estado_conservacao"] = "8"
-    if "fcb" in p and p["fcb"] and not str(p["fcb"]).strip().isdigit():
-        v = str(p["fcb"]).strip()
-        p["fcb"] = MAPEAMENTO_FCB_TEXTO_PARA_VALUE.get(v, "3")
-    if "motivacao" in p and p["motivacao"] and not str(p["motivacao"]).strip().isdigit():
-        v = str(p["motivacao"]).strip().upper()
-        p["motivacao"] = MAPEAMENTO_MOTIVACAO_TEXTO_PARA_VALUE.get(v) or "1"
-    if "intencao" in p and p["intencao"] and not str(p["intencao"]).strip().isdigit():
-        v = str(p["intencao"]).strip().upper()
-        p["intencao"] = MAPEAMENTO_INTENCAO_TEXTO_PARA_VALUE.get(v) or "1"
-    for campo in ("altura_arvore", "diametro_copa"):
-        if campo in p and p[campo] is not None and str(p[campo]).strip():
-            try:
-                num = float(str(p[campo]).strip().replace(",", "."))
-                p[campo] = f"{num:.2f}".replace(".", ",")
-            except (ValueError, TypeError):
-                pass
-    for campo in ("dap1", "dap2", "dap3", "dap4", "dap5"):
-        if campo in p and p[campo] is not None and str(p[campo]).strip() != "":
-            try:
-                p[campo] = str(int(float(str(p[campo]).strip().replace(",", "."))))
-            except (ValueError, TypeError):
-                p[campo] = "0"
-    return p
-
-
-def normalizar_nome(s):
-    """Normaliza nome para comparação: minúsculas, sem acentos, hífens, espaços nem pontos."""
-    if not s or not str(s).strip():
-        return ""
-    s = str(s).strip().lower()
-    s = unicodedata.normalize("NFD", s)
-    s = "".join(c for c in s if unicodedata.category(c) != "Mn")
-    s = s.replace("-", "").replace("–", "").replace("—", "")
-    s = s.replace(" ", "")
-    s = s.replace(".", "")
-    return s
-
-
-def pausa(min_s=0.5, max_s=1.2):
-    """Pausa aleatória para simular comportamento humano."""
-    time.sleep(random.uniform(min_s, max_s))
-
-
-def extrair_numeros_ja_preenchidos(html):
-    """Extrai da tabela de árvores do inventário os 'Nº no Projeto' já preenchidos."""
-    if not html:
-        return set()
-    # Tabela no painel de árvores: tbody com <tr> onde a primeira coluna costuma ser o Nº
-    m = re.search(
-        r'id=["\']?panelArvores["\']?[^>]*>.*?<table[^>]*>.*?<tbody>(.*?)</tbody>',
-        html, re.DOTALL | re.IGNORECASE
-    )
-    if not m:
-        return set()
-    tbody = m.group(1)
-    nums = re.findall(r'<tr[^>]*>\s*<td[^>]*>\s*(\d+)\s*</td>', tbody)
-    return {int(x) for x in nums}
-
-
-def extrair_ids_arvores(html):
-    """Extrai os id_inventario_botanico_especie da página (parâmetro de excluiArvore)."""
-    if not html:
-        return []
-    ids = re.findall(r"excluiArvore\s*\(\s*['\"](\d+)['\"]", html)
-    return list(dict.fromkeys(ids))  # ordem preservada, sem duplicatas
-
-
-def preprocessar_df(df):
-    """Normaliza o DataFrame para o formato esperado (mesmo layout do Excel do inventário)."""
-    df = df.copy()
-    if len(df) > 0 and df.index[0] == 0:
-        # Remove a linha 2 do cabeçalho mesclado se for a segunda linha de cabeçalho
-        df = df.drop(index=0).reset_index(drop=True)
-    df = df.rename(columns={"Nome": "Nome Vulgar", "Unnamed: 2": "Nome Científico"})
-    df = df.rename(columns={
-        "DAP": "DAP 1",
-        "Unnamed: 6": "DAP 2",
-        "Unnamed: 7": "DAP 3",
-        "Unnamed: 8": "DAP 4",
-        "Unnamed: 9": "DAP 5",
-    })
-    for col in ["DAP 1", "DAP 2", "DAP 3", "DAP 4", "DAP 5"]:
-        if col in df.columns:
-            df[col] = df[col].fillna(0)
-    return df
-
-
-# O servidor pode responder com uma página que redireciona via POST (JavaScript).
-def seguir_redirect_post(html, session, max_vezes=5):
-    for _ in range(max_vezes):
-        if "document.redir.submit()" not in html and len(html) > 500:
-            return html
-        resp = session.post(f"{base_url}/index.php", data={})
-        resp.raise_for_status()
-        html = resp.text
-    return html
-
-
-def run_sisarv(formusuario, formsenha, df, progress_callback=None, should_stop=None, progress_range_callback=None):
-    """
-    Executa o fluxo completo: login no SisArv, exclusão das árvores existentes, inclusão das linhas do df.
-    progress_callback(msg) é chamado opcionalmente para atualizar interface (ex.: Streamlit).
-    progress_range_callback(atual, total) opcional: chamado a cada árvore (ex.: para barra de progresso).
-    should_stop() opcional: se retornar True, interrompe e retorna (False, [], "Interrompido pelo usuário.").
-    Retorna: (sucesso: bool, arvores_nao_encontradas: list, mensagem_erro: str|None)
-    """
-    def stopped():
-        return should_stop is not None and should_stop()
-
-    def log(msg):
-        if progress_callback:
-            progress_callback(msg)
-        else:
-            print(msg)
-
-    log("Conectando ao SisArv...")
-
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-        "Accept-Language": "pt-BR,pt;q=0.9,en;q=0.8",
-    }
-
-    session = requests.Session()
-    session.headers.update(headers)
-
-    session.get(f"{base_url}/")
-    resp_login_page = session.post(
-        f"{base_url}/index.php",
-        data={"action": "AbreTelaLogin"},
-    )
-    resp_login_page.raise_for_status()
-    html_login = resp_login_page.text
-
-    match_csrf = re.search(r'name="csrf_key"[^>]*value="([^"]+)"', html_login)
-    csrf_key = match_csrf.group(1) if match_csrf else ""
-
-    response = session.post(
-        f"{base_url}/index.php",
-        data={
-            "action": "AutenticaUsuario",
-            "csrf_key": csrf_key,
-            "formusuario": formusuario,
-            "formsenha": formsenha,
-        },
-    )
-    response.raise_for_status()
-    html = response.text
-
-    html = seguir_redirect_post(html, session)
-
-    response = session.post(
-        f"{base_url}/index.php",
-        data={"action": "AbreTelaConsultaInventarioBotanico"},
-    )
-    response.raise_for_status()
-    html = response.text
-    html = seguir_redirect_post(html, session)
-
-    match_editar = re.search(
-        r"abreTelaCadastroInventarioBotanico\s*\(\s*['\"](\d+)['\"]\s*,\s*['\"]consulta['\"]\s*\)",
-        html,
-    )
-    id_inventario = match_editar.group(1) if match_editar else None
-    if not id_inventario:
-        return (False, [], "Nenhum inventário encontrado na lista para editar.")
-
-    response = session.post(
-        f"{base_url}/index.php",
-        data={
-            "action": "AbreTelaCadastroInventarioBotanico",
-            "id_inventario_botanico": id_inventario,
-            "origem": "consulta",
-        },
-    )
-    response.raise_for_status()
-    html_edicao = response.text
-    html_edicao = seguir_redirect_post(html_edicao, session)
-
-    if NAO_PREENCHER:
-        if gerar_arquivo_sem_correspondencia:
-            gerar_arquivo_sem_correspondencia(df, html_edicao)
-        return (True, [], None)
-
-    ids_arvores = extrair_ids_arvores(html_edicao)
-    if ids_arvores:
-        if stopped():
-            return (False, [], "Interrompido pelo usuário.")
-        log(f"Excluindo {len(ids_arvores)} árvore(s) do inventário antes de incluir...")
-        num_workers = min(4, len(ids_arvores))
-
-        def _excluir_uma(id_esp):
-            try:
-                resp = session.post(
-                    f"{base_url}/index.php",
-                    data={
-                        "action": "ExcluiArvoreInventarioBotanico",
-                        "id_inventario_botanico_especie": id_esp,
-                        "origem": "consulta",
-                        "id_inventario_botanico": id_inventario,
-                    },
-                )
-                resp.raise_for_status()
-                return (id_esp, None)
-            except Exception as e:
-                return (id_esp, e)
-
-        with ThreadPoolExecutor(max_workers=num_workers) as executor:
-            resultados = list(executor.map(_excluir_uma, ids_arvores))
-
-        erros = [(id_esp, err) for id_esp, err in resultados if err is not None]
-        if erros:
-            for id_esp, err in erros:
-                log(f"Erro ao excluir id_inventario_botanico_especie={id_esp}: {err}")
-        response = session.post(
-            f"{base_url}/index.php",
-            data={
-                "action": "AbreTelaCadastroInventarioBotanico",
-                "id_inventario_botanico": id_inventario,
-                "origem": "consulta",
-            },
-        )
-        response.raise_for_status()
-        html_edicao = seguir_redirect_post(response.text, session)
-        log("Árvores excluídas.")
-        if stopped():
-            return (False, [], "Interrompido pelo usuário.")
-
-    df_linhas = df.iloc[0:].copy() if len(df) > 0 else pd.DataFrame()
-    if df_linhas.empty:
-        log("Nenhuma linha no dataframe.")
-        return (True, [], None)
-
-    driver = None
-    if not USAR_APENAS_REQUESTS and USAR_WEBDRIVER_MANAGER:
-        chrome_options = ChromeOptions()
-        chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--window-size=1920,1080")
-        chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        for tentativa in range(2):
-            try:
-                service = ChromeService(ChromeDriverManager().install())
-                driver = webdriver.Chrome(service=service, options=chrome_options)
-                break
-            except Exception as e:
-                if tentativa == 0:
-                    log(f"Selenium falhou: {e}. Tentando de novo em 2s...")
-                    time.sleep(2)
-                else:
-                    log("Selenium indisponível. Preenchimento será feito via requests.")
-                    break
-    elif not USAR_APENAS_REQUESTS:
-        log("webdriver-manager não instalado. Preenchimento será feito via requests.")
-
-    if driver is not None:
-        driver.set_page_load_timeout(60)
-        wait = WebDriverWait(driver, 20)
-        url_site = "https://sisarv.rio.gov.br/"
-        url_quente = "https://www.google.com"
-        try:
-            log("Abrindo navegador e carregando página inicial...")
-            driver.get(url_quente)
-            time.sleep(2.0)
-            log("Navegando para o SisArv...")
-            driver.get(url_site)
-            time.sleep(2.0)
-            if driver.current_url in ("data:", "data:,") or "sisarv" not in driver.current_url.lower():
-                driver.get(url_site)
-                time.sleep(2.0)
-            pausa(1.0, 2.0)
-            driver.execute_script("document.forms['redir'].submit();")
-            pausa(2.0, 3.0)
-            log("Fazendo login...")
-            wait.until(EC.presence_of_element_located((By.NAME, "formusuario")))
-            pausa(0.6, 1.2)
-            driver.find_element(By.NAME, "formusuario").clear()
-            pausa(0.2, 0.5)
-            driver.find_element(By.NAME, "formusuario").send_keys(formusuario)
-            pausa(0.4, 0.9)
-            driver.find_element(By.NAME, "formsenha").clear()
-            pausa(0.2, 0.5)
-            driver.find_element(By.NAME, "formsenha").send_keys(formsenha)
-            pausa(0.5, 1.0)
-            driver.find_element(By.ID, "logForm").submit()
-            pausa(3.0, 5.0)
-            if "document.redir.submit()" in driver.page_source or len(driver.page_source) < 1000:
-                driver.execute_script("document.forms['redir'].submit();")
-                pausa(2.0, 3.0)
-            log("Indo para Consultar Inventário Botânico...")
-            menu_inv = wait.until(
-                EC.element_to_be_clickable((By.XPATH, "//a[contains(.,'Inventário Botânico') and contains(@class,'dropdown-toggle')]"))
-            )
-            pausa(0.5, 1.0)
-            menu_inv.click()
-            pausa(0.6, 1.2)
-            driver.find_element(By.ID, "opcaoMenu-ConsultarInventarioBotanico").click()
-            pausa(2.5, 4.0)
-            log("Abrindo tela de Edição do inventário...")
-            btn_editar = wait.until(
-                EC.element_to_be_clickable((By.XPATH, "//button[contains(@onclick,\"abreTelaCadastroInventarioBotanico\") and contains(@onclick,\"consulta\")]"))
-            )
-            pausa(0.5, 1.0)
-            btn_editar.click()
-            pausa(2.5, 4.0)
-            log("Preenchendo campo a campo e clicando em Incluir Árvore na Lista...")
-            panel_arvores = driver.find_element(By.ID, "panelArvores")
-            driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", panel_arvores)
-            pausa(1.0, 1.8)
-            numeros_ja = extrair_numeros_ja_preenchidos(driver.page_source)
-            total_arvores = len(df_linhas)
-            pbar = tqdm(df_linhas.iterrows(), total=total_arvores, desc="Unidades", unit="un")
-            for idx, (_, row) in enumerate(pbar, start=1):
-                if progress_range_callback:
-                    progress_range_callback(idx, total_arvores)
-                if stopped():
-                    log("Interrompido pelo usuário.")
-                    return (False, [], "Interrompido pelo usuário.")
-                n = row["Nº"]
-                if pd.isna(n):
-                    continue
-                n = int(n)
-                pbar.set_postfix(unidade=n)
-                if n in numeros_ja:
-                    pbar.write(f"Nº {n} já preenchido na lista, pulando.")
-                    continue
-                pbar.write(f"Preenchendo árvore Nº {n} (campo a campo)...")
-                nome_vulgar = str(row["Nome Vulgar"]).strip() if pd.notna(row.get("Nome Vulgar")) else ""
-                nome_cientifico = str(row["Nome Científico"]).strip() if pd.notna(row.get("Nome Científico")) else ""
-                if not nome_vulgar:
-                    nome_vulgar = "não-identificada"
-                if not nome_cientifico:
-                    nome_cientifico = "ni"
-                texto_popular = CORRESPONDENCIAS_NOME_POPULAR.get(nome_vulgar) or nome_vulgar
-                texto_cientifico = CORRESPONDENCIAS_NOME_CIENTIFICO.get(nome_cientifico) or nome_cientifico
-                texto_popular = NOME_POPULAR_PLANILHA_PARA_SITE.get(texto_popular.strip()) or NOME_POPULAR_PLANILHA_PARA_SITE.get(texto_popular) or texto_popular
-                texto_cientifico = NOME_CIENTIFICO_PLANILHA_PARA_SITE.get(texto_cientifico.strip()) or NOME_CIENTIFICO_PLANILHA_PARA_SITE.get(texto_cientifico) or texto_cientifico
-                valores = obter_valores_mapeamento(row, df_linhas.columns)
-                pausa(0.8, 1.5)
-                # Preencher campo a campo (MAPEAMENTO_PREENCHIMENTO): Nº, Nome Popular, Nome Científico, depois demais campos
-                # Selects que usam texto visível (nome popular/científico)
-                try:
-                    Select(driver.find_element(By.ID, "nome_popular")).select_by_visible_text(texto_popular)
-                except Exception:
-                    try:
-                        Select(driver.find_element(By.ID, "nome_popular")).select_by_visible_text(texto_popular.upper())
-                    except Exception:
-                        pass
-                pausa(0.4, 0.9)
-                try:
-                    Select(driver.find_element(By.ID, "nome_cientifico")).select_by_visible_text(texto_cientifico)
-                except Exception:
-                    try:
-                        Select(driver.find_element(By.ID, "nome_cientifico")).select_by_visible_text(texto_cientifico.upper())
-                    except Exception:
-                        pass
-                pausa(0.3, 0.6)
-                # Demais campos a partir do MAPEAMENTO_PREENCHIMENTO
-                ids_select = (
-                    "estado_conservacao", "local_especime", "fcb",
-                    "notabilidade", "utilidade_publica", "area_publica",
-                    "motivacao", "intencao",
-                )
-                for id_form, valor in valores.items():
-                    if id_form in ("nome_popular", "nome_cientifico"):
-                        continue
-                    try:
-                        elem = driver.find_element(By.ID, id_form)
-                        valor_str = str(valor) if valor else ""
-                        if id_form in ids_select:
-                            try:
-                                Select(elem).select_by_value(valor_str)
-                            except Exception:
-                                try:
-                                    Select(elem).select_by_visible_text(valor_str)
-                                except Exception:
-                                    pass
-                        else:
-                            elem.clear()
-                            pausa(0.08, 0.2)
-                            elem.send_keys(valor_str)
-                        pausa(0.1, 0.3)
-                    except Exception:
-                        pass
-                pausa(0.5, 1.0)
-                driver.find_element(By.ID, "botao-IncluirArvoreLista").click()
-                numeros_ja.add(n)
-                pausa(1.5, 2.5)
-                pbar.write(f"Nº {n} ({nome_vulgar} / {nome_cientifico}) incluída (navegador).")
-            log("Preenchimento da linha 1 ao final concluído (navegador).")
-            pausa(2.0, 3.0)
-        finally:
-            driver.quit()
-        return (True, [], None)
-
-    if driver is None:
-        # Preenchimento via requests (quando Selenium não está disponível ou falhou)
-        def extrair_opcoes_select(html_page, select_id):
-            bloco = re.search(
-                rf'<select[^>]+id=["\']?{re.escape(select_id)}["\']?[^>]*>(.*?)</select>',
-                html_page,
-                re.DOTALL | re.IGNORECASE,
-            )
-            if not bloco:
-                return {}
-            opts = re.findall(r'<option\s+value="(\d+)"[^>]*>\s*([^<]+?)\s*</option>', bloco.group(1))
-            return {texto.strip(): val for val, texto in opts if texto.strip()}
-
-        log("Preenchendo árvores via requests...")
-        map_popular = extrair_opcoes_select(html_edicao, "nome_popular")
-        map_cientifico = extrair_opcoes_select(html_edicao, "nome_cientifico")
-        map_popular_norm = {normalizar_nome(t): val for t, val in map_popular.items()}
-        map_cientifico_norm = {normalizar_nome(t): val for t, val in map_cientifico.items()}
-        numeros_ja = extrair_numeros_ja_preenchidos(html_edicao)
-        arvores_nao_encontradas = []
-        total_arvores = len(df_linhas)
-        pbar = tqdm(df_linhas.iterrows(), total=total_arvores, desc="Unidades", unit="un")
-        for idx, (_, row) in enumerate(pbar, start=1):
-            if progress_range_callback:
-                progress_range_callback(idx, total_arvores)
-            if stopped():
-                log("Interrompido pelo usuário.")
-                return (False, [], "Interrompido pelo usuário.")
-            n = row["Nº"]
-            if pd.isna(n):
-                continue
-            n = int(n)
-            pbar.set_postfix(unidade=n)
-            if n in numeros_ja:
-                msg = f"Nº {n} já preenchido na lista, pulando."
-                pbar.write(msg)
-                log(msg)
-                continue
-            nome_vulgar = str(row["Nome Vulgar"]).strip() if pd.notna(row.get("Nome Vulgar")) else ""
-            nome_cientifico = str(row["Nome Científico"]).strip() if pd.notna(row.get("Nome Científico")) else ""
-            if not nome_vulgar:
-                nome_vulgar = "não-identificada"
-            if not nome_cientifico:
-                nome_cientifico = "ni"
-            texto_popular = CORRESPONDENCIAS_NOME_POPULAR.get(nome_vulgar) or nome_vulgar
-            texto_cientifico = CORRESPONDENCIAS_NOME_CIENTIFICO.get(nome_cientifico) or nome_cientifico
-            texto_popular = NOME_POPULAR_PLANILHA_PARA_SITE.get(texto_popular.strip()) or NOME_POPULAR_PLANILHA_PARA_SITE.get(texto_popular) or texto_popular
-            texto_cientifico = NOME_CIENTIFICO_PLANILHA_PARA_SITE.get(texto_cientifico.strip()) or NOME_CIENTIFICO_PLANILHA_PARA_SITE.get(texto_cientifico) or texto_cientifico
-            n_pop = normalizar_nome(texto_popular)
-            n_cien = normalizar_nome(texto_cientifico)
-            id_popular = (
-                map_popular_norm.get(n_pop)
-                or map_popular.get(texto_popular)
-                or map_popular.get(texto_popular.upper())
-            )
-            id_cientifico = (
-                map_cientifico_norm.get(n_cien)
-                or map_cientifico.get(texto_cientifico)
-                or map_cientifico.get(texto_cientifico.upper())
-            )
-            if not id_popular or not id_cientifico:
-                arvores_nao_encontradas.append((n, texto_popular, texto_cientifico))
-                msg = f"Nº {n}: nome não encontrado nos selects (vulgar={texto_popular!r}, científico={texto_cientifico!r}). Pulando."
-                pbar.write(msg)
-                log(msg)
-                continue
-            valores = obter_valores_mapeamento(row, df_linhas.columns)
-            valores["nome_popular"] = id_popular
-            valores["nome_cientifico"] = id_cientifico
-            payload = {
-                "action": "IncluiArvoreInventarioBotanico",
-                "id_inventario_botanico": id_inventario,
-                "origem": "consulta",
-                "id_em_edicao": "",
-                "area_interesse_social": "SIM",
-                **valores,
-            }
-            payload = normalizar_payload_requests(payload)
-            resp = session.post(f"{base_url}/index.php", data=payload)
-            try:
-                resp.raise_for_status()
-            except requests.exceptions.HTTPError as e:
-                log(f"Nº {n}: servidor retornou {resp.status_code} - {e}")
-                pbar.write(f"Nº {n}: servidor retornou {resp.status_code} - {e}")
-                pbar.write(f"Resposta: len={len(resp.text)} chars; primeiros 800: {repr(resp.text[:800])}")
-                log("Resposta (primeiros 800 chars): " + repr(resp.text[:800]))
-                pbar.write("Payload (valores enviados):")
-                for k, v in payload.items():
-                    if k == "action":
-                        continue
-                    pbar.write(f"  {k}={repr(v)}")
-                pbar.write("Pulando para a próxima árvore.")
-                log("Pulando para a próxima árvore.")
-                continue
-            html_edicao = seguir_redirect_post(resp.text, session)
-            numeros_ja = extrair_numeros_ja_preenchidos(html_edicao)
-            msg = f"Nº {n} ({nome_vulgar} / {nome_cientifico}) incluída via requests."
-            pbar.write(msg)
-            log(msg)
-        log("Preenchimento da linha 1 ao final concluído (via requests).")
-        if arvores_nao_encontradas:
-            log("--- Árvores não encontradas nos selects ---")
-            for n, vulg, cien in arvores_nao_encontradas:
-                log(f"  Nº {n}: {vulg!r} / {cien!r}")
-            log(f"Total: {len(arvores_nao_encontradas)} árvore(s) não encontrada(s).")
-        return (True, arvores_nao_encontradas, None)
-
-
-if __name__ == "__main__":
-    caminho_excel = r"C:\Users\DE0189769\OneDrive - Direcional Engenharia S A\Documentos Macedo One Drive\Automações - Lucas\ws.py"
-    df = pd.read_excel(caminho_excel)
-    df = preprocessar_df(df)
-    print(df)
-    run_sisarv("evelin.caboclo@gmail.com", "67750131", df)
+import io
+import os
+import re
+import csv
+import atexit
+import json
+import time
+import sqlite3
+import heapq
+import random
+import glob
+import hashlib
+import hmac
+import difflib
+import unicodedata
+import threading
+from collections import deque
+from contextlib import contextmanager
+from functools import cached_property, lru_cache
+from dataclasses import dataclass, field
+from html import unescape as unescape_html
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait as esperar_futures
+import requests
+from requests.adapters import HTTPAdapter
+from requests.cookies import RequestsCookieJar
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options as ChromeOptions
+from selenium.webdriver.chrome.service import Service as ChromeService
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait, Select
+from selenium.webdriver.support import expected_conditions as EC
+
+try:
+    from webdriver_manager.chrome import ChromeDriverManager
+    USAR_WEBDRIVER_MANAGER = True
+except ImportError:
+    USAR_WEBDRIVER_MANAGER = False
+
+try:
+    from openpyxl import load_workbook
+except ImportError:
+    load_workbook = None
+
+try:
+    # Leitor de xlsx/ods em Rust (muito mais rápido que openpyxl/odfpy para planilhas grandes)
+    import python_calamine  # noqa: F401
+    MOTOR_PLANILHA = "calamine"
+except ImportError:
+    MOTOR_PLANILHA = None
+
+try:
+    from listar_sem_correspondencia import gerar_arquivo_sem_correspondencia
+except ImportError:
+    gerar_arquivo_sem_correspondencia = None
+
+try:
+    from correspondencias_editar import (
+        CORRESPONDENCIAS_NOME_POPULAR,
+        CORRESPONDENCIAS_NOME_CIENTIFICO,
+    )
+except ImportError:
+    CORRESPONDENCIAS_NOME_POPULAR = {}
+    CORRESPONDENCIAS_NOME_CIENTIFICO = {}
+
+base_url = "https://sisarv.rio.gov.br"
+# True = utilizar apenas requests (não abre navegador); False = tenta Selenium
+USAR_APENAS_REQUESTS = True  # utilizar requests
+# Preenchimento via navegador: "campo_a_campo" (digita/seleciona cada campo) ou "rapido" (todos os campos de
+# uma árvore em um único execute_script, com os mesmos valores e ids de catálogo do caminho via requests)
+PREENCHIMENTO_NAVEGADOR = "campo_a_campo"
+# Perfil de pausas do navegador (chave de PERFIS_RITMO) e orçamento opcional de tempo (segundos) para todas as árvores
+PERFIL_RITMO = "humano"
+ORCAMENTO_TEMPO_NAVEGADOR = None
+# Navegador recebe os cookies da sessão já autenticada via requests e abre a tela de edição direto (sem login na UI)
+ENTRAR_NAVEGADOR_COM_SESSAO = True
+# Navegadores abertos em paralelo no preenchimento via Selenium (reaproveitados entre execuções) e modo headless
+NUM_NAVEGADORES = max(1, (os.cpu_count() or 2) // 2)
+NAVEGADOR_HEADLESS = True
+# Quedas de navegador toleradas em uma mesma árvore (a cada queda ela volta para a fila; na última conta como falha)
+TENTATIVAS_ARVORE_NAVEGADOR = 2
+# True = não preenche o formulário; apenas gera o arquivo com valores sem correspondência no site
+NAO_PREENCHER = False
+# Linhas por bloco na leitura em streaming (PlanilhaEmBlocos) de planilhas grandes
+TAMANHO_BLOCO_LEITURA = 2000
+# Número de inclusões simultâneas no preenchimento via requests (1 = uma árvore por vez)
+NUM_WORKERS_INCLUSAO = 1
+# Confirmação das inclusões via requests:
+#   "pagina" = segue o redirect e relê a página de edição após cada inclusão
+#   "reconciliacao" = guarda os Nº enviados e confere todos com uma única leitura da página
+CONFIRMACAO_INCLUSAO = "pagina"
+# No modo "reconciliacao": relê a página a cada N inclusões (0 = apenas ao final)
+RECONCILIAR_A_CADA = 0
+# No modo "reconciliacao": quantas vezes reenviar em lote os Nº ausentes da página
+TENTATIVAS_RECONCILIACAO = 2
+# Exclusões simultâneas na fase de exclusão (com CONCORRENCIA_ADAPTATIVA, ponto de partida do AIMD) e quantas
+# vezes reexcluir as árvores que continuam na lista na leitura de verificação
+NUM_WORKERS_EXCLUSAO = 8
+TENTATIVAS_EXCLUSAO = 2
+# Sincronização do inventário com a planilha:
+#   "substituir" = exclui todas as árvores do inventário e inclui a planilha inteira
+#   "diferencial" = exclui, inclui ou edita (id_em_edicao) apenas as árvores que mudaram
+MODO_SINCRONIZACAO = "substituir"
+# Cache em disco dos catálogos de espécies (selects nome_popular/nome_cientifico) por servidor e inventário
+DIRETORIO_CACHE = os.path.join(os.path.expanduser("~"), ".cache", "sisarv")
+# Validade do cache de catálogos em segundos (0 = não usa cache)
+TTL_CACHE_CATALOGOS = 24 * 60 * 60
+# Busca aproximada de nomes de espécies quando a correspondência exata falha:
+# similaridade mínima (0 a 1) para aceitar a sugestão automaticamente (None = nunca aceita)
+LIMIAR_ACEITE_APROXIMADO = 0.85
+# Quantidade de sugestões informadas para os nomes não encontrados
+NUM_SUGESTOES_APROXIMADAS = 3
+# True = registra fases e linhas em um jornal SQLite (em DIRETORIO_CACHE) para retomar execuções interrompidas
+USAR_JORNAL = True
+# Reaproveita (em DIRETORIO_CACHE) os cookies da sessão autenticada entre execuções, por até TTL_CACHE_SESSOES segundos
+USAR_CACHE_SESSOES = True
+TTL_CACHE_SESSOES = 8 * 60 * 60
+# Custo do verificador da senha gravado com cada sessão (hashlib.scrypt; ~50 ms por login/reaproveitamento)
+PARAMETROS_SCRYPT_SESSOES = {"n": 2 ** 14, "r": 8, "p": 1}
+# True = grava o relatório JSON e as métricas Prometheus (textfile) de cada execução em DIRETORIO_TELEMETRIA,
+# mantendo só os MAX_RELATORIOS_TELEMETRIA relatórios mais recentes
+EXPORTAR_TELEMETRIA = False
+DIRETORIO_TELEMETRIA = os.path.join(DIRETORIO_CACHE, "telemetria")
+MAX_RELATORIOS_TELEMETRIA = 50
+# Modo lote (run_sisarv_lote): inventários processados em paralelo por conta
+NUM_INVENTARIOS_SIMULTANEOS = 2
+# Controle da taxa de requisições (AIMD): o limite de requisições simultâneas sobe devagar enquanto o servidor
+# responde bem e cai pela metade diante de erros transitórios ou respostas lentas.
+# True = o limite pode crescer até CONCORRENCIA_MAXIMA; False = nunca passa do número de workers pedido
+CONCORRENCIA_ADAPTATIVA = False
+CONCORRENCIA_MAXIMA = 8
+# Respostas mais lentas que isso (segundos) contam como sinal de sobrecarga do servidor
+LATENCIA_ALVO = 3.0
+# Tentativas por requisição em falhas transitórias (conexão, timeout, 429/5xx), com espera exponencial aleatória
+TENTATIVAS_REQUISICAO = 4
+ESPERA_BASE_REPETICAO = 1.0
+ESPERA_MAXIMA_REPETICAO = 30.0
+STATUS_TRANSITORIOS = (429, 500, 502, 503, 504)
+# Timeouts das requisições HTTP em segundos: (conexão, leitura)
+TIMEOUT_REQUISICAO = (10, 90)
+
+HEADERS_PADRAO = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "pt-BR,pt;q=0.9,en;q=0.8",
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
+}
+
+# =============================================================================
+# MAPEAMENTO DE PREENCHIMENTO (Coluna DF → Campo no site)
+# =============================================================================
+# Formato: Campo no site (para preenchimento) = origem do valor.
+# Origem = nome da coluna do DF (valor vem da planilha) OU valor fixo (não é coluna).
+# Valores fixos (entre chaves na especificação): "", "NÃO", "Espécime não enquadrada...".
+# Fácil de editar: altere a coluna ou o valor fixo conforme a necessidade.
+#
+# Correspondência (Coluna DF - Campo no site):
+#   Nº → Nº no Projeto
+#   Nome Vulgar → Nome Popular
+#   Nome Científico → Nome Científico
+#   {VAZIO} → Observação
+#   Estado de Conservação → Estado de Conservação
+#   Local → Local do Espécime
+#   {"Espécime não enquadrada nos casos acima"} → Políticas Municipais
+#   {NÃO} → Notabilidade
+#   Área Pública → Área Pública
+#   Motivação → Motivação
+#   Intenção → Intenção
+#   H → Altura (m)
+#   Copa → Diâmetro da copa(m)
+#   DAP 1..5 → DAP 1(cm) .. DAP 5(cm)
+#   {NÃO} → Utilidade Pública
+# =============================================================================
+MAPEAMENTO_PREENCHIMENTO = {
+    # Campo no site (preenchimento) : coluna do DF ou valor fixo
+    "Nº no Projeto": "Nº",                                     # coluna DF
+    "Nome Popular": "Nome Vulgar",                             # coluna DF
+    "Nome Científico": "Nome Científico",                      # coluna DF
+    "Observação": "",                                          # fixo
+    "Estado de Conservação": "Estado de Conservação",          # coluna DF
+    "Local do Espécime": "9",                                  # fixo (value da opção "NÃO INFORMADO" no select)
+    "Políticas Municipais": "Espécime não enquadrada nos casos acima",  # fixo
+    "Notabilidade": "NÃO",                                     # fixo
+    "Utilidade Pública": "NÃO",                                # fixo
+    "Área Pública": "Área Pública",                            # coluna DF
+    "Motivação": "Motivação",                                  # coluna DF
+    "Intenção": "Intenção",                                    # coluna DF
+    "Altura (m)": "H",                                         # coluna DF
+    "Diâmetro da copa(m)": "Copa",                             # coluna DF
+    "DAP 1(cm)": "DAP 1",                                      # coluna DF
+    "DAP 2(cm)": "DAP 2",                                      # coluna DF
+    "DAP 3(cm)": "DAP 3",                                      # coluna DF
+    "DAP 4(cm)": "DAP 4",                                      # coluna DF
+    "DAP 5(cm)": "DAP 5",                                      # coluna DF
+}
+
+# Campo no site (chave de MAPEAMENTO_PREENCHIMENTO) -> id do elemento/parâmetro no formulário
+CAMPO_SITE_PARA_ID_FORM = {
+    "Nº no Projeto": "numero_especie_projeto",
+    "Nome Popular": "nome_popular",
+    "Nome Científico": "nome_cientifico",
+    "Observação": "observacao",
+    "Estado de Conservação": "estado_conservacao",
+    "Local do Espécime": "local_especime",
+    "Políticas Municipais": "fcb",
+    "Notabilidade": "notabilidade",
+    "Utilidade Pública": "utilidade_publica",
+    "Área Pública": "area_publica",
+    "Motivação": "motivacao",
+    "Intenção": "intencao",
+    "Altura (m)": "altura_arvore",
+    "Diâmetro da copa(m)": "diametro_copa",
+    "DAP 1(cm)": "dap1",
+    "DAP 2(cm)": "dap2",
+    "DAP 3(cm)": "dap3",
+    "DAP 4(cm)": "dap4",
+    "DAP 5(cm)": "dap5",
+}
+
+
+def obter_valores_mapeamento(row, colunas_df):
+    """
+    Retorna um dicionário id_form -> valor a enviar, usando MAPEAMENTO_PREENCHIMENTO.
+    Se a origem for coluna do DF, usa row[col]; senão usa o valor fixo.
+    Nome Popular e Nome Científico ficam como texto (serão convertidos para id depois).
+    """
+    valores = {}
+    for campo_site, origem in MAPEAMENTO_PREENCHIMENTO.items():
+        id_form = CAMPO_SITE_PARA_ID_FORM.get(campo_site)
+        if not id_form:
+            continue
+        if origem in colunas_df:
+            v = row.get(origem)
+            if pd.isna(v):
+                v = ""
+            else:
+                v = str(v).strip()
+        else:
+            v = "" if origem is None else str(origem).strip()
+        valores[id_form] = aplicar_regras_campo(campo_site, v)
+    return valores
+
+
+def aplicar_regras_campo(campo_site, v):
+    """Valor a enviar para um campo (texto da planilha -> value do select/número formatado), pelas REGRAS_CAMPOS."""
+    return codificador_campos.valor(CAMPO_SITE_PARA_ID_FORM.get(campo_site), v)
+
+
+# Colunas da tabela de árvores do inventário (panelArvores) comparadas na sincronização diferencial com a linha da
+# planilha. A posição de cada uma é lida do <thead> da página (CABECALHOS_TABELA_ARVORES); se algum cabeçalho
+# não for reconhecido, a execução cai para a substituição completa.
+COLUNAS_TABELA_ARVORES = (
+    "numero_especie_projeto",
+    "nome_popular",
+    "nome_cientifico",
+    "estado_conservacao",
+    "altura_arvore",
+    "diametro_copa",
+    "dap1",
+    "dap2",
+    "dap3",
+    "dap4",
+    "dap5",
+)
+# Textos aceitos no <th> de cada coluna, comparados com normalizar_nome e sem unidades entre parênteses
+CABECALHOS_TABELA_ARVORES = {
+    "numero_especie_projeto": ("Nº", "Nº no Projeto", "Número", "No"),
+    "nome_popular": ("Nome Popular", "Nome Vulgar"),
+    "nome_cientifico": ("Nome Científico",),
+    "estado_conservacao": ("Estado", "Estado de Conservação"),
+    "altura_arvore": ("Altura", "H"),
+    "diametro_copa": ("Copa", "Diâmetro da copa"),
+    "dap1": ("DAP 1", "DAP1"),
+    "dap2": ("DAP 2", "DAP2"),
+    "dap3": ("DAP 3", "DAP3"),
+    "dap4": ("DAP 4", "DAP4"),
+    "dap5": ("DAP 5", "DAP5"),
+}
+
+
+# Mapeamento texto (planilha) -> value (id) para selects que o servidor só aceita por id
+MAPEAMENTO_ESTADO_CONSERVACAO_TEXTO_PARA_VALUE = {
+    "8": "8",
+    "NÃO ENQUADRADAS": "8",
+    "Espécies não enquadradas nos casos acima": "8",
+    "ESPÉCIES NÃO ENQUADRADAS": "8",
+    "ESPÉCIME NÃO ENQUADRADA NOS CASOS ACIMA": "8",
+    "ESPECIES DE ORIGEM EXÓTICA OU NATIVA NÃO PERTENCENTE AO BIOMA MATA ATLÂNTICA, COM DAP >= 80CM": "7",
+    "EXÓTICA OU NATIVA, NÃO MA, >=80CM": "7",
+    "ESPÉCIMES NATIVAS DO BIOMA MATA ATLÂNTICA COM DAP >= 70CM": "6",
+    "NATIVAS MA >= 70CM": "6",
+}
+MAPEAMENTO_FCB_TEXTO_PARA_VALUE = {
+    "3": "3",
+    "Espécime não enquadrada nos casos acima": "3",
+}
+MAPEAMENTO_MOTIVACAO_TEXTO_PARA_VALUE = {
+    "1": "1", "PROJETO": "1", "2": "2", "MORTE": "2", "MORTA": "2", "3": "3", "SEM MOTIVO": "3",
+    "TERRAPLENAGEM": "1", "REMOVER": "1",
+    "QUEBRADA": "2", "CUPIM": "2", "TOMBADA": "2", "PODRE": "2",
+}
+MAPEAMENTO_INTENCAO_TEXTO_PARA_VALUE = {
+    "1": "1", "CORTE": "1", "REMOVER": "1", "2": "2", "PRESERVAÇÃO": "2", "PRESERVAR": "2",
+    "3": "3", "TRANSPLANTIO": "3", "4": "4", "AUTORIZAÇÃO ANTERIOR": "4",
+}
+
+# Regras de preenchimento por id do formulário, compiladas uma vez em codificador_campos (CodificadorCampos).
+# "opcao": value do select. Texto vazio -> "vazio" (padrão ""); só dígitos -> o próprio value (exceto com
+# "aceitar_id": False); senão, sem diferenciar maiúsculas: "exato" (texto inteiro), depois "contem" (trechos, na
+# ordem: o primeiro da lista que aparecer no texto vence), depois, com "aceitar_trecho", o texto como pedaço de
+# um dos trechos de "contem"; nada encontrado -> "padrao".
+# "inteiro": int(float(texto)) ("invalido" para textos não numéricos, senão o próprio texto).
+# "decimal": "X,XX". Regras extras podem ser acrescentadas, sem mexer no código, em ARQUIVO_REGRAS_CAMPOS.
+REGRAS_CAMPOS = {
+    "numero_especie_projeto": {"tipo": "inteiro"},
+    "estado_conservacao": {
+        "tipo": "opcao",
+        "exato": MAPEAMENTO_ESTADO_CONSERVACAO_TEXTO_PARA_VALUE,
+        "contem": {k: v for k, v in MAPEAMENTO_ESTADO_CONSERVACAO_TEXTO_PARA_VALUE.items() if not k.isdigit()},
+        "aceitar_trecho": True,
+        "padrao": "8",
+    },
+    "fcb": {"tipo": "opcao", "exato": MAPEAMENTO_FCB_TEXTO_PARA_VALUE, "padrao": "3"},
+    "motivacao": {
+        "tipo": "opcao",
+        "exato": MAPEAMENTO_MOTIVACAO_TEXTO_PARA_VALUE,
+        "contem": {"SEM MOTIVO": "3", "MORTA": "2", "QUEBRADA": "2", "CUPIM": "2", "TOMBADA": "2", "PODRE": "2"},
+        "vazio": "1",
+        "padrao": "1",  # restante fica como PROJETO
+    },
+    "intencao": {
+        "tipo": "opcao",
+        "exato": MAPEAMENTO_INTENCAO_TEXTO_PARA_VALUE,
+        "contem": {"PRESERVAR": "2", "REMOVER": "1"},
+        "padrao": "1",
+    },
+    "altura_arvore": {"tipo": "decimal"},
+    "diametro_copa": {"tipo": "decimal"},
+    "dap1": {"tipo": "inteiro", "invalido": "0"},
+    "dap2": {"tipo": "inteiro", "invalido": "0"},
+    "dap3": {"tipo": "inteiro", "invalido": "0"},
+    "dap4": {"tipo": "inteiro", "invalido": "0"},
+    "dap5": {"tipo": "inteiro", "invalido": "0"},
+}
+# JSON opcional {id do formulário: regra} mesclado sobre REGRAS_CAMPOS (chaves "exato"/"contem" são acrescentadas)
+ARQUIVO_REGRAS_CAMPOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "regras_campos.json")
+# Textos distintos memorizados pelo CodificadorCampos (os menos usados recentemente saem primeiro)
+TAMANHO_MEMORIA_CODIFICADOR = 50_000
+
+
+class CodificadorCampos:
+    """
+    REGRAS_CAMPOS compiladas: tabelas "exato" em dicionários já em maiúsculas, trechos "contem" de cada campo em uma
+    única expressão regular (todas as ocorrências em uma passada, vence a de maior prioridade) e o resultado dos
+    textos distintos memorizado (até TAMANHO_MEMORIA_CODIFICADOR, em LRU). valor() codifica um campo, coluna() uma
+    coluna inteira e linha() um payload.
+    """
+
+    def __init__(self, regras, tamanho_memoria=None):
+        self._regras = {}
+        for id_form, regra in regras.items():
+            compilada = dict(regra)
+            compilada["exato"] = {str(k).strip().upper(): v for k, v in (regra.get("exato") or {}).items()}
+            contem = [(str(k).strip().upper(), v) for k, v in (regra.get("contem") or {}).items() if str(k).strip()]
+            compilada["contem"] = contem
+            compilada["expressao"] = re.compile(
+                "(?=" + "|".join(f"({re.escape(k)})" for k, _ in contem) + ")"
+            ) if contem else None
+            self._regras[id_form] = compilada
+        self._codificar = lru_cache(maxsize=tamanho_memoria or TAMANHO_MEMORIA_CODIFICADOR)(self._codificar)
+
+    @classmethod
+    def carregar(cls, regras=None, arquivo=None):
+        """
+        Compila as regras (padrão REGRAS_CAMPOS) acrescidas das do arquivo JSON, se existir. Arquivo inválido
+        (JSON malformado ou regras fora do formato) é avisado e ignorado: valem só as regras padrão.
+        """
+        regras = regras or REGRAS_CAMPOS
+        arquivo = arquivo or ARQUIVO_REGRAS_CAMPOS
+        try:
+            with open(arquivo, encoding="utf-8") as f:
+                extras = json.load(f)
+        except OSError:
+            return cls(regras)
+        except ValueError as e:
+            print(f"Regras de campos em {arquivo} ignoradas (JSON inválido: {e}).")
+            return cls(regras)
+        try:
+            mescladas = {id_form: dict(regra) for id_form, regra in regras.items()}
+            for id_form, regra in extras.items():
+                atual = mescladas.setdefault(id_form, {"tipo": regra.get("tipo", "opcao")})
+                for chave, valor in regra.items():
+                    if chave in ("exato", "contem"):
+                        atual[chave] = {**(atual.get(chave) or {}), **valor}
+                    else:
+                        atual[chave] = valor
+            return cls(mescladas)
+        except (AttributeError, TypeError, ValueError, KeyError) as e:
+            print(f"Regras de campos em {arquivo} ignoradas (formato inválido: {e!r}).")
+            return cls(regras)
+
+    def _opcao(self, regra, v):
+        if v == "":
+            return regra.get("vazio", "")
+        if v.isdigit() and regra.get("aceitar_id", True):
+            return v
+        u = v.upper()
+        if u in regra["exato"]:
+            return regra["exato"][u]
+        if regra["expressao"] is not None:
+            melhor = None
+            for m in regra["expressao"].finditer(u):
+                if melhor is None or m.lastindex < melhor:
+                    melhor = m.lastindex
+                    if melhor == 1:
+                        break
+            if melhor is not None:
+                return regra["contem"][melhor - 1][1]
+            if regra.get("aceitar_trecho"):
+                for k, id_val in regra["contem"]:
+                    if u in k:
+                        return id_val
+        return regra.get("padrao", v)
+
+    @staticmethod
+    def _numero(regra, v):
+        if v == "":
+            return v
+        try:
+            num = float(v.replace(",", "."))
+            if regra["tipo"] == "decimal":
+                return f"{num:.2f}".replace(".", ",")
+            return str(int(num))
+        except (ValueError, OverflowError):
+            return regra.get("invalido", v)
+
+    def valor(self, id_form, v):
+        """Valor a enviar para o campo id_form (campos sem regra: o próprio texto)."""
+        regra = self._regras.get(id_form)
+        v = "" if v is None else str(v).strip()
+        if regra is None:
+            return v
+        return self._codificar(id_form, v)
+
+    def _codificar(self, id_form, v):
+        regra = self._regras[id_form]
+        return self._opcao(regra, v) if regra["tipo"] == "opcao" else self._numero(regra, v)
+
+    def coluna(self, id_form, v):
+        """Codifica uma coluna de textos (Series): numéricos vetorizados, opções uma vez por valor distinto."""
+        regra = self._regras.get(id_form)
+        if regra is None:
+            return v
+        if regra["tipo"] == "inteiro":
+            return _inteiros_texto(v, padrao_invalido=regra.get("invalido"))
+        if regra["tipo"] == "decimal":
+            num = pd.to_numeric(v.str.replace(",", ".", regex=False), errors="coerce")
+            ok = (v != "") & num.notna()
+            v = v.copy()
+            v[ok] = num[ok].map("{:.2f}".format).astype(str).str.replace(".", ",", regex=False)
+            return v
+        return _por_valor_distinto(v, lambda x: self.valor(id_form, x))
+
+    def linha(self, valores):
+        """Codifica um dicionário id do formulário -> texto (payload); chaves sem regra passam inalteradas."""
+        return {id_form: self.valor(id_form, v) if id_form in self._regras else v for id_form, v in valores.items()}
+
+
+codificador_campos = CodificadorCampos.carregar()
+
+# Mapeamento planilha → texto exato do select no site (quando difere por grafia/acento/hífen)
+# Sibipiruna: igual no site (normalização resolve). Cenostigma sp / samanea sp: ponto após "sp" no site é tratado pela normalização.
+NOME_POPULAR_PLANILHA_PARA_SITE = {
+    "Figueira Branca": "Figueira-Branca",
+    "Aroeirinha": "Aroerinha",
+    "Ipê Roxo": "Ipê-rOXO",
+    "Árvore samambaia": "árvore-samambaia",
+    "Ficus italiano": "ficus-italiano",
+    "ficus italiano": "ficus-italiano",
+    "Ficus lyrata": "ficus-lira",
+    "ficus lyrata": "ficus-lira",
+    # Mapeamentos novos solicitados
+    "Abacateiro": "Abacate",
+    "Areca-bambu": "Areca",
+    "Aroeira-vermelha": "Aroerinha",
+    "aroeira-vermelha": "aroerinha", 
+    "Arvore da chuva": "Samanea",
+    "Cassia-rosa": "Cassia",
+    "Clusia": "Abaneiro",
+    "Eucalipto Citriodora": "Eucalipto",
+    "Felicio": "Arvore Samambaia",
+    "Ficus Benjamina": "Ficus-Bejamina",
+    "Ficus Lirata": "Ficus-Lira",
+    "Figueira brava": "Figueira Branca",
+    "Figueira Religiosa": "Árvore-do-buda",
+    "Figueira-elastica": "Ficus Italiano",
+    "Goiabeira": "Goiaba",
+    "Ingá do brejo": "Ingá-Banana",
+    "Ipê Amarelo": "Ipê Tabaco",
+    "Ipê-rOXO": "IPÊ-ROXO",
+    "Jerivá": "Baba-de-boi",
+    "Morta": "não-identificada",
+    "Palmeira Fênix": "Tâmara-mirim",
+    "Tapiá": "Tapiá-de-bola",
+    "Toco": "não-identificada",
+    "toco": "não-identificada",
+}
+NOME_CIENTIFICO_PLANILHA_PARA_SITE = {
+    "Cratateva tapia": "Crataeva tapia",
+    "Crataeva tapia": "Crataeva tapia",
+    # Mapeamentos novos solicitados
+    "Handroanthus avellanedae": "Handroanthus Heptaphyllus",
+    "Mimosa caesalpiniifolia": "Mimosa Caesalpiniaefolia",
+    "Cenostigma pluviosum": "Cenostigma sp.",
+    "Crateva tapia": "Crataeva tapia",
+    "Schinus terebinthifolia": "Schinus Terebinthifolius",
+    "Corymbia citriodora": "Eucalyptus sp.", 
+    "corymbia citriodora": "eucalyptus sp.", 
+    "Samanea saman": "Samanea sp.",          
+    "samanea saman": "samanea sp.",          
+}
+
+
+def normalizar_payload_requests(payload):
+    """
+    Ajusta o payload para o formato que o servidor SisArv aceita (REGRAS_CAMPOS):
+    - numero_especie_projeto: inteiro (64 não 64.0)
+    - estado_conservacao, fcb, motivacao, intencao: value (id) do select, não texto
+    - altura_arvore, diametro_copa: formato "X,XX" (vírgula)
+    - dap1..dap5: inteiro como string
+    """
+    return codificador_campos.linha(payload)
+
+
+@lru_cache(maxsize=65536)
+def normalizar_nome(s):
+    """Normaliza nome para comparação: minúsculas, sem acentos, hífens, espaços nem pontos."""
+    if not s or not str(s).strip():
+        return ""
+    s = str(s).strip().lower()
+    s = unicodedata.normalize("NFD", s)
+    s = "".join(c for c in s if unicodedata.category(c) != "Mn")
+    s = s.replace("-", "").replace("–", "").replace("—", "")
+    s = s.replace(" ", "")
+    s = s.replace(".", "")
+    return s
+
+
+def texto_especie_site(nome, correspondencias, planilha_para_site):
+    """Aplica as correspondências e o mapeamento planilha → site a um nome da planilha."""
+    texto = correspondencias.get(nome) or nome
+    return planilha_para_site.get(texto.strip()) or planilha_para_site.get(texto) or texto
+
+
+def resolver_id_especie(texto, mapa, mapa_norm):
+    """Procura o id da espécie no catálogo: pelo nome normalizado, pelo texto exato ou em maiúsculas."""
+    return mapa_norm.get(normalizar_nome(texto)) or mapa.get(texto) or mapa.get(texto.upper())
+
+
+def _trigramas(norm):
+    norm = f"  {norm} "
+    return {norm[i:i + 3] for i in range(len(norm) - 2)}
+
+
+class IndiceNomesAproximados:
+    """
+    Índice de trigramas sobre os nomes (normalizados) de um select, para busca aproximada.
+    Os trigramas selecionam poucas candidatas; a similaridade final é a do difflib entre os nomes normalizados.
+    """
+
+    def __init__(self, opcoes):
+        por_norm = {}
+        for texto, val in opcoes.items():
+            norm = normalizar_nome(texto)
+            if norm:
+                por_norm[norm] = (texto, val)
+        self._entradas = []  # (texto, value, nome normalizado, quantidade de trigramas)
+        self._indice = {}    # trigrama -> posições em _entradas
+        for norm, (texto, val) in por_norm.items():
+            trigramas = _trigramas(norm)
+            pos = len(self._entradas)
+            self._entradas.append((texto, val, norm, len(trigramas)))
+            for t in trigramas:
+                self._indice.setdefault(t, []).append(pos)
+
+    def buscar(self, texto, k=3):
+        """Retorna até k sugestões [(texto da opção, value, similaridade 0..1)], da mais para a menos parecida."""
+        norm = normalizar_nome(texto)
+        if not norm:
+            return []
+        trigramas = _trigramas(norm)
+        comuns = {}
+        for t in trigramas:
+            for pos in self._indice.get(t, ()):
+                comuns[pos] = comuns.get(pos, 0) + 1
+        candidatas = heapq.nlargest(
+            max(k, 10), comuns, key=lambda pos: 2.0 * comuns[pos] / (len(trigramas) + self._entradas[pos][3])
+        )
+        pontuadas = []
+        for pos in candidatas:
+            texto_opcao, val, norm_opcao, _ = self._entradas[pos]
+            pontuadas.append((difflib.SequenceMatcher(None, norm, norm_opcao).ratio(), texto_opcao, val))
+        pontuadas.sort(key=lambda x: -x[0])
+        return [(texto_opcao, val, round(score, 3)) for score, texto_opcao, val in pontuadas[:k]]
+
+
+_indices_aproximados = {}
+_lock_indices_aproximados = threading.Lock()
+
+
+def indice_aproximado(catalogo, tipo):
+    """Índice aproximado do catálogo ("popular" ou "cientifico"), montado uma vez por assinatura do catálogo."""
+    chave = (catalogo.get("assinatura"), tipo)
+    with _lock_indices_aproximados:
+        indice = _indices_aproximados.get(chave)
+    if indice is None:
+        indice = IndiceNomesAproximados(catalogo[tipo])
+        with _lock_indices_aproximados:
+            _indices_aproximados[chave] = indice
+    return indice
+
+
+def resolver_especie(texto, catalogo, tipo):
+    """
+    Resolve o id da espécie no catálogo ("popular" ou "cientifico").
+    Retorna (id ou "", aproximacao, sugestoes): aproximacao = (texto da opção, similaridade) quando o id veio da
+    busca aproximada (similaridade >= LIMIAR_ACEITE_APROXIMADO); sugestoes = melhores candidatas quando não resolvido.
+    """
+    id_especie = resolver_id_especie(texto, catalogo[tipo], catalogo[f"{tipo}_norm"])
+    if id_especie:
+        return id_especie, None, ()
+    sugestoes = indice_aproximado(catalogo, tipo).buscar(texto, max(1, NUM_SUGESTOES_APROXIMADAS))
+    if sugestoes and LIMIAR_ACEITE_APROXIMADO is not None and sugestoes[0][2] >= LIMIAR_ACEITE_APROXIMADO:
+        texto_opcao, id_especie, score = sugestoes[0]
+        return id_especie, (texto_opcao, score), ()
+    return "", None, tuple(sugestoes[:NUM_SUGESTOES_APROXIMADAS])
+
+
+def formatar_sugestoes(sugestoes):
+    return ", ".join(f"{texto!r} ({score:.0%})" for texto, _, score in sugestoes)
+
+
+def _por_valor_distinto(serie, funcao):
+    """Aplica funcao uma única vez por valor distinto da série e espalha o resultado pelas linhas."""
+    distintos = pd.unique(serie)
+    return serie.map(dict(zip(distintos, map(funcao, distintos))))
+
+
+def _coluna_texto(df, origem):
+    """Coluna do DF como texto sem espaços nas pontas ("" para vazios); se não for coluna, o valor fixo."""
+    if origem in df.columns:
+        col = df[origem]
+        return col.where(col.notna(), "").astype(str).str.strip()
+    return pd.Series("" if origem is None else str(origem).strip(), index=df.index, dtype=object)
+
+
+def _inteiros_texto(v, padrao_invalido=None):
+    """int(float(v)) como texto, coluna a coluna. Vazios ficam vazios; inválidos viram padrao_invalido (ou o original)."""
+    num = pd.to_numeric(v.str.replace(",", ".", regex=False), errors="coerce")
+    ok = (v != "") & num.notna() & np.isfinite(num)
+    saida = v.copy()
+    if padrao_invalido is not None:
+        saida[(v != "") & ~ok] = padrao_invalido
+    saida[ok] = np.trunc(num[ok]).astype("int64").astype(str)
+    return saida
+
+
+def _coluna_numeros(df):
+    """Coluna Nº como Int64: int(n) como no envio linha a linha (fracionário truncado); texto, vazio ou infinito → <NA>."""
+    n = pd.to_numeric(df["Nº"], errors="coerce") if "Nº" in df.columns else pd.Series(np.nan, index=df.index)
+    return np.trunc(n.where(np.isfinite(n))).astype("Int64")
+
+
+def numeros_da_planilha(df):
+    """Conjunto dos Nº válidos da planilha (mesma conversão de montar_tabela_payloads)."""
+    return {int(n) for n in _coluna_numeros(df).dropna()}
+
+
+def montar_tabela_payloads(df, catalogo=None):
+    """
+    Monta, coluna a coluna, a tabela de valores prontos para envio de todo o DataFrame (já pré-processado).
+    Mesmo resultado de obter_valores_mapeamento linha a linha (REGRAS_CAMPOS via codificador_campos), mas cada
+    código de select e nome de espécie é resolvido uma única vez por valor distinto.
+    Colunas: um id do formulário por campo de MAPEAMENTO_PREENCHIMENTO (nome_popular/nome_cientifico com o id
+    do catálogo, ou "" se não encontrado) e as auxiliares "_n", "_nome_vulgar", "_nome_cientifico",
+    "_texto_popular" e "_texto_cientifico"; e, por tipo ("popular"/"cientifico"), "_aproximado_<tipo>" com
+    (texto da opção, similaridade) quando o id veio da busca aproximada e "_sugestoes_<tipo>" quando não resolvido.
+    """
+    tabela = pd.DataFrame(index=df.index)
+    for campo_site, origem in MAPEAMENTO_PREENCHIMENTO.items():
+        id_form = CAMPO_SITE_PARA_ID_FORM.get(campo_site)
+        if not id_form:
+            continue
+        tabela[id_form] = codificador_campos.coluna(id_form, _coluna_texto(df, origem))
+
+    tabela["_n"] = _coluna_numeros(df)
+    nome_vulgar = _coluna_texto(df, "Nome Vulgar").replace("", "não-identificada")
+    nome_cientifico = _coluna_texto(df, "Nome Científico").replace("", "ni")
+    tabela["_nome_vulgar"] = nome_vulgar
+    tabela["_nome_cientifico"] = nome_cientifico
+    tabela["_texto_popular"] = _por_valor_distinto(
+        nome_vulgar, lambda x: texto_especie_site(x, CORRESPONDENCIAS_NOME_POPULAR, NOME_POPULAR_PLANILHA_PARA_SITE)
+    )
+    tabela["_texto_cientifico"] = _por_valor_distinto(
+        nome_cientifico, lambda x: texto_especie_site(x, CORRESPONDENCIAS_NOME_CIENTIFICO, NOME_CIENTIFICO_PLANILHA_PARA_SITE)
+    )
+    for tipo in ("popular", "cientifico"):
+        if catalogo:
+            resolucao = _por_valor_distinto(tabela[f"_texto_{tipo}"], lambda t, tp=tipo: resolver_especie(t, catalogo, tp))
+        else:
+            resolucao = pd.Series([("", None, ())] * len(tabela), index=tabela.index, dtype=object)
+        tabela[f"nome_{tipo}"] = resolucao.str[0]
+        tabela[f"_aproximado_{tipo}"] = resolucao.str[1]
+        tabela[f"_sugestoes_{tipo}"] = resolucao.str[2]
+    return tabela
+
+
+class RegistroArvore:
+    """
+    Uma árvore pronta para envio, gerada uma única vez a partir de montar_tabela_payloads (registros_arvores) e
+    consumida por todos os motores (requests, navegador e assíncrono). Os valores do formulário ficam em uma tupla,
+    na ordem de `campos` (tupla compartilhada por todos os registros da tabela).
+    """
+    __slots__ = (
+        "numero", "nome_vulgar", "nome_cientifico", "texto_popular", "texto_cientifico",
+        "aproximado_popular", "aproximado_cientifico", "sugestoes_popular", "sugestoes_cientifico",
+        "campos", "valores",
+    )
+
+    def __init__(self, numero, nome_vulgar, nome_cientifico, texto_popular, texto_cientifico, aproximado_popular,
+                 aproximado_cientifico, sugestoes_popular, sugestoes_cientifico, campos, valores):
+        self.numero = numero
+        self.nome_vulgar = nome_vulgar
+        self.nome_cientifico = nome_cientifico
+        self.texto_popular = texto_popular
+        self.texto_cientifico = texto_cientifico
+        self.aproximado_popular = aproximado_popular
+        self.aproximado_cientifico = aproximado_cientifico
+        self.sugestoes_popular = sugestoes_popular
+        self.sugestoes_cientifico = sugestoes_cientifico
+        self.campos = campos
+        self.valores = valores
+
+    def valor(self, campo):
+        return self.valores[self.campos.index(campo)]
+
+    @property
+    def especie_encontrada(self):
+        """Nome popular e científico resolvidos para ids do catálogo."""
+        return bool(self.valor("nome_popular")) and bool(self.valor("nome_cientifico"))
+
+    def payload(self, **extras):
+        """Campos do formulário (id -> valor a enviar), com os parâmetros extras à frente."""
+        payload = dict(extras)
+        payload.update(zip(self.campos, self.valores))
+        return payload
+
+    def __repr__(self):
+        return f"RegistroArvore(numero={self.numero!r}, nome_vulgar={self.nome_vulgar!r})"
+
+
+def registros_arvores(tabela):
+    """Lista de RegistroArvore de uma tabela de montar_tabela_payloads, lida coluna a coluna (sem Series por linha)."""
+    campos = tuple(c for c in tabela.columns if not c.startswith("_"))
+    numeros = [None if pd.isna(n) else int(n) for n in tabela["_n"].tolist()]
+    auxiliares = [tabela[c].tolist() for c in (
+        "_nome_vulgar", "_nome_cientifico", "_texto_popular", "_texto_cientifico", "_aproximado_popular",
+        "_aproximado_cientifico", "_sugestoes_popular", "_sugestoes_cientifico",
+    )]
+    valores = zip(*(tabela[c].tolist() for c in campos))
+    return [
+        RegistroArvore(n, *aux, campos, vals)
+        for n, *aux, vals in zip(numeros, *auxiliares, valores)
+    ]
+
+
+@dataclass
+class RelatorioValidacao:
+    """Resultado de validar_planilha: o que falharia (ou seria ajustado) no envio, sem acessar o site."""
+    linhas: int = 0
+    catalogo_verificado: bool = False                          # nomes conferidos contra um catálogo em cache
+    nomes_nao_encontrados: list = field(default_factory=list)  # (Nº, texto popular, texto científico, sugestões)
+    nomes_aproximados: list = field(default_factory=list)      # (tipo, texto da planilha, texto da opção, similaridade)
+    numeros_duplicados: dict = field(default_factory=dict)     # Nº -> quantidade de linhas
+    linhas_sem_numero: list = field(default_factory=list)      # linha da planilha (1 = cabeçalho)
+    numeros_fracionarios: list = field(default_factory=list)   # (linha da planilha, Nº da planilha, Nº enviado)
+    medidas_invalidas: list = field(default_factory=list)      # (Nº, coluna, valor)
+    segundos: float = 0.0
+
+    @property
+    def ok(self):
+        return not (self.nomes_nao_encontrados or self.numeros_duplicados or self.linhas_sem_numero
+                    or self.numeros_fracionarios or self.medidas_invalidas)
+
+    def resumo(self):
+        """Linhas de texto para log/interface."""
+        linhas = [f"Validação de {self.linhas} linha(s) em {self.segundos * 1000:.0f} ms"
+                  + ("" if self.catalogo_verificado else " (sem catálogo em cache: nomes não conferidos)") + "."]
+        for n, popular, cientifico, sugestoes in self.nomes_nao_encontrados:
+            msg = f"Nº {n}: nome não encontrado (vulgar={popular!r}, científico={cientifico!r})."
+            if sugestoes:
+                msg += f" Sugestões: {formatar_sugestoes(sugestoes)}."
+            linhas.append(msg)
+        for tipo, texto, opcao, score in self.nomes_aproximados:
+            linhas.append(f"Nome {'vulgar' if tipo == 'popular' else 'científico'} {texto!r} será associado a {opcao!r} ({score:.0%}).")
+        for n, quantidade in sorted(self.numeros_duplicados.items()):
+            linhas.append(f"Nº {n} repetido em {quantidade} linhas (só a primeira é enviada).")
+        for linha in self.linhas_sem_numero:
+            linhas.append(f"Linha {linha} sem Nº válido (não é enviada).")
+        for linha, numero, enviado in self.numeros_fracionarios:
+            linhas.append(f"Linha {linha}: Nº {numero!r} não é inteiro (será enviado como {enviado}).")
+        for n, coluna, valor in self.medidas_invalidas:
+            linhas.append(f"Nº {n}: {coluna} inválido ({valor!r}).")
+        if self.ok:
+            linhas.append("Nenhum problema encontrado.")
+        return linhas
+
+
+def validar_planilha(planilha, catalogo=None, cache_catalogos=None, servidor=None, id_inventario=None):
+    """
+    Validação offline (sem login) de toda a planilha em uma passada: o mesmo montar_tabela_payloads do envio
+    (sinônimos, regras de campo, resolução de nomes e normalização) sobre o catálogo informado ou o último catálogo
+    em cache do servidor (padrão base_url). planilha: DataFrame pré-processado, PlanilhaEmBlocos ou caminho.
+    Aponta nomes não resolvidos, Nº repetidos/ausentes/fracionários e alturas, copas ou DAPs que não são números.
+    Retorna RelatorioValidacao.
+    """
+    inicio = time.perf_counter()
+    if isinstance(planilha, PlanilhaEmBlocos):
+        df = planilha.carregar()
+    elif isinstance(planilha, pd.DataFrame):
+        df = planilha
+    else:
+        df = carregar_planilha_lote(planilha)
+    if catalogo is None:
+        catalogo = (cache_catalogos or cache_catalogos_padrao).ultimo_catalogo(servidor or base_url, id_inventario)
+    tabela = montar_tabela_payloads(df, catalogo)
+    relatorio = RelatorioValidacao(linhas=len(df), catalogo_verificado=bool(catalogo))
+
+    n = tabela["_n"]
+    # Linha da planilha: cabeçalho + linha 2 do cabeçalho mesclado (removida em preprocessar_df)
+    relatorio.linhas_sem_numero = [int(i) + 3 for i in np.flatnonzero(n.isna().to_numpy())]
+    if "Nº" in df.columns:
+        original = pd.to_numeric(df["Nº"], errors="coerce")
+        fracionarios = (n.notna() & (original != n.astype("float64"))).to_numpy()
+        relatorio.numeros_fracionarios = [
+            (int(i) + 3, float(original.iloc[i]), int(n.iloc[i])) for i in np.flatnonzero(fracionarios)
+        ]
+    contagem = n.dropna().value_counts()
+    relatorio.numeros_duplicados = {int(k): int(v) for k, v in contagem[contagem > 1].items()}
+
+    for coluna in ("H", "Copa", "DAP 1", "DAP 2", "DAP 3", "DAP 4", "DAP 5"):
+        if coluna not in df.columns:
+            continue
+        v = _coluna_texto(df, coluna)
+        num = pd.to_numeric(v.str.replace(",", ".", regex=False), errors="coerce")
+        invalidos = (v != "") & ~(num.notna() & np.isfinite(num))
+        for numero, valor in zip(n[invalidos], v[invalidos]):
+            relatorio.medidas_invalidas.append((None if pd.isna(numero) else int(numero), coluna, valor))
+
+    if catalogo:
+        sem_nome = (tabela["nome_popular"] == "") | (tabela["nome_cientifico"] == "")
+        for registro in tabela[sem_nome & n.notna()].to_dict("records"):
+            relatorio.nomes_nao_encontrados.append((
+                int(registro["_n"]), registro["_texto_popular"], registro["_texto_cientifico"],
+                tuple(registro["_sugestoes_popular"]) + tuple(registro["_sugestoes_cientifico"]),
+            ))
+        for tipo in ("popular", "cientifico"):
+            aproximados = tabela[tabela[f"_aproximado_{tipo}"].notna()].drop_duplicates(f"_texto_{tipo}")
+            for texto, (texto_opcao, score) in zip(aproximados[f"_texto_{tipo}"], aproximados[f"_aproximado_{tipo}"]):
+                relatorio.nomes_aproximados.append((tipo, texto, texto_opcao, score))
+    relatorio.segundos = time.perf_counter() - inicio
+    return relatorio
+
+
+# Pausas (min_s, max_s) por etapa do preenchimento de uma árvore no navegador
+PERFIS_RITMO = {
+    "humano": {
+        "antes_arvore": (0.8, 1.5), "nome_popular": (0.4, 0.9), "nome_cientifico": (0.3, 0.6),
+        "digitacao": (0.08, 0.2), "campo": (0.1, 0.3), "antes_incluir": (0.5, 1.0), "apos_incluir": (1.5, 2.5),
+        "inicio": (1.0, 1.8), "fim": (2.0, 3.0), "login": (0.5, 1.2),
+    },
+    "moderado": {
+        "antes_arvore": (0.3, 0.6), "nome_popular": (0.1, 0.3), "nome_cientifico": (0.1, 0.2),
+        "digitacao": (0.0, 0.05), "campo": (0.0, 0.1), "antes_incluir": (0.2, 0.4), "apos_incluir": (0.6, 1.0),
+        "inicio": (0.4, 0.8), "fim": (0.5, 1.0), "login": (0.2, 0.5),
+    },
+    "rapido": {
+        "antes_arvore": (0.0, 0.0), "nome_popular": (0.0, 0.0), "nome_cientifico": (0.0, 0.0),
+        "digitacao": (0.0, 0.0), "campo": (0.0, 0.0), "antes_incluir": (0.0, 0.1), "apos_incluir": (0.2, 0.4),
+        "inicio": (0.0, 0.0), "fim": (0.0, 0.0), "login": (0.0, 0.0),
+    },
+}
+# Etapas de PERFIS_RITMO que acontecem uma vez por navegador (fora do custo de cada árvore)
+ETAPAS_RITMO_SESSAO = ("inicio", "fim", "login")
+
+
+class RitmoNavegador:
+    """
+    Pausas do preenchimento via navegador conforme um perfil de PERFIS_RITMO. Com orçamento (segundos para todas
+    as árvores), antes de cada árvore as pausas são reduzidas na proporção necessária para o restante caber nele
+    (o custo das pausas por árvore é estimado pela árvore anterior).
+    """
+
+    def __init__(self, perfil=None, orcamento=None):
+        self.etapas = PERFIS_RITMO[perfil or PERFIL_RITMO]
+        self.orcamento = orcamento
+        self.fator = 1.0
+        self._inicio = time.monotonic()
+        self._pausas_arvore = sum((a + b) / 2 for e, (a, b) in self.etapas.items() if e not in ETAPAS_RITMO_SESSAO)
+        self._acumulado = 0.0
+
+    def planejar(self, arvores_restantes):
+        """Chamado antes de cada árvore: recalcula o fator das pausas a partir do orçamento restante."""
+        if self._acumulado:
+            self._pausas_arvore, self._acumulado = self._acumulado, 0.0
+        if self.orcamento is None or arvores_restantes <= 0:
+            return
+        disponivel = max(0.0, self.orcamento - (time.monotonic() - self._inicio)) / arvores_restantes
+        self.fator = min(1.0, disponivel / self._pausas_arvore) if self._pausas_arvore > 0 else 0.0
+
+    def pausa(self, etapa):
+        min_s, max_s = self.etapas.get(etapa, (0.0, 0.0))
+        segundos = random.uniform(min_s, max_s) if max_s > 0 else 0.0
+        if etapa not in ETAPAS_RITMO_SESSAO:
+            self._acumulado += segundos
+        if segundos * self.fator > 0:
+            time.sleep(segundos * self.fator)
+
+
+# Submete um POST para arguments[0] com os campos de arguments[1] (como os botões do SisArv fazem)
+SCRIPT_POST_FORMULARIO = """
+const form = document.createElement("form");
+form.method = "post";
+form.action = arguments[0];
+for (const [nome, valor] of Object.entries(arguments[1])) {
+    const campo = document.createElement("input");
+    campo.type = "hidden";
+    campo.name = nome;
+    campo.value = valor;
+    form.appendChild(campo);
+}
+(document.body || document.documentElement).appendChild(form);
+form.submit();
+"""
+
+
+def abrir_edicao_com_sessao(driver, cookies, id_inventario, timeout=20):
+    """
+    Entra no SisArv já autenticado: copia os cookies da sessão requests para o navegador e abre a tela de edição
+    do inventário direto (mesmo POST do botão Editar). Retorna False se o servidor não aceitar a sessão.
+    """
+    # Uma URL leve do próprio domínio, sem scripts de redirect, só para o navegador aceitar os cookies
+    driver.get(f"{base_url}/favicon.ico")
+    for c in cookies:
+        cookie = {"name": c.name, "value": c.value, "path": c.path or "/"}
+        if c.secure:
+            cookie["secure"] = True
+        driver.add_cookie(cookie)
+    driver.execute_script(SCRIPT_POST_FORMULARIO, f"{base_url}/index.php", {
+        "action": "AbreTelaCadastroInventarioBotanico",
+        "id_inventario_botanico": id_inventario,
+        "origem": "consulta",
+    })
+    WebDriverWait(driver, timeout).until(
+        lambda d: d.find_elements(By.ID, "panelArvores") or RE_FORMULARIO_LOGIN.search(d.page_source)
+    )
+    return bool(driver.find_elements(By.ID, "panelArvores"))
+
+
+# Preenche todos os campos de uma árvore: arguments[0] = [[id, valor], ...] na ordem do formulário.
+# Selects por value (ou, na falta, pelo texto da opção); dispara input/change como a digitação faria e,
+# se algum handler de change tiver alterado um select já preenchido, refaz a seleção. Retorna os ids não preenchidos.
+SCRIPT_PREENCHER_ARVORE = """
+const campos = arguments[0];
+const falhas = [];
+const escolhidos = {};
+const normalizar = (t) => String(t).trim().toUpperCase();
+function definir(id, valor) {
+    const el = document.getElementById(id);
+    if (!el) { return false; }
+    if (el.tagName === "SELECT") {
+        const opcoes = Array.from(el.options);
+        const opcao = opcoes.find((o) => o.value === valor) || opcoes.find((o) => normalizar(o.text) === normalizar(valor));
+        if (!opcao) { return false; }
+        el.value = opcao.value;
+        escolhidos[id] = opcao.value;
+    } else {
+        el.value = valor;
+    }
+    el.dispatchEvent(new Event("input", {bubbles: true}));
+    el.dispatchEvent(new Event("change", {bubbles: true}));
+    return true;
+}
+for (const [id, valor] of campos) {
+    if (!definir(id, valor)) { falhas.push(id); }
+}
+for (const [id, valor] of Object.entries(escolhidos)) {
+    const el = document.getElementById(id);
+    if (el.value !== valor) { el.value = valor; el.dispatchEvent(new Event("change", {bubbles: true})); }
+}
+return falhas;
+"""
+
+
+@dataclass
+class LinhaArvore:
+    """Uma linha da tabela de árvores do inventário (painel panelArvores)."""
+    numero: "int | None"
+    id_arvore: "str | None"
+    celulas: list = field(default_factory=list)
+
+
+RE_FORMULARIO_LOGIN = re.compile(r"""id=["']logForm["']|name=["']formusuario["']""")
+RE_EXCLUI_ARVORE = re.compile(r"excluiArvore\s*\(\s*['\"](\d+)['\"]")
+RE_ABRE_CADASTRO_CONSULTA = re.compile(
+    r"abreTelaCadastroInventarioBotanico\s*\(\s*['\"](\d+)['\"]\s*,\s*['\"]consulta['\"]\s*\)"
+)
+RE_CSRF_KEY = re.compile(r"<input\b[^>]*\bname=[\"']?csrf_key\b[^>]*>", re.IGNORECASE)
+RE_ATRIBUTO = re.compile(r"""(?:^|\s)([\w-]+)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))""")
+RE_SELECT = re.compile(r"<select\b([^>]*)>(.*?)</select\s*>", re.DOTALL | re.IGNORECASE)
+# Conteúdo até a próxima tag do mesmo tipo (de abertura ou fechamento), sem retrocesso: [^<]* intercalado com "<"
+# que não abre essa tag
+RE_OPTION = re.compile(r"<option\b([^>]*)>([^<]*(?:<(?!/?option\b)[^<]*)*)", re.IGNORECASE)
+RE_PAINEL_ARVORES = re.compile(r"""\bid\s*=\s*["']?panelArvores\b""", re.IGNORECASE)
+RE_TABELA = re.compile(r"<table\b", re.IGNORECASE)
+RE_CABECALHO = re.compile(r"<th\b[^>]*>([^<]*(?:<(?!/?th\b|/?tr\b)[^<]*)*)", re.IGNORECASE)
+RE_TBODY = re.compile(r"<tbody\b[^>]*>([^<]*(?:<(?!/tbody\b|/table\b)[^<]*)*)", re.IGNORECASE)
+RE_LINHA_TABELA = re.compile(r"<tr\b[^>]*>([^<]*(?:<(?!/?tr\b)[^<]*)*)", re.IGNORECASE)
+RE_CELULA = re.compile(r"<td\b[^>]*>([^<]*(?:<(?!/?td\b|/?tr\b)[^<]*)*)", re.IGNORECASE)
+RE_PRIMEIRA_CELULA = re.compile(r"<tr\b[^>]*>\s*<td\b[^>]*>([^<]*(?:<(?!/?td\b|/?tr\b)[^<]*)*)", re.IGNORECASE)
+RE_TAG = re.compile(r"<[^>]*>")
+RE_UNIDADE_CABECALHO = re.compile(r"\([^)]*\)")
+
+
+def _atributos(texto):
+    """Atributos de uma tag ({nome em minúsculas: valor}, sem entidades HTML)."""
+    return {
+        m.group(1).lower(): unescape_html(next((g for g in m.groups()[1:] if g is not None), ""))
+        for m in RE_ATRIBUTO.finditer(texto)
+    }
+
+
+def _texto_html(trecho):
+    """Texto visível de um trecho de HTML, com os espaços normalizados."""
+    if "<" in trecho:
+        trecho = RE_TAG.sub("", trecho)
+    if "&" in trecho:
+        trecho = unescape_html(trecho)
+    return " ".join(trecho.split())
+
+
+@dataclass
+class PaginaSisArv:
+    """
+    Dados extraídos de uma página do SisArv com expressões pré-compiladas, cada uma em uma passada linear.
+    csrf e ids são lidos na criação; selects e a tabela de árvores só na primeira consulta, e cada um só no seu
+    trecho do HTML (a confirmação de inclusão, que lê a página a cada árvore, usa apenas numeros_arvores()).
+    """
+    csrf_key: str = ""
+    ids_inventario: list = field(default_factory=list)   # abreTelaCadastroInventarioBotanico('id', 'consulta')
+    ids_arvores: list = field(default_factory=list)      # excluiArvore('id'), ordem preservada, sem duplicatas
+    html: str = field(default="", repr=False)
+
+    @cached_property
+    def selects(self):
+        """id do select -> {texto da opção: value}."""
+        selects = {}
+        for m in RE_SELECT.finditer(self.html):
+            atributos = _atributos(m.group(1))
+            opcoes = selects.setdefault(atributos.get("id") or atributos.get("name") or "", {})
+            for opcao in RE_OPTION.finditer(m.group(2)):
+                valor = _atributos(opcao.group(1)).get("value", "")
+                texto = _texto_html(opcao.group(2))
+                if texto and valor.isdigit():
+                    opcoes[texto] = valor
+        return selects
+
+    @cached_property
+    def assinatura_especies(self):
+        """
+        Hash do HTML bruto dos selects de espécies (nome_popular, nome_cientifico), sem analisar as opções: basta
+        para achar o catálogo no cache antes de ler e normalizar os selects.
+        """
+        trechos = {}
+        for m in RE_SELECT.finditer(self.html):
+            atributos = _atributos(m.group(1))
+            trechos.setdefault(atributos.get("id") or atributos.get("name") or "", m.group(2))
+        h = hashlib.sha1()
+        for select_id in ("nome_popular", "nome_cientifico"):
+            h.update(f"{select_id}\x1f{trechos.get(select_id, '')}\x1e".encode("utf-8"))
+        return h.hexdigest()
+
+    @cached_property
+    def _trechos_tabela_arvores(self):
+        """
+        HTML entre <table> e <tbody> (cabeçalho) e do primeiro <tbody> da primeira <table> após o elemento
+        id="panelArvores" (("", "") se não houver).
+        """
+        m = RE_PAINEL_ARVORES.search(self.html)
+        tabela = m and RE_TABELA.search(self.html, m.end())
+        m = tabela and RE_TBODY.search(self.html, tabela.end())
+        return (self.html[tabela.end():m.start()], m.group(1)) if m else ("", "")
+
+    @property
+    def _tabela_arvores(self):
+        return self._trechos_tabela_arvores[1]
+
+    @cached_property
+    def cabecalho_arvores(self):
+        """Texto de cada <th> do cabeçalho da tabela de árvores, na ordem das colunas."""
+        return [_texto_html(th) for th in RE_CABECALHO.findall(self._trechos_tabela_arvores[0])]
+
+    @cached_property
+    def linhas_arvores(self):
+        """LinhaArvore da tabela do inventário."""
+        linhas = []
+        for tr in RE_LINHA_TABELA.finditer(self._tabela_arvores):
+            linha = tr.group(1)
+            celulas = [_texto_html(td) for td in RE_CELULA.findall(linha)]
+            inicio = linha.find("excluiArvore")
+            id_arvore = RE_EXCLUI_ARVORE.search(linha, inicio) if inicio >= 0 else None
+            linhas.append(LinhaArvore(
+                numero=int(celulas[0]) if celulas and celulas[0].isdigit() else None,
+                id_arvore=id_arvore.group(1) if id_arvore else None,
+                celulas=celulas,
+            ))
+        return linhas
+
+    def numeros_arvores(self):
+        if "linhas_arvores" in self.__dict__:
+            return {linha.numero for linha in self.linhas_arvores if linha.numero is not None}
+        # Só a primeira célula de cada linha
+        numeros = (_texto_html(celula) for celula in RE_PRIMEIRA_CELULA.findall(self._tabela_arvores))
+        return {int(n) for n in numeros if n.isdigit()}
+
+
+def analisar_pagina(html):
+    """Lê o HTML e retorna um PaginaSisArv (recebendo um PaginaSisArv, devolve o mesmo)."""
+    if isinstance(html, PaginaSisArv):
+        return html
+    if not html:
+        return PaginaSisArv()
+    m = RE_CSRF_KEY.search(html)
+    return PaginaSisArv(
+        csrf_key=_atributos(m.group(0)).get("value", "") if m else "",
+        ids_inventario=list(dict.fromkeys(RE_ABRE_CADASTRO_CONSULTA.findall(html))),
+        ids_arvores=list(dict.fromkeys(RE_EXCLUI_ARVORE.findall(html))),
+        html=html,
+    )
+
+
+def extrair_numeros_ja_preenchidos(html):
+    """Extrai da tabela de árvores do inventário os 'Nº no Projeto' já preenchidos."""
+    return analisar_pagina(html).numeros_arvores()
+
+
+def extrair_ids_arvores(html):
+    """Extrai os id_inventario_botanico_especie da página (parâmetro de excluiArvore)."""
+    return list(analisar_pagina(html).ids_arvores)
+
+
+def colunas_tabela_arvores(html):
+    """
+    Posição das COLUNAS_TABELA_ARVORES na tabela de árvores, lida do cabeçalho: tupla com o id do formulário (ou
+    None) por coluna. None se faltar alguma coluna esperada ou se o Nº não for a primeira.
+    """
+    por_texto = {}
+    for id_form, textos in CABECALHOS_TABELA_ARVORES.items():
+        for texto in textos:
+            por_texto[normalizar_nome(RE_UNIDADE_CABECALHO.sub("", texto))] = id_form
+    colunas = tuple(
+        por_texto.get(normalizar_nome(RE_UNIDADE_CABECALHO.sub("", texto)))
+        for texto in analisar_pagina(html).cabecalho_arvores
+    )
+    esperadas = {id_form for id_form in COLUNAS_TABELA_ARVORES if id_form}
+    if not colunas or colunas[0] != "numero_especie_projeto" or not esperadas <= set(colunas):
+        return None
+    return colunas
+
+
+def extrair_arvores_existentes(html):
+    """
+    Indexa as árvores da tabela do inventário por 'Nº no Projeto'.
+    Retorna {n: [{"id": id_inventario_botanico_especie, "celulas": [texto de cada coluna]}, ...]}.
+    """
+    indice = {}
+    for linha in analisar_pagina(html).linhas_arvores:
+        if linha.numero is None or not linha.id_arvore:
+            continue
+        indice.setdefault(linha.numero, []).append({"id": linha.id_arvore, "celulas": linha.celulas})
+    return indice
+
+
+def extrair_opcoes_select(html_page, select_id):
+    """Retorna {texto da opção: value} do select informado."""
+    return dict(analisar_pagina(html_page).selects.get(select_id, {}))
+
+
+def assinatura_catalogo(selects):
+    """Hash barato das opções dos selects de espécies, usado para saber se o catálogo mudou no site."""
+    h = hashlib.sha1()
+    for select_id in ("nome_popular", "nome_cientifico"):
+        for texto, val in selects.get(select_id, {}).items():
+            h.update(f"{select_id}\x1f{val}\x1f{texto}\x1e".encode("utf-8"))
+    return h.hexdigest()
+
+
+def montar_catalogo_especies(selects, assinatura=None):
+    """Monta o catálogo de espécies (texto -> id e nome normalizado -> id) a partir dos selects da página."""
+    map_popular = dict(selects.get("nome_popular", {}))
+    map_cientifico = dict(selects.get("nome_cientifico", {}))
+    return {
+        "assinatura": assinatura or assinatura_catalogo(selects),
+        "popular": map_popular,
+        "cientifico": map_cientifico,
+        "popular_norm": {normalizar_nome(t): val for t, val in map_popular.items()},
+        "cientifico_norm": {normalizar_nome(t): val for t, val in map_cientifico.items()},
+    }
+
+
+class CacheCatalogos:
+    """
+    Cache dos catálogos de espécies por servidor e inventário, em memória e em disco (JSON em DIRETORIO_CACHE),
+    com validade TTL_CACHE_CATALOGOS. Guarda os índices já normalizados. Seguro para uso entre threads.
+    """
+
+    def __init__(self, diretorio=None, ttl=None):
+        self.diretorio = diretorio or DIRETORIO_CACHE
+        self.ttl = TTL_CACHE_CATALOGOS if ttl is None else ttl
+        self._memoria = {}
+        self._lock = threading.Lock()
+
+    def _caminho(self, servidor, id_inventario):
+        chave = hashlib.sha1(f"{servidor}|{id_inventario}".encode("utf-8")).hexdigest()
+        return os.path.join(self.diretorio, f"catalogo_{chave}.json")
+
+    def obter(self, servidor, id_inventario, assinatura=None):
+        """Retorna o catálogo em cache se estiver dentro do TTL (e com a mesma assinatura, se informada)."""
+        if self.ttl <= 0:
+            return None
+        caminho = self._caminho(servidor, id_inventario)
+        with self._lock:
+            entrada = self._memoria.get(caminho)
+        if entrada is None:
+            try:
+                with open(caminho, encoding="utf-8") as f:
+                    entrada = json.load(f)
+            except (OSError, ValueError):
+                return None
+            with self._lock:
+                self._memoria[caminho] = entrada
+        if time.time() - entrada.get("criado_em", 0) > self.ttl:
+            return None
+        catalogo = entrada.get("catalogo") or {}
+        if assinatura is not None and catalogo.get("assinatura") != assinatura:
+            return None
+        return catalogo
+
+    def salvar(self, servidor, id_inventario, catalogo):
+        caminho = self._caminho(servidor, id_inventario)
+        entrada = {"criado_em": time.time(), "servidor": servidor, "id_inventario": id_inventario, "catalogo": catalogo}
+        with self._lock:
+            self._memoria[caminho] = entrada
+        if self.ttl <= 0:
+            return
+        try:
+            os.makedirs(self.diretorio, exist_ok=True)
+            temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temporario, "w", encoding="utf-8") as f:
+                json.dump(entrada, f, ensure_ascii=False)
+            os.replace(temporario, caminho)
+        except OSError:
+            pass
+
+    def ultimo_catalogo(self, servidor, id_inventario=None):
+        """
+        Catálogo mais recente em cache (memória ou disco) do servidor, de id_inventario ou de qualquer inventário,
+        ignorando o TTL: para a validação offline. None se não houver nenhum.
+        """
+        if id_inventario is not None:
+            caminhos = {self._caminho(servidor, id_inventario)}
+        else:
+            with self._lock:
+                caminhos = set(self._memoria)
+            caminhos.update(glob.glob(os.path.join(self.diretorio, "catalogo_*.json")))
+        recente = None
+        for caminho in caminhos:
+            with self._lock:
+                entrada = self._memoria.get(caminho)
+            if entrada is None:
+                try:
+                    with open(caminho, encoding="utf-8") as f:
+                        entrada = json.load(f)
+                except (OSError, ValueError):
+                    continue
+            if entrada.get("servidor") != servidor or not entrada.get("catalogo"):
+                continue
+            if recente is None or entrada.get("criado_em", 0) > recente.get("criado_em", 0):
+                recente = entrada
+        return recente["catalogo"] if recente else None
+
+    def catalogo_da_pagina(self, servidor, id_inventario, pagina):
+        """
+        Catálogo da página de edição: reaproveita o cache se o HTML dos selects de espécies não mudou; só em caso
+        de falta lê e normaliza as opções, monta e salva.
+        """
+        assinatura = pagina.assinatura_especies
+        catalogo = self.obter(servidor, id_inventario, assinatura)
+        if catalogo is None:
+            catalogo = montar_catalogo_especies(pagina.selects, assinatura)
+            self.salvar(servidor, id_inventario, catalogo)
+        return catalogo
+
+
+# Instância padrão, compartilhada por todas as execuções do mesmo processo
+cache_catalogos_padrao = CacheCatalogos()
+
+
+def hash_planilha(df):
+    """Hash do conteúdo do DataFrame (colunas e valores), usado para identificar a mesma planilha entre execuções."""
+    h = hashlib.sha1("\x1f".join(map(str, df.columns)).encode("utf-8"))
+    try:
+        h.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    except TypeError:
+        h.update(df.to_csv(index=False).encode("utf-8"))
+    return h.hexdigest()
+
+
+class JornalExecucao:
+    """
+    Jornal SQLite das execuções, por conta, inventário e planilha: guarda a fase atingida e o resultado de cada Nº,
+    para que uma execução interrompida (botão parar, queda do processo ou da rede) continue de onde parou.
+    """
+
+    # Situações de linha que não precisam ser reenviadas ao retomar
+    SITUACOES_CONCLUIDAS = ("incluida", "editada", "sem_alteracao", "ja_preenchida")
+
+    def __init__(self, caminho=None):
+        self.caminho = caminho or os.path.join(DIRETORIO_CACHE, "jornal.sqlite3")
+        self._conexao = None
+        self._lock = threading.Lock()
+
+    def _conectar(self):
+        if self._conexao is None:
+            os.makedirs(os.path.dirname(self.caminho) or ".", exist_ok=True)
+            conexao = sqlite3.connect(self.caminho, check_same_thread=False)
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.execute("PRAGMA synchronous=NORMAL")
+            conexao.execute(
+                "CREATE TABLE IF NOT EXISTS execucoes (chave TEXT PRIMARY KEY, conta TEXT, id_inventario TEXT, "
+                "hash_planilha TEXT, fase TEXT, atualizado_em REAL)"
+            )
+            conexao.execute(
+                "CREATE TABLE IF NOT EXISTS linhas (chave TEXT, numero INTEGER, situacao TEXT, detalhe TEXT, "
+                "atualizado_em REAL, PRIMARY KEY (chave, numero))"
+            )
+            conexao.execute(
+                "CREATE TABLE IF NOT EXISTS payloads (inventario TEXT, numero INTEGER, id_arvore TEXT, "
+                "hash_payload TEXT, atualizado_em REAL, PRIMARY KEY (inventario, numero))"
+            )
+            conexao.commit()
+            self._conexao = conexao
+        return self._conexao
+
+    def _executar(self, sql, parametros=()):
+        with self._lock:
+            conexao = self._conectar()
+            cursor = conexao.execute(sql, parametros)
+            linhas = cursor.fetchall()
+            conexao.commit()
+            return linhas
+
+    @staticmethod
+    def _hash_conta(conta):
+        return hashlib.sha1(str(conta).strip().lower().encode("utf-8")).hexdigest()
+
+    def _chave_inventario(self, conta, id_inventario):
+        return hashlib.sha1(f"{self._hash_conta(conta)}|{base_url}|{id_inventario}".encode("utf-8")).hexdigest()
+
+    def iniciar(self, conta, id_inventario, hash_df):
+        """
+        Abre (ou retoma) a execução. Retorna (chave, fase_anterior): fase_anterior é None para execução nova
+        (ou se a anterior terminou); caso contrário, a fase em que a execução anterior parou.
+        """
+        conta = self._hash_conta(conta)
+        chave = hashlib.sha1(f"{conta}|{base_url}|{id_inventario}|{hash_df}".encode("utf-8")).hexdigest()
+        linhas = self._executar("SELECT fase FROM execucoes WHERE chave = ?", (chave,))
+        fase_anterior = linhas[0][0] if linhas else None
+        if fase_anterior in (None, "concluida"):
+            self._executar("DELETE FROM linhas WHERE chave = ?", (chave,))
+            self._executar(
+                "INSERT OR REPLACE INTO execucoes VALUES (?, ?, ?, ?, ?, ?)",
+                (chave, conta, str(id_inventario), hash_df, "inicio", time.time()),
+            )
+            fase_anterior = None
+        return chave, fase_anterior
+
+    def marcar_fase(self, chave, fase):
+        self._executar("UPDATE execucoes SET fase = ?, atualizado_em = ? WHERE chave = ?", (fase, time.time(), chave))
+
+    def registrar_linha(self, chave, numero, situacao, detalhe=""):
+        self._executar(
+            "INSERT OR REPLACE INTO linhas VALUES (?, ?, ?, ?, ?)",
+            (chave, int(numero), situacao, str(detalhe or ""), time.time()),
+        )
+
+    def linhas_concluidas(self, chave):
+        marcadores = ", ".join("?" for _ in self.SITUACOES_CONCLUIDAS)
+        linhas = self._executar(
+            f"SELECT numero FROM linhas WHERE chave = ? AND situacao IN ({marcadores})",
+            (chave, *self.SITUACOES_CONCLUIDAS),
+        )
+        return {numero for (numero,) in linhas}
+
+    def registrar_payload(self, conta, id_inventario, numero, id_arvore, hash_conteudo):
+        """Guarda o hash do último payload aplicado ao Nº (id_arvore None: inclusão, id ainda desconhecido)."""
+        self._executar(
+            "INSERT OR REPLACE INTO payloads VALUES (?, ?, ?, ?, ?)",
+            (self._chave_inventario(conta, id_inventario), int(numero), id_arvore, hash_conteudo, time.time()),
+        )
+
+    def payloads_registrados(self, conta, id_inventario):
+        """{Nº: (id_arvore, hash do payload)} dos últimos payloads aplicados às árvores do inventário."""
+        linhas = self._executar(
+            "SELECT numero, id_arvore, hash_payload FROM payloads WHERE inventario = ?",
+            (self._chave_inventario(conta, id_inventario),),
+        )
+        return {numero: (id_arvore, hash_conteudo) for numero, id_arvore, hash_conteudo in linhas}
+
+    def descartar_payloads(self, conta, id_inventario):
+        """Esquece os payloads do inventário (todas as árvores foram excluídas)."""
+        self._executar("DELETE FROM payloads WHERE inventario = ?", (self._chave_inventario(conta, id_inventario),))
+
+
+# Instância padrão do jornal (o arquivo só é criado no primeiro uso)
+jornal_padrao = JornalExecucao()
+
+
+def _valores_equivalentes(a, b):
+    """Compara dois valores exibidos/enviados: numericamente se possível, senão pelo nome normalizado."""
+    a, b = str(a or "").strip(), str(b or "").strip()
+    try:
+        return abs(float(a.replace(",", ".")) - float(b.replace(",", "."))) < 0.005
+    except ValueError:
+        return normalizar_nome(a) == normalizar_nome(b)
+
+
+def arvore_alterada(payload, celulas, textos_selects, colunas=None):
+    """
+    Indica se a árvore existente (células da tabela) difere do payload que seria enviado.
+    textos_selects: {id_form: {value: texto}} para exibir selects pelo texto da opção.
+    colunas: id do formulário por coluna, de colunas_tabela_arvores (padrão: COLUNAS_TABELA_ARVORES).
+    Na dúvida (tabela com menos colunas que o esperado) considera alterada.
+    """
+    for pos, id_form in enumerate(colunas or COLUNAS_TABELA_ARVORES):
+        if id_form is None or id_form not in payload:
+            continue
+        if pos >= len(celulas):
+            return True
+        esperado = payload[id_form]
+        if id_form in textos_selects:
+            esperado = textos_selects[id_form].get(str(esperado), esperado)
+        if not _valores_equivalentes(esperado, celulas[pos]):
+            return True
+    return False
+
+
+# Campos de controle do payload, fora do hash do conteúdo de cada árvore
+CAMPOS_CONTROLE_PAYLOAD = ("action", "id_em_edicao", "origem")
+
+
+def hash_payload(payload):
+    """Hash do conteúdo enviado de uma árvore, inclusive os campos que a tabela do inventário não exibe."""
+    conteudo = {k: str(v) for k, v in payload.items() if k not in CAMPOS_CONTROLE_PAYLOAD}
+    return hashlib.sha1(json.dumps(conteudo, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def payload_ja_aplicado(registrado, id_arvore, hash_conteudo):
+    """
+    Indica se o payload registrado no jornal para o Nº ((id_arvore, hash), de JornalExecucao.payloads_registrados)
+    é o mesmo que seria enviado agora à árvore id_arvore. Sem registro, os campos que a tabela não exibe
+    (Motivação, Intenção, Área Pública...) não podem ser conferidos e a árvore é tratada como alterada.
+    """
+    if not registrado:
+        return False
+    id_registrado, hash_registrado = registrado
+    return hash_registrado == hash_conteudo and id_registrado in (None, id_arvore)
+
+
+def detectar_separador_csv(amostra):
+    """Separador de um CSV (";", "," ou tabulação) a partir do início do arquivo; padrão ";"."""
+    try:
+        return csv.Sniffer().sniff(amostra, delimiters=";,\t").delimiter
+    except csv.Error:
+        return ";" if amostra.count(";") >= amostra.count(",") else ","
+
+
+def ler_planilha(origem, nome=None):
+    """
+    Lê xlsx/xls/ods/csv (caminho ou bytes; nome define o formato quando origem são bytes) em um DataFrame bruto.
+    CSV: separador detectado uma vez no início do arquivo. xlsx/xls/ods: motor calamine se instalado, senão
+    openpyxl (somente leitura) / odfpy.
+    """
+    extensao = os.path.splitext(str(nome if nome is not None else origem))[1].lower()
+    if isinstance(origem, (bytes, bytearray)):
+        amostra = bytes(origem[:65536])
+        origem = io.BytesIO(origem)
+    elif extensao == ".csv":
+        with open(origem, "rb") as f:
+            amostra = f.read(65536)
+    if extensao == ".csv":
+        separador = detectar_separador_csv(amostra.decode("utf-8-sig", errors="ignore"))
+        return pd.read_csv(origem, encoding="utf-8-sig", sep=separador)
+    if extensao not in (".xlsx", ".xls", ".ods"):
+        raise ValueError("Formato não suportado. Use .xlsx, .csv ou .ods.")
+    if MOTOR_PLANILHA:
+        return pd.read_excel(origem, engine=MOTOR_PLANILHA)
+    return pd.read_excel(origem, engine="odf" if extensao == ".ods" else None)
+
+
+def preprocessar_df(df):
+    """Normaliza o DataFrame para o formato esperado (mesmo layout do Excel do inventário)."""
+    df = df.copy()
+    if len(df) > 0 and df.index[0] == 0:
+        # Remove a linha 2 do cabeçalho mesclado se for a segunda linha de cabeçalho
+        df = df.drop(index=0).reset_index(drop=True)
+    df = df.rename(columns={"Nome": "Nome Vulgar", "Unnamed: 2": "Nome Científico"})
+    df = df.rename(columns={
+        "DAP": "DAP 1",
+        "Unnamed: 6": "DAP 2",
+        "Unnamed: 7": "DAP 3",
+        "Unnamed: 8": "DAP 4",
+        "Unnamed: 9": "DAP 5",
+    })
+    for col in ["DAP 1", "DAP 2", "DAP 3", "DAP 4", "DAP 5"]:
+        if col in df.columns:
+            df[col] = df[col].fillna(0)
+    return df
+
+
+class PlanilhaEmBlocos:
+    """
+    Planilha grande lida em blocos de `tamanho_bloco` linhas (padrão TAMANHO_BLOCO_LEITURA), sem carregar o arquivo
+    inteiro em um DataFrame: CSV com read_csv(chunksize=...) e xlsx pela iteração somente leitura do openpyxl (ods/xls
+    são lidos inteiros e fatiados). Cada bloco passa por preprocessar_df (o cabeçalho mesclado da segunda linha só
+    existe no primeiro bloco). Pode ser passada a run_sisarv no lugar do DataFrame: o envio via requests começa no
+    primeiro bloco, enquanto os seguintes ainda são lidos.
+    """
+
+    def __init__(self, origem, nome=None, tamanho_bloco=None):
+        self.origem = origem
+        self.extensao = os.path.splitext(str(nome if nome is not None else origem))[1].lower()
+        self.tamanho_bloco = max(1, int(tamanho_bloco or TAMANHO_BLOCO_LEITURA))
+
+    def _abrir(self):
+        if isinstance(self.origem, (bytes, bytearray)):
+            return io.BytesIO(self.origem)
+        return open(self.origem, "rb")
+
+    def _blocos_brutos(self):
+        if self.extensao == ".csv":
+            with self._abrir() as f:
+                separador = detectar_separador_csv(f.read(65536).decode("utf-8-sig", errors="ignore"))
+                f.seek(0)
+                yield from pd.read_csv(f, encoding="utf-8-sig", sep=separador, chunksize=self.tamanho_bloco)
+            return
+        if self.extensao != ".xlsx" or load_workbook is None:
+            df = ler_planilha(self.origem, "planilha" + self.extensao)
+            for inicio in range(0, len(df), self.tamanho_bloco):
+                yield df.iloc[inicio:inicio + self.tamanho_bloco]
+            return
+        with self._abrir() as f:
+            livro = load_workbook(f, read_only=True, data_only=True)
+            try:
+                linhas = livro.worksheets[0].iter_rows(values_only=True)
+                cabecalho = self._cabecalho(next(linhas, ()))
+                bloco, inicio = [], 0
+                for linha in linhas:
+                    if all(v is None for v in linha):
+                        continue
+                    bloco.append(tuple(linha[:len(cabecalho)]) + (None,) * (len(cabecalho) - len(linha)))
+                    if len(bloco) >= self.tamanho_bloco:
+                        yield pd.DataFrame(bloco, columns=cabecalho, index=range(inicio, inicio + len(bloco)))
+                        inicio += len(bloco)
+                        bloco = []
+                if bloco:
+                    yield pd.DataFrame(bloco, columns=cabecalho, index=range(inicio, inicio + len(bloco)))
+            finally:
+                livro.close()
+
+    @staticmethod
+    def _cabecalho(valores):
+        """Nomes das colunas como o pandas os gera (vazias -> "Unnamed: i", repetidas -> "X.1")."""
+        nomes, vistos = [], {}
+        for i, valor in enumerate(valores):
+            nome = f"Unnamed: {i}" if valor is None or str(valor).strip() == "" else valor
+            if nome in vistos:
+                vistos[nome] += 1
+                nome = f"{nome}.{vistos[nome]}"
+            else:
+                vistos[nome] = 0
+            nomes.append(nome)
+        return nomes
+
+    def __iter__(self):
+        for bloco in self._blocos_brutos():
+            bloco = preprocessar_df(bloco)
+            if not bloco.empty:
+                yield bloco
+
+    def total_estimado(self):
+        """Número aproximado de linhas de dados (para a barra de progresso), sem interpretar o arquivo."""
+        if self.extensao == ".csv":
+            with self._abrir() as f:
+                linhas = sum(parte.count(b"\n") for parte in iter(lambda: f.read(1 << 20), b""))
+            return max(0, linhas - 2)
+        if self.extensao == ".xlsx" and load_workbook is not None:
+            with self._abrir() as f:
+                livro = load_workbook(f, read_only=True)
+                try:
+                    max_row = livro.worksheets[0].max_row
+                finally:
+                    livro.close()
+            if max_row:
+                return max(0, max_row - 2)
+        return sum(len(bloco) for bloco in self)
+
+    def numeros(self):
+        """Nº de todas as linhas (uma passada lendo a planilha)."""
+        return {n for bloco in self for n in numeros_da_planilha(bloco)}
+
+    def hash(self):
+        """Hash do arquivo (identifica a mesma planilha entre execuções no jornal)."""
+        h = hashlib.sha1()
+        with self._abrir() as f:
+            for parte in iter(lambda: f.read(1 << 20), b""):
+                h.update(parte)
+        return h.hexdigest()
+
+    def carregar(self):
+        """A planilha inteira em um único DataFrame (para os caminhos que não trabalham em blocos)."""
+        blocos = list(self)
+        return pd.concat(blocos, ignore_index=True) if blocos else pd.DataFrame()
+
+
+class TelemetriaExecucao:
+    """
+    Telemetria de uma execução: um span por requisição HTTP (ação, fase, duração, bytes e status), agregado em
+    histogramas por fase e ação, tempo de parede por fase e ritmo das linhas (linhas/s e tempo restante).
+    Exporta um relatório JSON e um arquivo texto no formato do Prometheus (textfile collector). Seguro entre threads.
+    """
+
+    # Limites (segundos) dos buckets do histograma de duração das requisições
+    LIMITES_HISTOGRAMA = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    def __init__(self, janela_ritmo=50, **metadados):
+        self.metadados = dict(metadados)
+        self.inicio = time.time()
+        self.fim = None
+        self.fase = "inicio"
+        self._inicio_fase = time.perf_counter()
+        self.duracao_fases = {}
+        self._spans = {}  # (fase, acao) -> {"duracoes": [...], "bytes": int, "status": {status: n}}
+        self._progresso = deque(maxlen=max(2, janela_ritmo))
+        self.linhas_atual = 0
+        self.linhas_total = 0
+        self._lock = threading.Lock()
+
+    def iniciar_fase(self, fase):
+        """Encerra a fase corrente (somando seu tempo de parede) e passa a atribuir os spans à nova fase."""
+        with self._lock:
+            agora = time.perf_counter()
+            self.duracao_fases[self.fase] = self.duracao_fases.get(self.fase, 0.0) + agora - self._inicio_fase
+            self.fase, self._inicio_fase = fase, agora
+            # O ritmo (e o tempo restante) é sempre o da fase corrente
+            self._progresso.clear()
+
+    def encerrar(self):
+        if self.fim is None:
+            self.iniciar_fase("fim")
+            self.fim = time.time()
+
+    def registrar_requisicao(self, acao, duracao, status, num_bytes):
+        with self._lock:
+            span = self._spans.setdefault((self.fase, acao), {"duracoes": [], "bytes": 0, "status": {}})
+            span["duracoes"].append(duracao)
+            span["bytes"] += num_bytes
+            span["status"][status] = span["status"].get(status, 0) + 1
+
+    def registrar_progresso(self, atual, total):
+        with self._lock:
+            self.linhas_atual, self.linhas_total = atual, total
+            self._progresso.append((time.perf_counter(), atual))
+
+    def ritmo(self):
+        """(linhas por segundo na janela recente, segundos restantes estimados ou None)."""
+        with self._lock:
+            if len(self._progresso) < 2:
+                return 0.0, None
+            (t0, a0), (t1, a1) = self._progresso[0], self._progresso[-1]
+            restantes = self.linhas_total - self.linhas_atual
+        taxa = (a1 - a0) / (t1 - t0) if t1 > t0 else 0.0
+        return taxa, (restantes / taxa if taxa > 0 else None)
+
+    def relatorio(self):
+        with self._lock:
+            spans = {chave: dict(v, duracoes=sorted(v["duracoes"])) for chave, v in self._spans.items()}
+            fases = dict(self.duracao_fases)
+            if self.fim is None:
+                fases[self.fase] = fases.get(self.fase, 0.0) + time.perf_counter() - self._inicio_fase
+        fases.pop("fim", None)
+        taxa, restante = self.ritmo()
+        duracao = (self.fim or time.time()) - self.inicio
+        acoes = []
+        for (fase, acao), span in sorted(spans.items(), key=lambda item: -sum(item[1]["duracoes"])):
+            d = np.array(span["duracoes"])
+            acoes.append({
+                "fase": fase,
+                "acao": acao,
+                "requisicoes": len(d),
+                "segundos_total": round(float(d.sum()), 3),
+                "p50_ms": round(float(np.percentile(d, 50)) * 1000, 1),
+                "p95_ms": round(float(np.percentile(d, 95)) * 1000, 1),
+                "max_ms": round(float(d.max()) * 1000, 1),
+                "bytes": span["bytes"],
+                "erros": sum(n for st, n in span["status"].items() if not st or st >= 400),
+                "status": {str(st): n for st, n in sorted(span["status"].items())},
+            })
+        return {
+            "metadados": self.metadados,
+            "inicio": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.inicio)),
+            "duracao_segundos": round(duracao, 3),
+            "fases": {fase: round(seg, 3) for fase, seg in fases.items()},
+            "linhas": {
+                "processadas": self.linhas_atual,
+                "total": self.linhas_total,
+                "por_segundo": round(self.linhas_atual / duracao, 3) if duracao > 0 else 0.0,
+                "por_segundo_recente": round(taxa, 3),
+                "segundos_restantes": round(restante, 1) if restante is not None else None,
+            },
+            "acoes": acoes,
+        }
+
+    def prometheus(self):
+        """Métricas no formato texto do Prometheus."""
+        with self._lock:
+            spans = {chave: dict(v, duracoes=list(v["duracoes"])) for chave, v in self._spans.items()}
+        rel = self.relatorio()
+        linhas = [
+            "# HELP sisarv_requisicao_segundos Duração das requisições HTTP ao SisArv.",
+            "# TYPE sisarv_requisicao_segundos histogram",
+        ]
+        for (fase, acao), span in sorted(spans.items()):
+            rotulos = f'fase="{fase}",acao="{acao}"'
+            for limite in self.LIMITES_HISTOGRAMA:
+                linhas.append(f'sisarv_requisicao_segundos_bucket{{{rotulos},le="{limite}"}} '
+                              f"{sum(1 for d in span['duracoes'] if d <= limite)}")
+            linhas.append(f'sisarv_requisicao_segundos_bucket{{{rotulos},le="+Inf"}} {len(span["duracoes"])}')
+            linhas.append(f"sisarv_requisicao_segundos_sum{{{rotulos}}} {sum(span['duracoes']):.6f}")
+            linhas.append(f"sisarv_requisicao_segundos_count{{{rotulos}}} {len(span['duracoes'])}")
+        linhas += ["# HELP sisarv_requisicao_bytes_total Bytes recebidos do SisArv.", "# TYPE sisarv_requisicao_bytes_total counter"]
+        linhas += [f'sisarv_requisicao_bytes_total{{fase="{f}",acao="{a}"}} {span["bytes"]}' for (f, a), span in sorted(spans.items())]
+        linhas += ["# HELP sisarv_requisicao_erros_total Requisições com falha ou status >= 400.", "# TYPE sisarv_requisicao_erros_total counter"]
+        linhas += [f'sisarv_requisicao_erros_total{{fase="{a["fase"]}",acao="{a["acao"]}"}} {a["erros"]}' for a in rel["acoes"]]
+        linhas += ["# HELP sisarv_fase_segundos Tempo de parede por fase da execução.", "# TYPE sisarv_fase_segundos gauge"]
+        linhas += [f'sisarv_fase_segundos{{fase="{fase}"}} {seg}' for fase, seg in rel["fases"].items()]
+        linhas += [
+            "# TYPE sisarv_linhas_processadas gauge", f"sisarv_linhas_processadas {rel['linhas']['processadas']}",
+            "# TYPE sisarv_linhas_por_segundo gauge", f"sisarv_linhas_por_segundo {rel['linhas']['por_segundo']}",
+            "# TYPE sisarv_execucao_inicio_timestamp_seconds gauge", f"sisarv_execucao_inicio_timestamp_seconds {self.inicio:.0f}",
+            "# TYPE sisarv_execucao_duracao_segundos gauge", f"sisarv_execucao_duracao_segundos {rel['duracao_segundos']}",
+        ]
+        return "\n".join(linhas) + "\n"
+
+    def exportar(self, diretorio=None):
+        """
+        Grava relatorio_<data>_<inventário>.json e sisarv.prom (sobrescrito a cada execução) no diretório e apaga os
+        relatórios além dos MAX_RELATORIOS_TELEMETRIA mais recentes.
+        """
+        diretorio = diretorio or DIRETORIO_TELEMETRIA
+        sufixo = self.metadados.get("id_inventario") or "sem-inventario"
+        arquivos = {
+            f"relatorio_{time.strftime('%Y%m%d-%H%M%S', time.localtime(self.inicio))}_{sufixo}.json":
+                json.dumps(self.relatorio(), ensure_ascii=False, indent=2),
+            "sisarv.prom": self.prometheus(),
+        }
+        try:
+            os.makedirs(diretorio, exist_ok=True)
+            for nome, conteudo in arquivos.items():
+                caminho = os.path.join(diretorio, nome)
+                temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(temporario, "w", encoding="utf-8") as f:
+                    f.write(conteudo)
+                os.replace(temporario, caminho)
+            # Nome com a data: a ordem alfabética é a cronológica
+            relatorios = sorted(glob.glob(os.path.join(diretorio, "relatorio_*.json")))
+            for antigo in relatorios[:-max(1, MAX_RELATORIOS_TELEMETRIA)]:
+                os.remove(antigo)
+        except OSError:
+            pass
+
+    def resumo(self):
+        rel = self.relatorio()
+        fases = ", ".join(f"{fase} {seg:.1f}s" for fase, seg in rel["fases"].items() if seg >= 0.05)
+        texto = f"Telemetria: {rel['linhas']['por_segundo']:.2f} linha(s)/s; tempo por fase: {fases or '-'}."
+        if rel["acoes"]:
+            a = rel["acoes"][0]
+            texto += (f" Ação mais custosa: {a['acao']} ({a['fase']}), {a['requisicoes']} req., "
+                      f"p50 {a['p50_ms']:.0f} ms, p95 {a['p95_ms']:.0f} ms.")
+        return texto
+
+
+def acao_requisicao(metodo, kwargs):
+    """Nome da ação SisArv de uma requisição (para telemetria): action do POST, "(redirect)" ou o método."""
+    data = kwargs.get("data")
+    if metodo.upper() != "POST":
+        return metodo.upper()
+    acao = data.get("action") if isinstance(data, dict) else None
+    return acao or "(redirect)"
+
+
+class CookieJarSincronizado(RequestsCookieJar):
+    """Cookie jar compartilhado entre as sessões dos workers; leituras iteram sobre uma cópia feita sob o lock."""
+
+    def __iter__(self):
+        with self._cookies_lock:
+            return iter(list(super().__iter__()))
+
+    def __getstate__(self):
+        with self._cookies_lock:
+            return super().__getstate__()
+
+
+class SessaoSisArv(requests.Session):
+    """
+    Sessão com timeout padrão e contagem de requisições/bytes recebidos. Se o transporte tiver uma função de login
+    configurada e a resposta for a tela de login (sessão expirada no servidor), reautentica e repete a requisição.
+    """
+
+    def __init__(self, timeout=None, transporte=None):
+        super().__init__()
+        self.timeout = timeout or TIMEOUT_REQUISICAO
+        self.transporte = transporte
+        self.num_requisicoes = 0
+        self.bytes_recebidos = 0
+
+    def _enviar(self, method, url, **kwargs):
+        telemetria = self.transporte.telemetria if self.transporte is not None else None
+        inicio = time.perf_counter()
+        try:
+            resp = super().request(method, url, **kwargs)
+        except requests.exceptions.RequestException:
+            if telemetria is not None:
+                telemetria.registrar_requisicao(acao_requisicao(method, kwargs), time.perf_counter() - inicio, 0, 0)
+            raise
+        self.num_requisicoes += 1
+        self.bytes_recebidos += len(resp.content or b"")
+        if telemetria is not None:
+            telemetria.registrar_requisicao(
+                acao_requisicao(method, kwargs), time.perf_counter() - inicio, resp.status_code, len(resp.content or b""),
+            )
+        return resp
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        transporte = self.transporte
+        geracao = transporte.geracao_login if transporte is not None else 0
+        resp = self._enviar(method, url, **kwargs)
+        if transporte is not None and transporte.sessao_expirada(resp):
+            transporte.renovar_login(geracao)
+            resp = self._enviar(method, url, **kwargs)
+        return resp
+
+
+class TransporteSisArv:
+    """
+    Camada de transporte HTTP do SisArv: uma sessão por thread (worker), todas sobre o mesmo cookie jar
+    sincronizado (a autenticação feita em uma vale para todas), com pool de conexões do tamanho do número de
+    workers, keep-alive, compressão e timeout padrão. Registra estatísticas de reaproveitamento de conexões.
+    """
+
+    def __init__(self, num_workers=1, headers=None, timeout=None, telemetria=None):
+        self.num_workers = max(1, int(num_workers))
+        self.telemetria = telemetria
+        self.headers = dict(HEADERS_PADRAO if headers is None else headers)
+        self.timeout = timeout or TIMEOUT_REQUISICAO
+        self.cookies = CookieJarSincronizado()
+        self._local = threading.local()
+        self._sessoes = []
+        self._lock = threading.Lock()
+        self._funcao_login = None
+        self._lock_login = threading.Lock()
+        self.geracao_login = 0
+        self.inventario_em_edicao = None
+
+    def configurar_login(self, funcao_login):
+        """funcao_login(sessao) refaz a autenticação quando o servidor expira a sessão no meio da execução."""
+        self._funcao_login = funcao_login
+
+    def sessao_expirada(self, resp):
+        """True se a resposta for a tela de login fora do próprio fluxo de login."""
+        if self._funcao_login is None or getattr(self._local, "autenticando", False):
+            return False
+        return RE_FORMULARIO_LOGIN.search(resp.text) is not None
+
+    def renovar_login(self, geracao):
+        """Reautentica uma única vez por expiração, mesmo que vários workers a detectem ao mesmo tempo."""
+        with self._lock_login:
+            if self.geracao_login != geracao:
+                return
+            self._local.autenticando = True
+            try:
+                self.cookies.clear()
+                self._funcao_login(self.sessao())
+            finally:
+                self._local.autenticando = False
+            self.geracao_login += 1
+
+    def sessao(self):
+        """Sessão da thread atual (criada na primeira chamada)."""
+        s = getattr(self._local, "sessao", None)
+        if s is None:
+            s = SessaoSisArv(self.timeout, self)
+            s.headers.update(self.headers)
+            s.cookies = self.cookies
+            adaptador = HTTPAdapter(pool_connections=2, pool_maxsize=self.num_workers)
+            s.mount("https://", adaptador)
+            s.mount("http://", adaptador)
+            self._local.sessao = s
+            with self._lock:
+                self._sessoes.append(s)
+        return s
+
+    def estatisticas(self):
+        """Requisições feitas, conexões TCP abertas, taxa de reaproveitamento de conexões e bytes recebidos."""
+        with self._lock:
+            sessoes = list(self._sessoes)
+        requisicoes = sum(s.num_requisicoes for s in sessoes)
+        conexoes = 0
+        for s in sessoes:
+            for adaptador in {id(a): a for a in s.adapters.values()}.values():
+                pools = adaptador.poolmanager.pools
+                for chave in list(pools.keys()):
+                    pool = pools.get(chave)
+                    if pool is not None:
+                        conexoes += pool.num_connections
+        return {
+            "sessoes": len(sessoes),
+            "requisicoes": requisicoes,
+            "conexoes_abertas": conexoes,
+            "reaproveitamento": (1 - conexoes / requisicoes) if requisicoes else 0.0,
+            "bytes_recebidos": sum(s.bytes_recebidos for s in sessoes),
+        }
+
+    def resumo(self):
+        e = self.estatisticas()
+        return (
+            f"Transporte: {e['requisicoes']} requisição(ões) em {e['sessoes']} sessão(ões), "
+            f"{e['conexoes_abertas']} conexão(ões) aberta(s) ({e['reaproveitamento']:.0%} de reaproveitamento), "
+            f"{e['bytes_recebidos'] / 1024:.0f} KiB recebidos."
+        )
+
+
+class CacheSessoes:
+    """
+    Cookies das sessões autenticadas em disco (DIRETORIO_CACHE), por servidor, conta e escopo, com validade
+    TTL_CACHE_SESSOES. Cada arquivo guarda, junto dos cookies, um verificador scrypt da senha com sal próprio
+    (PARAMETROS_SCRYPT_SESSOES): só a senha do login que gerou a sessão a reaproveita; qualquer outra refaz o login.
+    A sessão carregada ainda é validada no servidor pela abertura da consulta.
+    """
+
+    def __init__(self, diretorio=None, ttl=None):
+        self.diretorio = diretorio or DIRETORIO_CACHE
+        self.ttl = TTL_CACHE_SESSOES if ttl is None else ttl
+        self._lock = threading.Lock()
+        self._legados_removidos = False
+
+    def _caminho(self, formusuario, escopo=None):
+        chave = hashlib.sha256(f"{base_url}|{str(formusuario).strip().lower()}|{escopo or ''}".encode("utf-8")).hexdigest()
+        return os.path.join(self.diretorio, f"sessao_conta_{chave}.json")
+
+    def _remover_legados(self):
+        """Apaga os arquivos do formato anterior, cujo nome era um hash que incluía a senha."""
+        for caminho in glob.glob(os.path.join(self.diretorio, "sessao_" + "[0-9a-f]" * 64 + ".json")):
+            try:
+                os.remove(caminho)
+            except OSError:
+                pass
+
+    @staticmethod
+    def _verificador(formsenha, sal):
+        return hashlib.scrypt(str(formsenha).encode("utf-8"), salt=sal, **PARAMETROS_SCRYPT_SESSOES)
+
+    def carregar(self, formusuario, formsenha, cookies, escopo=None):
+        """Copia os cookies em cache para o jar; retorna False se não houver sessão dentro do TTL."""
+        if self.ttl <= 0:
+            return False
+        try:
+            with open(self._caminho(formusuario, escopo), encoding="utf-8") as f:
+                entrada = json.load(f)
+            sal, verificador = bytes.fromhex(entrada["sal"]), bytes.fromhex(entrada["verificador"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+        if time.time() - entrada.get("criado_em", 0) > self.ttl or not entrada.get("cookies"):
+            return False
+        if not hmac.compare_digest(verificador, self._verificador(formsenha, sal)):
+            return False
+        for c in entrada["cookies"]:
+            cookies.set(c["nome"], c["valor"], domain=c.get("dominio") or "", path=c.get("caminho") or "/")
+        return True
+
+    def salvar(self, formusuario, formsenha, cookies, escopo=None):
+        if self.ttl <= 0:
+            return
+        caminho = self._caminho(formusuario, escopo)
+        sal = os.urandom(16)
+        entrada = {
+            "criado_em": time.time(),
+            "sal": sal.hex(),
+            "verificador": self._verificador(formsenha, sal).hex(),
+            "cookies": [{"nome": c.name, "valor": c.value, "dominio": c.domain, "caminho": c.path} for c in cookies],
+        }
+        with self._lock:
+            if not self._legados_removidos:
+                self._legados_removidos = True
+                self._remover_legados()
+            try:
+                os.makedirs(self.diretorio, exist_ok=True)
+                temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(os.open(temporario, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w", encoding="utf-8") as f:
+                    json.dump(entrada, f)
+                os.replace(temporario, caminho)
+            except OSError:
+                pass
+
+    def descartar(self, formusuario, formsenha=None, escopo=None):
+        try:
+            os.remove(self._caminho(formusuario, escopo))
+        except OSError:
+            pass
+
+
+# Instância padrão do cache de sessões
+cache_sessoes_padrao = CacheSessoes()
+
+
+class AgendadorRequisicoes:
+    """
+    Ponto central das requisições HTTP ao SisArv.
+    - Limita as requisições simultâneas a um limite ajustado por AIMD: +1/limite a cada resposta boa,
+      metade do limite (no máximo uma vez por LATENCIA_ALVO) a cada erro transitório ou resposta lenta.
+    - Repete falhas transitórias com espera exponencial aleatória (full jitter), respeitando Retry-After.
+    - Antes de repetir um POST não idempotente, chama ja_aplicada(): se a operação já tiver surtido efeito
+      no servidor (ex.: a árvore já aparece na lista), não repete, evitando duplicatas.
+    Seguro para uso entre threads.
+    """
+
+    def __init__(self, limite_inicial=1, limite_maximo=None, log=None):
+        self.limite_maximo = max(1, int(limite_maximo or limite_inicial))
+        self.limite = float(min(max(1, limite_inicial), self.limite_maximo))
+        self.log = log
+        self._em_andamento = 0
+        self._ultima_reducao = 0.0
+        self._condicao = threading.Condition()
+        self.repeticoes = 0
+
+    def _adquirir(self):
+        with self._condicao:
+            while self._em_andamento >= int(self.limite):
+                self._condicao.wait()
+            self._em_andamento += 1
+
+    def _liberar(self, sobrecarga):
+        with self._condicao:
+            self._em_andamento -= 1
+            agora = time.monotonic()
+            if sobrecarga:
+                if agora - self._ultima_reducao >= LATENCIA_ALVO:
+                    self.limite = max(1.0, self.limite / 2)
+                    self._ultima_reducao = agora
+            else:
+                self.limite = min(float(self.limite_maximo), self.limite + 1.0 / self.limite)
+            self._condicao.notify_all()
+
+    def _espera(self, tentativa, resp):
+        retry_after = resp.headers.get("Retry-After") if resp is not None else None
+        if retry_after and retry_after.strip().isdigit():
+            return min(ESPERA_MAXIMA_REPETICAO, float(retry_after))
+        return random.uniform(0, min(ESPERA_MAXIMA_REPETICAO, ESPERA_BASE_REPETICAO * 2 ** tentativa))
+
+    def requisitar(self, session, metodo, url, ja_aplicada=None, **kwargs):
+        """
+        Executa session.request(metodo, url, **kwargs) com controle de concorrência e repetição.
+        Retorna a última resposta (mesmo não-2xx), ou None se ja_aplicada() confirmar que não era preciso repetir.
+        Erros de conexão/timeout persistentes após TENTATIVAS_REQUISICAO são propagados.
+        """
+        for tentativa in range(TENTATIVAS_REQUISICAO):
+            if tentativa > 0 and ja_aplicada is not None and ja_aplicada():
+                return None
+            self._adquirir()
+            inicio = time.monotonic()
+            resp, erro = None, None
+            try:
+                resp = session.request(metodo, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                erro = e
+            finally:
+                transitoria = erro is not None or (resp is not None and resp.status_code in STATUS_TRANSITORIOS)
+                self._liberar(transitoria or time.monotonic() - inicio > LATENCIA_ALVO)
+            if not transitoria:
+                return resp
+            if tentativa == TENTATIVAS_REQUISICAO - 1:
+                if erro is not None:
+                    raise erro
+                return resp
+            espera = self._espera(tentativa, resp)
+            self.repeticoes += 1
+            if self.log:
+                motivo = erro if erro is not None else f"HTTP {resp.status_code}"
+                acao = (kwargs.get("data") or {}).get("action") or url
+                self.log(f"{acao}: falha transitória ({motivo}); nova tentativa em {espera:.1f}s.")
+            time.sleep(espera)
+        return resp
+
+    def post(self, session, data, ja_aplicada=None, **kwargs):
+        """POST em index.php (ver requisitar)."""
+        return self.requisitar(session, "POST", f"{base_url}/index.php", ja_aplicada=ja_aplicada, data=data, **kwargs)
+
+
+# Agendador usado quando nenhuma execução informa o seu (apenas repetições, sem limite prático de concorrência)
+agendador_padrao = AgendadorRequisicoes(limite_inicial=CONCORRENCIA_MAXIMA * 4)
+
+
+# O servidor pode responder com uma página que redireciona via POST (JavaScript).
+def seguir_redirect_post(html, session, max_vezes=5, agendador=None):
+    for _ in range(max_vezes):
+        if "document.redir.submit()" not in html and len(html) > 500:
+            return html
+        resp = (agendador or agendador_padrao).post(session, {})
+        resp.raise_for_status()
+        html = resp.text
+    return html
+
+
+def autenticar(session, formusuario, formsenha, agendador=None):
+    """Faz o login (página de login, CSRF, autenticação e redirects) e retorna o HTML da consulta de inventários."""
+    agendador = agendador or agendador_padrao
+    agendador.requisitar(session, "GET", f"{base_url}/")
+    resp_login_page = agendador.post(session, {"action": "AbreTelaLogin"})
+    resp_login_page.raise_for_status()
+    csrf_key = analisar_pagina(resp_login_page.text).csrf_key
+
+    response = agendador.post(
+        session,
+        {
+            "action": "AutenticaUsuario",
+            "csrf_key": csrf_key,
+            "formusuario": formusuario,
+            "formsenha": formsenha,
+        },
+    )
+    response.raise_for_status()
+    seguir_redirect_post(response.text, session, agendador=agendador)
+    return abrir_consulta_inventarios(session, agendador=agendador)
+
+
+def abrir_consulta_inventarios(session, agendador=None):
+    """Abre a tela de consulta de inventários e retorna o HTML, já seguindo os redirects."""
+    response = (agendador or agendador_padrao).post(session, {"action": "AbreTelaConsultaInventarioBotanico"})
+    response.raise_for_status()
+    return seguir_redirect_post(response.text, session, agendador=agendador)
+
+
+def iniciar_sessao(transporte, formusuario, formsenha, agendador=None, cache_sessoes=None, escopo=None, log=None):
+    """
+    Autentica o transporte e retorna o HTML da consulta de inventários. Com cache_sessoes, tenta antes os cookies
+    da última sessão (validados pela própria abertura da consulta) e só refaz o login se ela tiver expirado.
+    Configura ainda o transporte para reautenticar sozinho (e reabrir transporte.inventario_em_edicao) se o
+    servidor expirar a sessão no meio da execução.
+    """
+    session = transporte.sessao()
+
+    def login(s, agendador_login=None):
+        html = autenticar(s, formusuario, formsenha, agendador=agendador_login)
+        if cache_sessoes is not None:
+            cache_sessoes.salvar(formusuario, formsenha, transporte.cookies, escopo)
+        return html
+
+    def relogin(s):
+        # Roda dentro de uma requisição que já ocupa uma vaga do agendador da execução: usa o agendador padrão
+        if log:
+            log("Sessão expirada no servidor; autenticando novamente...")
+        login(s)
+        if transporte.inventario_em_edicao is not None:
+            abrir_tela_edicao(s, transporte.inventario_em_edicao)
+
+    html = None
+    if cache_sessoes is not None and cache_sessoes.carregar(formusuario, formsenha, transporte.cookies, escopo):
+        html = abrir_consulta_inventarios(session, agendador=agendador)
+        if RE_FORMULARIO_LOGIN.search(html) or not analisar_pagina(html).ids_inventario:
+            transporte.cookies.clear()
+            html = None
+        elif log:
+            log("Sessão anterior reaproveitada (login dispensado).")
+    if html is None:
+        html = login(session, agendador)
+    transporte.configurar_login(relogin)
+    return html
+
+
+def listar_inventarios(formusuario, formsenha, cache_sessoes=None):
+    """Ids (na ordem da consulta) de todos os inventários que a conta pode editar."""
+    if cache_sessoes is None and USAR_CACHE_SESSOES:
+        cache_sessoes = cache_sessoes_padrao
+    html = iniciar_sessao(TransporteSisArv(1), formusuario, formsenha, cache_sessoes=cache_sessoes or None)
+    return analisar_pagina(html).ids_inventario
+
+
+def abrir_tela_edicao(session, id_inventario, agendador=None):
+    """Abre (ou relê) a tela de edição do inventário e retorna o HTML, já seguindo os redirects."""
+    response = (agendador or agendador_padrao).post(
+        session,
+        {
+            "action": "AbreTelaCadastroInventarioBotanico",
+            "id_inventario_botanico": id_inventario,
+            "origem": "consulta",
+        },
+    )
+    response.raise_for_status()
+    return seguir_redirect_post(response.text, session, agendador=agendador)
+
+
+def excluir_arvores(session, id_inventario, ids_arvores, num_workers=4, agendador=None):
+    """
+    Exclui as árvores informadas do inventário em paralelo. Retorna [(id, erro)] das que falharam.
+    session pode ser um TransporteSisArv (cada worker usa a própria sessão) ou uma sessão compartilhada.
+    """
+    return excluir_em_lote(
+        session, id_inventario, ids_arvores, num_workers=num_workers, agendador=agendador, verificar=False,
+    ).falhas
+
+
+@dataclass
+class ResultadoExclusao:
+    """Resultado de excluir_em_lote."""
+    excluidas: int = 0
+    falhas: list = field(default_factory=list)  # [(id, erro)] que falharam ou continuam na lista
+    interrompida: bool = False
+    pagina: "PaginaSisArv | None" = None        # página de edição lida na verificação final
+
+
+def excluir_em_lote(session, id_inventario, ids_arvores, num_workers=None, agendador=None, progress_callback=None,
+                    should_stop=None, verificar=True, tentativas=None, log=None):
+    """
+    Exclui as árvores informadas com até num_workers (padrão NUM_WORKERS_EXCLUSAO) exclusões simultâneas; o
+    agendador (AIMD, repetições de falhas transitórias) decide quantas ficam ativas de fato.
+    progress_callback(atual, total) a cada exclusão concluída; should_stop() é consultado antes de cada exclusão
+    (as que já estão em andamento terminam). Com verificar, relê a página de edição ao final e reexclui, até
+    `tentativas` vezes (padrão TENTATIVAS_EXCLUSAO), as árvores que continuam na lista.
+    session pode ser um TransporteSisArv (cada worker usa a própria sessão) ou uma sessão compartilhada.
+    Retorna ResultadoExclusao.
+    """
+    agendador = agendador or agendador_padrao
+    obter_sessao = session.sessao if isinstance(session, TransporteSisArv) else (lambda: session)
+    num_workers = max(1, int(num_workers or NUM_WORKERS_EXCLUSAO))
+    tentativas = TENTATIVAS_EXCLUSAO if tentativas is None else tentativas
+    resultado = ResultadoExclusao()
+    total = len(ids_arvores)
+    erros = {}
+
+    def _excluir_uma(id_esp):
+        try:
+            resp = agendador.post(
+                obter_sessao(),
+                {
+                    "action": "ExcluiArvoreInventarioBotanico",
+                    "id_inventario_botanico_especie": id_esp,
+                    "origem": "consulta",
+                    "id_inventario_botanico": id_inventario,
+                },
+            )
+            resp.raise_for_status()
+            return None
+        except Exception as e:
+            return e
+
+    def _rodada(ids, executor):
+        pendentes = {}
+
+        def tratar(prontas):
+            for fut in prontas:
+                id_esp = pendentes.pop(fut)
+                erro = fut.result()
+                if erro is None:
+                    erros.pop(id_esp, None)
+                    resultado.excluidas += 1
+                else:
+                    erros[id_esp] = erro
+                if progress_callback:
+                    progress_callback(min(resultado.excluidas + len(erros), total), total)
+
+        for id_esp in ids:
+            if should_stop is not None and should_stop():
+                resultado.interrompida = True
+                break
+            while len(pendentes) >= num_workers:
+                prontas, _ = esperar_futures(list(pendentes), return_when=FIRST_COMPLETED)
+                tratar(prontas)
+            pendentes[executor.submit(_excluir_uma, id_esp)] = id_esp
+        while pendentes:
+            prontas, _ = esperar_futures(list(pendentes), return_when=FIRST_COMPLETED)
+            tratar(prontas)
+
+    if total:
+        with ThreadPoolExecutor(max_workers=min(num_workers, total)) as executor:
+            restantes = list(ids_arvores)
+            for tentativa in range(tentativas + 1):
+                _rodada(restantes, executor)
+                if resultado.interrompida or not verificar:
+                    break
+                resultado.pagina = analisar_pagina(abrir_tela_edicao(obter_sessao(), id_inventario, agendador=agendador))
+                presentes = set(resultado.pagina.ids_arvores)
+                restantes = [id_esp for id_esp in ids_arvores if id_esp in presentes]
+                for id_esp in list(erros):
+                    if id_esp not in presentes:
+                        # A exclusão falhou na resposta, mas a árvore saiu da lista
+                        del erros[id_esp]
+                        resultado.excluidas += 1
+                if not restantes or tentativa == tentativas:
+                    break
+                resultado.excluidas -= sum(1 for id_esp in restantes if id_esp not in erros)
+                if log:
+                    log(f"Verificação: {len(restantes)} árvore(s) ainda na lista; excluindo novamente...")
+            if verificar and not resultado.interrompida:
+                for id_esp in restantes:
+                    erros.setdefault(id_esp, "continua na lista do inventário após a exclusão")
+    resultado.falhas = list(erros.items())
+    return resultado
+
+
+def opcoes_chrome(headless=False):
+    chrome_options = ChromeOptions()
+    if headless:
+        chrome_options.add_argument("--headless=new")
+    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--window-size=1920,1080")
+    chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    return chrome_options
+
+
+@lru_cache(maxsize=1)
+def caminho_chromedriver():
+    """Instala (ou localiza) o chromedriver uma única vez por processo."""
+    return ChromeDriverManager().install()
+
+
+def criar_navegador(headless=False):
+    driver = webdriver.Chrome(service=ChromeService(caminho_chromedriver()), options=opcoes_chrome(headless))
+    driver.set_page_load_timeout(60)
+    return driver
+
+
+class PoolNavegadores:
+    """
+    Navegadores Chrome reaproveitados entre execuções (até `tamanho`, padrão NUM_NAVEGADORES; headless conforme
+    NAVEGADOR_HEADLESS). emprestar() entrega um navegador livre ou cria um novo; ao devolver, os cookies são
+    apagados; navegadores que falharam são descartados. Seguro entre threads; encerrado ao fim do processo.
+    """
+
+    def __init__(self, tamanho=None, headless=None):
+        self.tamanho = max(1, int(tamanho or NUM_NAVEGADORES))
+        self.headless = NAVEGADOR_HEADLESS if headless is None else headless
+        self._livres = []
+        self._criados = 0
+        self._condicao = threading.Condition()
+        atexit.register(self.encerrar)
+
+    @staticmethod
+    def _ativo(driver):
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def _obter(self):
+        while True:
+            with self._condicao:
+                while not self._livres and self._criados >= self.tamanho:
+                    self._condicao.wait()
+                driver = self._livres.pop() if self._livres else None
+                if driver is None:
+                    self._criados += 1
+            if driver is None:
+                try:
+                    return criar_navegador(self.headless)
+                except Exception:
+                    self._descartar(None)
+                    raise
+            if self._ativo(driver):
+                return driver
+            self._descartar(driver)
+
+    def _descartar(self, driver):
+        if driver is not None:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+        with self._condicao:
+            self._criados -= 1
+            self._condicao.notify()
+
+    @contextmanager
+    def emprestar(self):
+        driver = self._obter()
+        devolver = False
+        try:
+            yield driver
+            devolver = True
+        finally:
+            if devolver and self._ativo(driver):
+                try:
+                    driver.delete_all_cookies()
+                except Exception:
+                    pass
+                with self._condicao:
+                    self._livres.append(driver)
+                    self._condicao.notify()
+            else:
+                self._descartar(driver)
+
+    def encerrar(self):
+        with self._condicao:
+            livres, self._livres = self._livres, []
+        for driver in livres:
+            self._descartar(driver)
+
+
+# Pool padrão (os navegadores só são abertos no primeiro uso)
+pool_navegadores_padrao = PoolNavegadores()
+
+
+def entrar_pela_interface(driver, wait, formusuario, formsenha, id_inventario, log, ritmo=None):
+    """
+    Login e navegação pela interface do site até a tela de edição do inventário. Cada navegação espera (wait) a
+    página seguinte; entre uma ação e outra, as pausas da etapa "login" do perfil de ritmo.
+    """
+    ritmo = ritmo or RitmoNavegador()
+    url_site = f"{base_url}/"
+    url_quente = "https://www.google.com"
+    xpath_menu = "//a[contains(.,'Inventário Botânico') and contains(@class,'dropdown-toggle')]"
+    tem_redir = "return !!document.forms['redir'];"
+    log("Abrindo navegador e carregando página inicial...")
+    driver.get(url_quente)
+    ritmo.pausa("login")
+    log("Navegando para o SisArv...")
+    driver.get(url_site)
+    if driver.current_url in ("data:", "data:,") or "sisarv" not in driver.current_url.lower():
+        driver.get(url_site)
+    wait.until(lambda d: d.execute_script(tem_redir))
+    ritmo.pausa("login")
+    driver.execute_script("document.forms['redir'].submit();")
+    log("Fazendo login...")
+    campo_usuario = wait.until(EC.presence_of_element_located((By.NAME, "formusuario")))
+    ritmo.pausa("login")
+    campo_usuario.clear()
+    campo_usuario.send_keys(formusuario)
+    ritmo.pausa("login")
+    campo_senha = driver.find_element(By.NAME, "formsenha")
+    campo_senha.clear()
+    campo_senha.send_keys(formsenha)
+    ritmo.pausa("login")
+    driver.find_element(By.ID, "logForm").submit()
+    # Depois do login o site pode parar em uma página de redirect antes da que tem o menu
+    wait.until(EC.staleness_of(campo_usuario))
+    wait.until(lambda d: d.find_elements(By.XPATH, xpath_menu) or d.execute_script(tem_redir))
+    if not driver.find_elements(By.XPATH, xpath_menu):
+        driver.execute_script("document.forms['redir'].submit();")
+    log("Indo para Consultar Inventário Botânico...")
+    menu_inv = wait.until(EC.element_to_be_clickable((By.XPATH, xpath_menu)))
+    ritmo.pausa("login")
+    menu_inv.click()
+    opcao_consultar = wait.until(EC.element_to_be_clickable((By.ID, "opcaoMenu-ConsultarInventarioBotanico")))
+    ritmo.pausa("login")
+    opcao_consultar.click()
+    log("Abrindo tela de Edição do inventário...")
+    btn_editar = wait.until(
+        EC.element_to_be_clickable((By.XPATH, "//button[contains(@onclick,\"abreTelaCadastroInventarioBotanico\") and contains(@onclick,\"consulta\")"
+                                    f" and contains(@onclick,\"{id_inventario}\")]"))
+    )
+    ritmo.pausa("login")
+    btn_editar.click()
+    wait.until(EC.presence_of_element_located((By.ID, "panelArvores")))
+
+
+def preencher_arvore_campo_a_campo(driver, registro, ritmo):
+    """Preenche os campos de uma árvore um a um (selects pelo value/texto, inputs digitados)."""
+    texto_popular, texto_cientifico = registro.texto_popular, registro.texto_cientifico
+    ritmo.pausa("antes_arvore")
+    # Preencher campo a campo (MAPEAMENTO_PREENCHIMENTO): Nº, Nome Popular, Nome Científico, depois demais campos
+    # Selects que usam texto visível (nome popular/científico)
+    try:
+        Select(driver.find_element(By.ID, "nome_popular")).select_by_visible_text(texto_popular)
+    except Exception:
+        try:
+            Select(driver.find_element(By.ID, "nome_popular")).select_by_visible_text(texto_popular.upper())
+        except Exception:
+            pass
+    ritmo.pausa("nome_popular")
+    try:
+        Select(driver.find_element(By.ID, "nome_cientifico")).select_by_visible_text(texto_cientifico)
+    except Exception:
+        try:
+            Select(driver.find_element(By.ID, "nome_cientifico")).select_by_visible_text(texto_cientifico.upper())
+        except Exception:
+            pass
+    ritmo.pausa("nome_cientifico")
+    # Demais campos a partir do MAPEAMENTO_PREENCHIMENTO
+    ids_select = (
+        "estado_conservacao", "local_especime", "fcb",
+        "notabilidade", "utilidade_publica", "area_publica",
+        "motivacao", "intencao",
+    )
+    for id_form, valor in zip(registro.campos, registro.valores):
+        if id_form in ("nome_popular", "nome_cientifico"):
+            continue
+        try:
+            elem = driver.find_element(By.ID, id_form)
+            valor_str = str(valor) if valor else ""
+            if id_form in ids_select:
+                try:
+                    Select(elem).select_by_value(valor_str)
+                except Exception:
+                    try:
+                        Select(elem).select_by_visible_text(valor_str)
+                    except Exception:
+                        pass
+            else:
+                elem.clear()
+                ritmo.pausa("digitacao")
+                elem.send_keys(valor_str)
+            ritmo.pausa("campo")
+        except Exception:
+            pass
+
+
+def preencher_arvore_rapido(driver, wait, registro):
+    """Preenche todos os campos de uma árvore com um único execute_script. Retorna os ids não preenchidos."""
+    botao_incluir = wait.until(EC.element_to_be_clickable((By.ID, "botao-IncluirArvoreLista")))
+    falhas = driver.execute_script(SCRIPT_PREENCHER_ARVORE, [[c, str(v)] for c, v in zip(registro.campos, registro.valores)])
+    return falhas, botao_incluir
+
+
+def contar_linhas_arvores(driver):
+    """Número de linhas da tabela de árvores (panelArvores) na página atual do navegador."""
+    return len(driver.find_elements(By.CSS_SELECTOR, "#panelArvores tbody tr"))
+
+
+def aguardar_recarga(wait, elemento_antigo, linhas_antes):
+    """
+    Espera o resultado de um clique em Incluir: a página recarregada (o panelArvores anterior sai do DOM e o da
+    nova página aparece) ou a tabela de árvores atualizada no lugar (número de linhas diferente de linhas_antes).
+    """
+    def atualizada(driver):
+        if EC.staleness_of(elemento_antigo)(driver):
+            return bool(driver.find_elements(By.ID, "panelArvores"))
+        return contar_linhas_arvores(driver) != linhas_antes
+
+    wait.until(atualizada)
+
+
+def preencher_via_navegador(formusuario, formsenha, cookies, id_inventario, registros, rapido, log, stopped,
+                            progress_range_callback, perfil_ritmo=None, orcamento=None, pool=None,
+                            numeros_no_servidor=None):
+    """
+    Inclui os registros (RegistroArvore) pela interface, com um ou mais navegadores do pool em paralelo: os registros
+    ficam em uma fila comum e os Nº já presentes/em preenchimento são compartilhados entre os navegadores. Se um
+    navegador cai no meio do preenchimento, o trabalhador continua com outro navegador do pool e a árvore em
+    andamento volta para a fila (até TENTATIVAS_ARVORE_NAVEGADOR quedas nela; depois conta como falha). Se Incluir
+    já tinha sido clicado, a lista do inventário é relida antes: a árvore que já consta nela não é reenviada.
+    rapido: todos os campos de cada árvore em um único script (pula espécies não resolvidas); senão campo a campo.
+    numeros_no_servidor() opcional: Nº presentes na lista do inventário (padrão: relê a tela de edição via
+    requests com os cookies).
+    Retorna (sucesso, arvores_nao_encontradas, mensagem_erro), ou None se nenhum navegador puder ser aberto.
+    """
+    pool = pool or pool_navegadores_padrao
+    if numeros_no_servidor is None:
+        def numeros_no_servidor():
+            sessao = requests.Session()
+            sessao.cookies.update(cookies)
+            return extrair_numeros_ja_preenchidos(abrir_tela_edicao(sessao, id_inventario))
+    total_arvores = len(registros)
+    fila = deque(registros)
+    num_navegadores = min(pool.tamanho, max(1, total_arvores))
+    lock = threading.Lock()
+    numeros_ja = set()
+    arvores_nao_encontradas = []
+    erros = []
+    falhas_linhas = {}   # Nº -> erro das árvores perdidas em quedas de navegador
+    em_andamento = {}    # trabalhador -> [RegistroArvore sendo preenchido, Incluir já clicado]
+    quedas_arvore = {}   # Nº -> quedas de navegador durante o preenchimento da árvore
+    concluidas = [0]
+    abertos = [0]
+    if rapido:
+        log("Preenchimento rápido: todos os campos de cada árvore em um único script.")
+    pbar = tqdm(total=total_arvores, desc="Unidades", unit="un")
+
+    def proxima():
+        with lock:
+            if not fila:
+                return None
+            concluidas[0] += 1
+            atual, restantes = concluidas[0], len(fila)
+            item = fila.popleft()
+        pbar.update(1)
+        if progress_range_callback:
+            progress_range_callback(atual, total_arvores)
+        return item, restantes
+
+    def devolver_em_andamento(k, erro):
+        """
+        Árvore que o navegador k preenchia ao cair: volta para o início da fila ou, na última tentativa, vira falha.
+        Retorna False se o navegador não estava preenchendo nenhuma árvore.
+        """
+        with lock:
+            andamento = em_andamento.pop(k, None)
+        if andamento is None:
+            return False
+        registro, incluir_clicado = andamento
+        n = registro.numero
+        if incluir_clicado:
+            # O POST pode ter chegado ao servidor antes da queda: reenviar duplicaria a árvore
+            try:
+                presente = n in numeros_no_servidor()
+            except Exception as e:
+                with lock:
+                    falhas_linhas[n] = f"{erro}; lista do inventário não pôde ser conferida ({e})"
+                return True
+            if presente:
+                log(f"Nº {n} já constava na lista após a queda do navegador; não reenviada.")
+                return True
+        with lock:
+            numeros_ja.discard(n)
+            quedas_arvore[n] = quedas_arvore.get(n, 0) + 1
+            if quedas_arvore[n] >= TENTATIVAS_ARVORE_NAVEGADOR:
+                falhas_linhas[n] = erro
+                return True
+            fila.appendleft(registro)
+            concluidas[0] -= 1
+        pbar.update(-1)
+        log(f"Nº {n} voltou para a fila após a queda do navegador.")
+        return True
+
+    def trabalhador(k):
+        prefixo = f"[Navegador {k}] " if num_navegadores > 1 else ""
+        falhas_abertura, quedas = 0, 0
+        while falhas_abertura < 2 and quedas < 2:
+            emprestado = False
+            try:
+                with pool.emprestar() as driver:
+                    emprestado = True
+                    with lock:
+                        abertos[0] += 1
+                    preencher_com(driver, prefixo, k)
+                return
+            except Exception as e:
+                if emprestado:
+                    log(f"{prefixo}Falha no navegador: {e}")
+                    with lock:
+                        erros.append(str(e))
+                    # Quedas durante uma árvore contam para ela; as demais (login, abertura da tela), para o trabalhador
+                    if not devolver_em_andamento(k, str(e)):
+                        quedas += 1
+                    if not fila:
+                        return
+                    continue
+                falhas_abertura += 1
+                if falhas_abertura < 2:
+                    # Mesma espera exponencial aleatória das requisições repetidas
+                    espera = random.uniform(0, min(ESPERA_MAXIMA_REPETICAO, ESPERA_BASE_REPETICAO * 2 ** falhas_abertura))
+                    log(f"{prefixo}Selenium falhou: {e}. Tentando de novo em {espera:.1f}s...")
+                    time.sleep(espera)
+                else:
+                    log(f"{prefixo}Selenium indisponível.")
+
+    def preencher_com(driver, prefixo, k):
+        wait = WebDriverWait(driver, 20)
+        entrou_com_sessao = False
+        if ENTRAR_NAVEGADOR_COM_SESSAO:
+            log(f"{prefixo}Abrindo navegador já autenticado (sessão do requests) direto na tela de edição...")
+            try:
+                entrou_com_sessao = abrir_edicao_com_sessao(driver, cookies, id_inventario)
+            except Exception as e:
+                log(f"{prefixo}Falha ao reaproveitar a sessão no navegador: {e}")
+            if not entrou_com_sessao:
+                log(f"{prefixo}Sessão não aceita pelo navegador; fazendo login pela interface.")
+        if not entrou_com_sessao:
+            entrar_pela_interface(driver, wait, formusuario, formsenha, id_inventario, log, RitmoNavegador(perfil_ritmo))
+        log(f"{prefixo}Preenchendo {'com script' if rapido else 'campo a campo'} e clicando em Incluir Árvore na Lista...")
+        panel_arvores = driver.find_element(By.ID, "panelArvores")
+        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", panel_arvores)
+        ritmo = RitmoNavegador(perfil_ritmo, orcamento)
+        ritmo.pausa("inicio")
+        with lock:
+            numeros_ja.update(extrair_numeros_ja_preenchidos(driver.page_source))
+        while not stopped():
+            em_andamento.pop(k, None)
+            proximo = proxima()
+            if proximo is None:
+                break
+            registro, restantes = proximo
+            n = registro.numero
+            if n is None:
+                continue
+            with lock:
+                if n in numeros_ja:
+                    pbar.write(f"Nº {n} já preenchido na lista, pulando.")
+                    continue
+                numeros_ja.add(n)
+                em_andamento[k] = [registro, False]
+            ritmo.planejar(restantes // num_navegadores + 1)
+            if rapido:
+                if not registro.especie_encontrada:
+                    with lock:
+                        arvores_nao_encontradas.append((n, registro.texto_popular, registro.texto_cientifico))
+                    pbar.write(f"Nº {n}: nome não encontrado nos selects (vulgar={registro.texto_popular!r}, "
+                               f"científico={registro.texto_cientifico!r}). Pulando.")
+                    continue
+                ritmo.pausa("antes_arvore")
+                falhas, botao_incluir = preencher_arvore_rapido(driver, wait, registro)
+                if falhas:
+                    pbar.write(f"Nº {n}: campo(s) não preenchido(s) pelo script: {', '.join(falhas)}.")
+                ritmo.pausa("antes_incluir")
+                painel_antigo, linhas_antes = driver.find_element(By.ID, "panelArvores"), contar_linhas_arvores(driver)
+                em_andamento[k][1] = True
+                botao_incluir.click()
+                aguardar_recarga(wait, painel_antigo, linhas_antes)
+                ritmo.pausa("apos_incluir")
+                pbar.write(f"{prefixo}Nº {n} ({registro.nome_vulgar} / {registro.nome_cientifico}) incluída (navegador, rápido).")
+                continue
+            pbar.write(f"{prefixo}Preenchendo árvore Nº {n} (campo a campo)...")
+            preencher_arvore_campo_a_campo(driver, registro, ritmo)
+            ritmo.pausa("antes_incluir")
+            painel_antigo, linhas_antes = driver.find_element(By.ID, "panelArvores"), contar_linhas_arvores(driver)
+            em_andamento[k][1] = True
+            driver.find_element(By.ID, "botao-IncluirArvoreLista").click()
+            aguardar_recarga(wait, painel_antigo, linhas_antes)
+            ritmo.pausa("apos_incluir")
+            pbar.write(f"{prefixo}Nº {n} ({registro.nome_vulgar} / {registro.nome_cientifico}) incluída (navegador).")
+        em_andamento.pop(k, None)
+        ritmo.pausa("fim")
+
+    if num_navegadores > 1:
+        log(f"Preenchendo com {num_navegadores} navegadores em paralelo.")
+    try:
+        with ThreadPoolExecutor(max_workers=num_navegadores) as executor:
+            list(executor.map(trabalhador, range(1, num_navegadores + 1)))
+    finally:
+        pbar.close()
+    if not abertos[0]:
+        return None
+    if stopped():
+        log("Interrompido pelo usuário.")
+        return (False, [], "Interrompido pelo usuário.")
+    for n, erro in sorted(falhas_linhas.items()):
+        log(f"Nº {n}: não enviada (navegador caiu nesta árvore: {erro}).")
+    nao_enviadas = len(falhas_linhas) + sum(1 for registro in fila if registro.numero is not None)
+    if nao_enviadas:
+        motivo = erros[-1] if erros else "navegador indisponível"
+        return (False, arvores_nao_encontradas, f"Falha no navegador ({nao_enviadas} linha(s) não enviada(s)): {motivo}")
+    if erros:
+        log(f"{len(erros)} queda(s) de navegador; todas as árvores foram reenviadas.")
+    log("Preenchimento da linha 1 ao final concluído (navegador).")
+    if arvores_nao_encontradas:
+        log(f"Total: {len(arvores_nao_encontradas)} árvore(s) não encontrada(s).")
+    return (True, arvores_nao_encontradas, None)
+
+
+def _registros_em_blocos(blocos, catalogo, log, pbar):
+    """RegistroArvore de cada bloco (via montar_tabela_payloads), com avisos de nomes aproximados uma vez por texto."""
+    avisados = set()
+    for bloco in blocos:
+        tabela = montar_tabela_payloads(bloco, catalogo)
+        for tipo, rotulo in (("popular", "vulgar"), ("cientifico", "científico")):
+            aproximados = tabela[tabela[f"_aproximado_{tipo}"].notna()].drop_duplicates(f"_texto_{tipo}")
+            for texto, (texto_opcao, score) in zip(aproximados[f"_texto_{tipo}"], aproximados[f"_aproximado_{tipo}"]):
+                if (tipo, texto) not in avisados:
+                    avisados.add((tipo, texto))
+                    log(f"Nome {rotulo} {texto!r} associado a {texto_opcao!r} por similaridade ({score:.0%}).")
+        for registro in registros_arvores(tabela):
+            pbar.update(1)
+            yield registro
+
+
+def run_sisarv(formusuario, formsenha, df, progress_callback=None, should_stop=None, progress_range_callback=None,
+               num_workers_inclusao=None, confirmacao_inclusao=None, modo_sincronizacao=None,
+               cache_catalogos=None, jornal=None, concorrencia_adaptativa=None, id_inventario=None,
+               cache_sessoes=None, telemetria=None, preenchimento_navegador=None, perfil_ritmo=None,
+               orcamento_navegador=None, num_workers_exclusao=None):
+    """
+    Executa o fluxo completo: login no SisArv, exclusão das árvores existentes, inclusão das linhas do df.
+    df pode ser uma PlanilhaEmBlocos: o envio via requests lê e envia bloco a bloco (memória constante).
+    progress_callback(msg) é chamado opcionalmente para atualizar interface (ex.: Streamlit).
+    progress_range_callback(atual, total) opcional: chamado a cada árvore (ex.: para barra de progresso).
+    should_stop() opcional: se retornar True, interrompe e retorna (False, [], "Interrompido pelo usuário.").
+    num_workers_inclusao opcional: inclusões simultâneas via requests (padrão: NUM_WORKERS_INCLUSAO).
+    confirmacao_inclusao opcional: "pagina" ou "reconciliacao" (padrão: CONFIRMACAO_INCLUSAO).
+    modo_sincronizacao opcional: "substituir" ou "diferencial" (padrão: MODO_SINCRONIZACAO).
+    cache_catalogos opcional: CacheCatalogos dos selects de espécies (padrão: cache_catalogos_padrao).
+    jornal opcional: JornalExecucao para retomar execuções interrompidas (padrão: jornal_padrao se USAR_JORNAL).
+    concorrencia_adaptativa opcional: ajusta a concorrência (AIMD) até CONCORRENCIA_MAXIMA (padrão: CONCORRENCIA_ADAPTATIVA).
+    id_inventario opcional: inventário a editar (padrão: o primeiro da consulta).
+    cache_sessoes opcional: CacheSessoes para reaproveitar o login entre execuções (padrão: cache_sessoes_padrao
+    se USAR_CACHE_SESSOES; False desativa).
+    telemetria opcional: TelemetriaExecucao que recebe os spans e o ritmo (ex.: para a interface mostrar linhas/s
+    e tempo restante); ao final é exportada para DIRETORIO_TELEMETRIA se EXPORTAR_TELEMETRIA.
+    preenchimento_navegador, perfil_ritmo, orcamento_navegador opcionais: modo, perfil de pausas e orçamento de
+    tempo do preenchimento via Selenium (padrão: PREENCHIMENTO_NAVEGADOR, PERFIL_RITMO, ORCAMENTO_TEMPO_NAVEGADOR).
+    num_workers_exclusao opcional: exclusões simultâneas (padrão: NUM_WORKERS_EXCLUSAO); durante a exclusão,
+    progress_range_callback recebe (excluídas, total) e a telemetria fica na fase "exclusao".
+    Retorna: (sucesso: bool, arvores_nao_encontradas: list, mensagem_erro: str|None)
+    """
+    telemetria = TelemetriaExecucao(motor="requests") if telemetria is None else telemetria
+    try:
+        return _run_sisarv(
+            formusuario, formsenha, df, progress_callback, should_stop, progress_range_callback,
+            num_workers_inclusao, confirmacao_inclusao, modo_sincronizacao, cache_catalogos, jornal,
+            concorrencia_adaptativa, id_inventario, cache_sessoes, telemetria,
+            preenchimento_navegador, perfil_ritmo, orcamento_navegador, num_workers_exclusao,
+        )
+    finally:
+        telemetria.encerrar()
+        if EXPORTAR_TELEMETRIA:
+            telemetria.exportar()
+
+
+def _run_sisarv(formusuario, formsenha, df, progress_callback, should_stop, progress_range_callback,
+                num_workers_inclusao, confirmacao_inclusao, modo_sincronizacao, cache_catalogos, jornal,
+                concorrencia_adaptativa, id_inventario, cache_sessoes, telemetria,
+                preenchimento_navegador, perfil_ritmo, orcamento_navegador, num_workers_exclusao):
+    """Corpo de run_sisarv (ver a documentação lá)."""
+    def stopped():
+        return should_stop is not None and should_stop()
+
+    def log(msg):
+        if progress_callback:
+            progress_callback(msg)
+        else:
+            print(msg)
+
+    progress_range_externo = progress_range_callback
+
+    def progress_range_callback(atual, total):
+        telemetria.registrar_progresso(atual, total)
+        if progress_range_externo:
+            progress_range_externo(atual, total)
+
+    telemetria.iniciar_fase("login")
+    log("Conectando ao SisArv...")
+
+    num_workers = max(1, int(num_workers_inclusao or NUM_WORKERS_INCLUSAO))
+    adaptativa = CONCORRENCIA_ADAPTATIVA if concorrencia_adaptativa is None else concorrencia_adaptativa
+    if adaptativa:
+        agendador = AgendadorRequisicoes(num_workers, max(num_workers, CONCORRENCIA_MAXIMA), log=log)
+    else:
+        agendador = AgendadorRequisicoes(max(num_workers, 4), log=log)
+    num_workers_exclusao = max(1, int(num_workers_exclusao or NUM_WORKERS_EXCLUSAO))
+    if adaptativa:
+        agendador_exclusao = AgendadorRequisicoes(
+            num_workers_exclusao, max(num_workers_exclusao, CONCORRENCIA_MAXIMA), log=log,
+        )
+    else:
+        agendador_exclusao = AgendadorRequisicoes(num_workers_exclusao, log=log)
+    transporte = TransporteSisArv(
+        max(agendador.limite_maximo, agendador_exclusao.limite_maximo), telemetria=telemetria,
+    )
+    session = transporte.sessao()
+
+    def excluir(ids):
+        """Fase de exclusão: progresso por árvore, PARAR entre exclusões e verificação da lista ao final."""
+        telemetria.iniciar_fase("exclusao")
+        resultado = excluir_em_lote(
+            transporte, id_inventario, ids, num_workers=agendador_exclusao.limite_maximo,
+            agendador=agendador_exclusao, progress_callback=progress_range_callback, should_stop=stopped, log=log,
+        )
+        for id_esp, err in resultado.falhas:
+            log(f"Erro ao excluir id_inventario_botanico_especie={id_esp}: {err}")
+        if resultado.interrompida:
+            log(f"Exclusão interrompida: {resultado.excluidas} de {len(ids)} árvore(s) excluída(s).")
+        return resultado
+
+    if cache_sessoes is None and USAR_CACHE_SESSOES:
+        cache_sessoes = cache_sessoes_padrao
+    html = iniciar_sessao(
+        transporte, formusuario, formsenha, agendador=agendador,
+        cache_sessoes=cache_sessoes or None, escopo=id_inventario, log=log,
+    )
+
+    ids_inventario = analisar_pagina(html).ids_inventario
+    if id_inventario is not None:
+        id_inventario = str(id_inventario)
+        if id_inventario not in ids_inventario:
+            return (False, [], f"Inventário {id_inventario} não encontrado na lista da conta.")
+    else:
+        id_inventario = ids_inventario[0] if ids_inventario else None
+    if not id_inventario:
+        return (False, [], "Nenhum inventário encontrado na lista para editar.")
+    transporte.inventario_em_edicao = id_inventario
+    telemetria.metadados["id_inventario"] = id_inventario
+    telemetria.iniciar_fase("preparacao")
+
+    html_edicao = abrir_tela_edicao(session, id_inventario, agendador=agendador)
+    pagina_edicao = analisar_pagina(html_edicao)
+
+    # PlanilhaEmBlocos: o envio via requests consome os blocos à medida que são lidos
+    blocos = df if isinstance(df, PlanilhaEmBlocos) else None
+
+    if NAO_PREENCHER:
+        if gerar_arquivo_sem_correspondencia:
+            gerar_arquivo_sem_correspondencia(blocos.carregar() if blocos else df, html_edicao)
+        else:
+            catalogo = (cache_catalogos or cache_catalogos_padrao).catalogo_da_pagina(base_url, id_inventario, pagina_edicao)
+            for linha in validar_planilha(blocos or df, catalogo).resumo():
+                log(linha)
+        return (True, [], None)
+
+    if jornal is None and USAR_JORNAL:
+        jornal = jornal_padrao
+    chave_jornal, fase_anterior, concluidas_jornal = None, None, set()
+    if jornal is not None:
+        chave_jornal, fase_anterior = jornal.iniciar(formusuario, id_inventario, blocos.hash() if blocos else hash_planilha(df))
+        if fase_anterior:
+            concluidas_jornal = jornal.linhas_concluidas(chave_jornal)
+            log(f"Retomando execução interrompida desta planilha ({len(concluidas_jornal)} árvore(s) já concluída(s)).")
+
+    def registrar_fase(fase):
+        if jornal is not None:
+            jornal.marcar_fase(chave_jornal, fase)
+
+    def registrar_linha(n, situacao, detalhe=""):
+        if jornal is not None:
+            jornal.registrar_linha(chave_jornal, n, situacao, detalhe)
+
+    def registrar_payload(n, payload, id_arvore=None):
+        if jornal is not None:
+            id_arvore = id_arvore or payload.get("id_em_edicao") or None
+            jornal.registrar_payload(formusuario, id_inventario, n, id_arvore, hash_payload(payload))
+
+    diferencial = (modo_sincronizacao or MODO_SINCRONIZACAO) == "diferencial"
+    arvores_existentes, payloads_registrados = {}, {}
+    colunas_tabela = colunas_tabela_arvores(pagina_edicao) if diferencial else None
+    if diferencial and colunas_tabela is None:
+        log("Cabeçalho da tabela de árvores não reconhecido "
+            f"({', '.join(pagina_edicao.cabecalho_arvores) or 'sem cabeçalho'}); usando a substituição completa.")
+        diferencial = False
+    if diferencial:
+        # Exclui apenas as árvores cujo Nº saiu da planilha (e duplicatas de um mesmo Nº)
+        arvores_existentes = extrair_arvores_existentes(pagina_edicao)
+        if jornal is not None:
+            payloads_registrados = jornal.payloads_registrados(formusuario, id_inventario)
+        else:
+            log("Sem o jornal, os campos que a tabela não exibe não podem ser conferidos; árvores existentes serão editadas.")
+        if blocos is not None:
+            numeros_planilha = blocos.numeros()
+        else:
+            numeros_planilha = numeros_da_planilha(df)
+        ids_remover = []
+        for n, arvores in arvores_existentes.items():
+            if n not in numeros_planilha:
+                ids_remover.extend(a["id"] for a in arvores)
+            else:
+                ids_remover.extend(a["id"] for a in arvores[1:])
+        log(f"Sincronização diferencial: {len(arvores_existentes)} Nº no inventário, {len(ids_remover)} árvore(s) a excluir.")
+        if ids_remover:
+            if stopped():
+                return (False, [], "Interrompido pelo usuário.")
+            resultado = excluir(ids_remover)
+            if resultado.interrompida:
+                return (False, [], "Interrompido pelo usuário.")
+            pagina_edicao = resultado.pagina
+            arvores_existentes = extrair_arvores_existentes(pagina_edicao)
+    ids_arvores = [] if diferencial else pagina_edicao.ids_arvores
+    if jornal is not None and not diferencial and fase_anterior != "inclusao":
+        # Substituição completa: as árvores (e os payloads registrados para elas) serão recriadas
+        jornal.descartar_payloads(formusuario, id_inventario)
+    if ids_arvores and fase_anterior == "inclusao":
+        # A execução anterior já excluiu as árvores antigas; as que estão na lista foram incluídas por ela
+        log("Exclusão já concluída na execução anterior; mantendo as árvores já incluídas.")
+        ids_arvores = []
+    if ids_arvores:
+        registrar_fase("exclusao")
+        if stopped():
+            return (False, [], "Interrompido pelo usuário.")
+        log(f"Excluindo {len(ids_arvores)} árvore(s) do inventário antes de incluir...")
+        resultado = excluir(ids_arvores)
+        if resultado.interrompida:
+            return (False, [], "Interrompido pelo usuário.")
+        pagina_edicao = resultado.pagina
+        log(f"Árvores excluídas ({resultado.excluidas} de {len(ids_arvores)}).")
+        if stopped():
+            return (False, [], "Interrompido pelo usuário.")
+    registrar_fase("inclusao")
+    telemetria.iniciar_fase("inclusao")
+
+    df_linhas = df
+    if blocos is None and df_linhas.empty:
+        log("Nenhuma linha no dataframe.")
+        registrar_fase("concluida")
+        return (True, [], None)
+
+    usar_navegador = False
+    if diferencial and not USAR_APENAS_REQUESTS:
+        log("Sincronização diferencial edita árvores existentes apenas via requests.")
+    elif not USAR_APENAS_REQUESTS and USAR_WEBDRIVER_MANAGER:
+        usar_navegador = True
+    elif not USAR_APENAS_REQUESTS:
+        log("webdriver-manager não instalado. Preenchimento será feito via requests.")
+
+    if usar_navegador:
+        if blocos is not None:
+            df_linhas = blocos.carregar()
+        # Mesmos valores (MAPEAMENTO_PREENCHIMENTO) e ids de catálogo do caminho via requests
+        catalogo = (cache_catalogos or cache_catalogos_padrao).catalogo_da_pagina(base_url, id_inventario, pagina_edicao)
+        resultado = preencher_via_navegador(
+            formusuario, formsenha, transporte.cookies, id_inventario,
+            registros_arvores(montar_tabela_payloads(df_linhas, catalogo)),
+            (preenchimento_navegador or PREENCHIMENTO_NAVEGADOR) == "rapido", log, stopped,
+            progress_range_callback, perfil_ritmo,
+            ORCAMENTO_TEMPO_NAVEGADOR if orcamento_navegador is None else orcamento_navegador,
+            numeros_no_servidor=lambda: extrair_numeros_ja_preenchidos(
+                abrir_tela_edicao(transporte.sessao(), id_inventario, agendador=agendador)
+            ),
+        )
+        if resultado is not None:
+            if resultado[0]:
+                registrar_fase("concluida")
+            return resultado
+        log("Selenium indisponível. Preenchimento será feito via requests.")
+
+    # Preenchimento via requests (quando Selenium não está disponível ou falhou)
+    log("Preenchendo árvores via requests...")
+    catalogo = (cache_catalogos or cache_catalogos_padrao).catalogo_da_pagina(base_url, id_inventario, pagina_edicao)
+    # Na sincronização diferencial os Nº existentes são comparados (não pulados)
+    numeros_ja = set() if diferencial else pagina_edicao.numeros_arvores()
+    textos_selects = {}
+    if diferencial:
+        for id_form in colunas_tabela:
+            opcoes = pagina_edicao.selects.get(id_form) if id_form else None
+            if opcoes:
+                textos_selects[id_form] = {val: texto for texto, val in opcoes.items()}
+    sem_alteracao = [0]
+    arvores_nao_encontradas = []
+    total_arvores = blocos.total_estimado() if blocos is not None else len(df_linhas)
+    if adaptativa:
+        # Threads suficientes para o limite máximo; o agendador decide quantas ficam ativas
+        num_workers = agendador.limite_maximo
+        log(f"Inclusão com concorrência adaptativa (até {num_workers} requisições simultâneas).")
+    elif num_workers > 1:
+        log(f"Inclusão com {num_workers} requisições simultâneas.")
+    reconciliacao = (confirmacao_inclusao or CONFIRMACAO_INCLUSAO) == "reconciliacao"
+    if reconciliacao:
+        log("Inclusões serão confirmadas por reconciliação com a lista do inventário.")
+
+    def _incluir_uma(payload):
+        # Cada worker usa sua própria sessão, sobre o cookie jar da sessão autenticada
+        s = transporte.sessao()
+        ja_aplicada = None
+        numero = str(payload.get("numero_especie_projeto") or "")
+        if not payload.get("id_em_edicao") and numero.isdigit():
+            # Antes de repetir uma inclusão que falhou, confere se ela já entrou na lista (evita duplicata)
+            def ja_aplicada():
+                html_atual = abrir_tela_edicao(s, id_inventario, agendador=agendador)
+                return int(numero) in extrair_numeros_ja_preenchidos(html_atual)
+        resp = agendador.post(s, payload, ja_aplicada=ja_aplicada)
+        if resp is None:
+            return None, None
+        # Na reconciliação não segue o redirect: a página completa só é lida ao reconciliar
+        numeros_resp = None
+        if resp.ok and not reconciliacao:
+            numeros_resp = extrair_numeros_ja_preenchidos(seguir_redirect_post(resp.text, s, agendador=agendador))
+        return resp, numeros_resp
+
+    pendentes = {}  # future -> (n, nome_vulgar, nome_cientifico, payload, reenvio)
+    numeros_em_envio = set()
+    aguardando_confirmacao = {}  # n -> (nome_vulgar, nome_cientifico, payload)
+    nao_confirmadas = []
+    concluidas = [0]
+
+    def avancar():
+        concluidas[0] += 1
+        if progress_range_callback:
+            progress_range_callback(concluidas[0], max(total_arvores, concluidas[0]))
+
+    def tratar_concluida(fut):
+        n, nome_vulgar, nome_cientifico, payload, reenvio = pendentes.pop(fut)
+        numeros_em_envio.discard(n)
+        resp, numeros_resp = fut.result()
+        if not reenvio:
+            avancar()
+        if resp is None:
+            numeros_ja.add(n)
+            registrar_linha(n, "incluida")
+            registrar_payload(n, payload)
+            msg = f"Nº {n} ({nome_vulgar} / {nome_cientifico}) já constava na lista após falha transitória; não reenviada."
+            pbar.write(msg)
+            log(msg)
+            return
+        try:
+            resp.raise_for_status()
+        except requests.exceptions.HTTPError as e:
+            registrar_linha(n, "erro", resp.status_code)
+            log(f"Nº {n}: servidor retornou {resp.status_code} - {e}")
+            pbar.write(f"Nº {n}: servidor retornou {resp.status_code} - {e}")
+            pbar.write(f"Resposta: len={len(resp.text)} chars; primeiros 800: {repr(resp.text[:800])}")
+            log("Resposta (primeiros 800 chars): " + repr(resp.text[:800]))
+            pbar.write("Payload (valores enviados):")
+            for k, v in payload.items():
+                if k == "action":
+                    continue
+                pbar.write(f"  {k}={repr(v)}")
+            pbar.write("Pulando para a próxima árvore.")
+            log("Pulando para a próxima árvore.")
+            return
+        numeros_ja.add(n)
+        if reconciliacao:
+            aguardando_confirmacao[n] = (nome_vulgar, nome_cientifico, payload)
+            registrar_linha(n, "enviada")
+            msg = f"Nº {n} ({nome_vulgar} / {nome_cientifico}) enviada via requests."
+        else:
+            if not diferencial:
+                numeros_ja.update(numeros_resp)
+            acao = "editada" if payload.get("id_em_edicao") else "incluída"
+            registrar_linha(n, "editada" if payload.get("id_em_edicao") else "incluida")
+            registrar_payload(n, payload)
+            msg = f"Nº {n} ({nome_vulgar} / {nome_cientifico}) {acao} via requests."
+        pbar.write(msg)
+        log(msg)
+
+    def submeter(n, nome_vulgar, nome_cientifico, payload, reenvio=False):
+        # Limita o número de inclusões em andamento ao número de workers
+        while len(pendentes) >= num_workers:
+            prontas, _ = esperar_futures(list(pendentes), return_when=FIRST_COMPLETED)
+            for fut in prontas:
+                tratar_concluida(fut)
+        numeros_em_envio.add(n)
+        pendentes[executor.submit(_incluir_uma, payload)] = (n, nome_vulgar, nome_cientifico, payload, reenvio)
+
+    def drenar():
+        while pendentes:
+            prontas, _ = esperar_futures(list(pendentes), return_when=FIRST_COMPLETED)
+            for fut in prontas:
+                tratar_concluida(fut)
+
+    def reconciliar():
+        """Relê a página uma única vez e reenvia em lote os Nº enviados que não aparecem na lista."""
+        for tentativa in range(TENTATIVAS_RECONCILIACAO + 1):
+            drenar()
+            if not aguardando_confirmacao or stopped():
+                return
+            presentes = extrair_numeros_ja_preenchidos(abrir_tela_edicao(session, id_inventario, agendador=agendador))
+            if not diferencial:
+                numeros_ja.update(presentes)
+            confirmadas = [n for n in aguardando_confirmacao if n in presentes]
+            for n in confirmadas:
+                payload = aguardando_confirmacao.pop(n)[2]
+                registrar_linha(n, "editada" if payload.get("id_em_edicao") else "incluida")
+                registrar_payload(n, payload)
+            log(f"Reconciliação: {len(confirmadas)} inclusão(ões) confirmada(s), {len(aguardando_confirmacao)} ausente(s).")
+            if not aguardando_confirmacao or tentativa == TENTATIVAS_RECONCILIACAO:
+                break
+            ausentes = list(aguardando_confirmacao.items())
+            aguardando_confirmacao.clear()
+            log(f"Reenviando em lote {len(ausentes)} árvore(s) ausente(s) da lista...")
+            for n, (nome_vulgar, nome_cientifico, payload) in ausentes:
+                numeros_ja.discard(n)
+                submeter(n, nome_vulgar, nome_cientifico, payload, reenvio=True)
+        for n in sorted(aguardando_confirmacao):
+            log(f"Nº {n}: inclusão não confirmada na lista do inventário.")
+            registrar_linha(n, "nao_confirmada")
+            nao_confirmadas.append(n)
+        aguardando_confirmacao.clear()
+
+    executor = ThreadPoolExecutor(max_workers=num_workers)
+    if blocos is not None:
+        log(f"Lendo a planilha em blocos de {blocos.tamanho_bloco} linha(s) durante o envio (~{total_arvores} linha(s)).")
+    pbar = tqdm(total=total_arvores, desc="Unidades", unit="un")
+    try:
+        for registro in _registros_em_blocos(blocos if blocos is not None else (df_linhas,), catalogo, log, pbar):
+            if stopped():
+                drenar()  # registra o resultado das inclusões já em andamento
+                log("Interrompido pelo usuário.")
+                return (False, [], "Interrompido pelo usuário.")
+            if reconciliacao and RECONCILIAR_A_CADA and len(aguardando_confirmacao) >= RECONCILIAR_A_CADA:
+                reconciliar()
+            n = registro.numero
+            if n is None:
+                avancar()
+                continue
+            pbar.set_postfix(unidade=n)
+            if n in concluidas_jornal:
+                avancar()
+                numeros_ja.add(n)
+                continue
+            if n in numeros_ja or n in numeros_em_envio:
+                avancar()
+                if n in numeros_ja:
+                    registrar_linha(n, "ja_preenchida")
+                msg = f"Nº {n} já preenchido na lista, pulando."
+                pbar.write(msg)
+                log(msg)
+                continue
+            nome_vulgar = registro.nome_vulgar
+            nome_cientifico = registro.nome_cientifico
+            texto_popular = registro.texto_popular
+            texto_cientifico = registro.texto_cientifico
+            if not registro.especie_encontrada:
+                avancar()
+                registrar_linha(n, "nao_encontrada")
+                arvores_nao_encontradas.append((n, texto_popular, texto_cientifico))
+                msg = f"Nº {n}: nome não encontrado nos selects (vulgar={texto_popular!r}, científico={texto_cientifico!r}). Pulando."
+                for sugestoes, rotulo in ((registro.sugestoes_popular, "vulgar"), (registro.sugestoes_cientifico, "científico")):
+                    if sugestoes:
+                        msg += f" Sugestões ({rotulo}): {formatar_sugestoes(sugestoes)}."
+                pbar.write(msg)
+                log(msg)
+                continue
+            payload = registro.payload(
+                action="IncluiArvoreInventarioBotanico",
+                id_inventario_botanico=id_inventario,
+                origem="consulta",
+                id_em_edicao="",
+                area_interesse_social="SIM",
+            )
+            existentes = arvores_existentes.get(n)
+            if existentes:
+                id_arvore = existentes[0]["id"]
+                if (payload_ja_aplicado(payloads_registrados.get(n), id_arvore, hash_payload(payload))
+                        and not arvore_alterada(payload, existentes[0]["celulas"], textos_selects, colunas_tabela)):
+                    avancar()
+                    registrar_linha(n, "sem_alteracao")
+                    if payloads_registrados[n][0] is None:
+                        registrar_payload(n, payload, id_arvore)  # inclusão anterior: passa a conhecer o id
+                    sem_alteracao[0] += 1
+                    numeros_ja.add(n)
+                    continue
+                payload["id_em_edicao"] = id_arvore
+            submeter(n, nome_vulgar, nome_cientifico, payload)
+        drenar()
+        if reconciliacao:
+            reconciliar()
+            if stopped():
+                log("Interrompido pelo usuário.")
+                return (False, [], "Interrompido pelo usuário.")
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        pbar.close()
+    if concluidas[0] == 0:
+        log("Nenhuma linha no dataframe.")
+    registrar_fase("concluida")
+    log("Preenchimento da linha 1 ao final concluído (via requests).")
+    log(transporte.resumo())
+    log(telemetria.resumo())
+    if diferencial:
+        log(f"Sincronização diferencial: {sem_alteracao[0]} árvore(s) sem alteração.")
+    if arvores_nao_encontradas:
+        log("--- Árvores não encontradas nos selects ---")
+        for n, vulg, cien in arvores_nao_encontradas:
+            log(f"  Nº {n}: {vulg!r} / {cien!r}")
+        log(f"Total: {len(arvores_nao_encontradas)} árvore(s) não encontrada(s).")
+    if nao_confirmadas:
+        log(f"Total: {len(nao_confirmadas)} inclusão(ões) não confirmada(s): {', '.join(map(str, nao_confirmadas))}.")
+    return (True, arvores_nao_encontradas, None)
+
+
+def carregar_planilha_lote(caminho):
+    """Lê uma planilha (xlsx/xls/ods/csv) do disco e aplica preprocessar_df."""
+    return preprocessar_df(ler_planilha(caminho))
+
+
+def run_sisarv_lote(formusuario, formsenha, planilhas, progress_callback=None, should_stop=None,
+                    progress_range_callback=None, inventarios_simultaneos=None, **opcoes):
+    """
+    Sincroniza vários inventários da mesma conta em uma passada: planilhas mapeia id_inventario -> DataFrame
+    (já pré-processado), PlanilhaEmBlocos ou caminho da planilha. Cada inventário roda run_sisarv em sua própria sessão, com até
+    inventarios_simultaneos (padrão: NUM_INVENTARIOS_SIMULTANEOS) ao mesmo tempo.
+    progress_callback(id_inventario, msg) e progress_range_callback(id_inventario, atual, total) são opcionais;
+    should_stop() vale para todos; opcoes são repassadas a run_sisarv (num_workers_inclusao, modo_sincronizacao, ...).
+    Retorna: {id_inventario: (sucesso, arvores_nao_encontradas, mensagem_erro)}, na ordem de planilhas.
+    """
+    def log(id_inv, msg):
+        if progress_callback:
+            progress_callback(id_inv, msg)
+        else:
+            print(f"[Inventário {id_inv}] {msg}" if id_inv else msg)
+
+    planilhas = {str(id_inv): planilha for id_inv, planilha in planilhas.items()}
+    log(None, "Listando inventários da conta...")
+    ids_conta = listar_inventarios(formusuario, formsenha, cache_sessoes=opcoes.get("cache_sessoes"))
+    resultados = {}
+    for id_inv in planilhas:
+        if id_inv not in ids_conta:
+            resultados[id_inv] = (False, [], f"Inventário {id_inv} não encontrado na lista da conta.")
+            log(id_inv, resultados[id_inv][2])
+    sem_planilha = [id_inv for id_inv in ids_conta if id_inv not in planilhas]
+    if sem_planilha:
+        log(None, f"{len(sem_planilha)} inventário(s) da conta sem planilha no lote: {', '.join(sem_planilha)}.")
+
+    def _processar(id_inv):
+        if should_stop is not None and should_stop():
+            return (False, [], "Interrompido pelo usuário.")
+        try:
+            df = planilhas[id_inv]
+            if not isinstance(df, (pd.DataFrame, PlanilhaEmBlocos)):
+                df = carregar_planilha_lote(df)
+            return run_sisarv(
+                formusuario, formsenha, df,
+                progress_callback=lambda msg: log(id_inv, msg),
+                should_stop=should_stop,
+                progress_range_callback=(
+                    (lambda atual, total: progress_range_callback(id_inv, atual, total))
+                    if progress_range_callback else None
+                ),
+                id_inventario=id_inv,
+                **opcoes,
+            )
+        except Exception as e:
+            log(id_inv, f"Falha: {e}")
+            return (False, [], str(e))
+
+    a_processar = [id_inv for id_inv in planilhas if id_inv not in resultados]
+    if a_processar:
+        num_workers = max(1, min(int(inventarios_simultaneos or NUM_INVENTARIOS_SIMULTANEOS), len(a_processar)))
+        log(None, f"Sincronizando {len(a_processar)} inventário(s), até {num_workers} por vez...")
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            for id_inv, resultado in zip(a_processar, executor.map(_processar, a_processar)):
+                resultados[id_inv] = resultado
+    return {id_inv: resultados[id_inv] for id_inv in planilhas}
+
+
+if __name__ == "__main__":
+    caminho_excel = r"C:\Users\DE0189769\OneDrive - Direcional Engenharia S A\Documentos Macedo One Drive\Automações - Lucas\ws.py"
+    df = pd.read_excel(caminho_excel)
+    df = preprocessar_df(df)
+    print(df)
+    run_sisarv("evelin.caboclo@gmail.com", "67750131", df)
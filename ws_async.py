@@ -0,0 +1,451 @@
+# -*- coding: utf-8 -*-
+"""
+SisArv - motor assíncrono (asyncio + aiohttp), alternativo ao run_sisarv do ws.py.
+Mesmas entradas, callbacks e retorno de run_sisarv; todas as requisições rodam em um único event loop,
+com a concorrência limitada por semáforo e cancelamento estruturado ligado ao should_stop.
+Uso: asyncio.run(run_sisarv_async(login, senha, df, ...)) ou run_sisarv_assincrono(login, senha, df, ...).
+"""
+
+import asyncio
+import random
+import time
+
+import aiohttp
+import pandas as pd
+
+import ws
+
+# Requisições simultâneas por execução no motor assíncrono
+CONCORRENCIA_ASYNC = 16
+# Intervalo (segundos) entre consultas ao should_stop
+INTERVALO_VERIFICACAO_PARADA = 0.2
+
+MENSAGEM_INTERROMPIDO = "Interrompido pelo usuário."
+
+
+class ErroHttpSisArv(aiohttp.ClientError):
+    """Resposta HTTP de erro (4xx/5xx) que sobrou após as repetições; guarda o status e o início do corpo."""
+
+    def __init__(self, status, message):
+        super().__init__(status, message)
+        self.status = status
+        self.message = message
+
+    def __str__(self):
+        return f"HTTP {self.status}: {self.message}" if self.message else f"HTTP {self.status}"
+
+
+class RespostaSisArv:
+    """Status e HTML de uma resposta (o corpo já lido, para liberar a conexão)."""
+
+    def __init__(self, status, texto):
+        self.status = status
+        self.texto = texto
+
+    @property
+    def ok(self):
+        return self.status < 400
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise ErroHttpSisArv(self.status, self.texto[:200])
+
+
+class ClienteSisArvAsync:
+    """
+    Cliente aiohttp do SisArv: cookie jar único, pool de conexões do tamanho da concorrência, timeout
+    (ws.TIMEOUT_REQUISICAO) e repetição de falhas transitórias com espera exponencial aleatória, como o
+    AgendadorRequisicoes do ws.py (incluindo a verificação ja_aplicada antes de repetir um POST).
+    """
+
+    def __init__(self, concorrencia=None, log=None, telemetria=None):
+        self.concorrencia = max(1, int(concorrencia or CONCORRENCIA_ASYNC))
+        self.log = log
+        self.telemetria = telemetria if telemetria is not None else ws.TelemetriaExecucao(motor="asyncio")
+        self._semaforo = asyncio.Semaphore(self.concorrencia)
+        self._sessao = None
+
+    async def __aenter__(self):
+        conexao, leitura = ws.TIMEOUT_REQUISICAO
+        self._sessao = aiohttp.ClientSession(
+            headers=ws.HEADERS_PADRAO,
+            cookie_jar=aiohttp.CookieJar(unsafe=True),
+            connector=aiohttp.TCPConnector(limit=self.concorrencia),
+            timeout=aiohttp.ClientTimeout(sock_connect=conexao, sock_read=leitura),
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._sessao.close()
+
+    async def requisitar(self, metodo, url, data=None, ja_aplicada=None):
+        """Retorna a última RespostaSisArv, ou None se ja_aplicada() confirmar que não era preciso repetir."""
+        resp = None
+        for tentativa in range(ws.TENTATIVAS_REQUISICAO):
+            if tentativa > 0 and ja_aplicada is not None and await ja_aplicada():
+                return None
+            erro = None
+            async with self._semaforo:
+                inicio = time.perf_counter()
+                try:
+                    async with self._sessao.request(metodo, url, data=data) as r:
+                        corpo = await r.read()
+                        resp = RespostaSisArv(r.status, corpo.decode(r.get_encoding(), errors="replace"))
+                except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                    erro = e
+                self.telemetria.registrar_requisicao(
+                    ws.acao_requisicao(metodo, {"data": data}), time.perf_counter() - inicio,
+                    0 if erro is not None else resp.status, 0 if erro is not None else len(corpo),
+                )
+            if erro is None and resp.status not in ws.STATUS_TRANSITORIOS:
+                return resp
+            if tentativa == ws.TENTATIVAS_REQUISICAO - 1:
+                if erro is not None:
+                    raise erro
+                return resp
+            espera = random.uniform(0, min(ws.ESPERA_MAXIMA_REPETICAO, ws.ESPERA_BASE_REPETICAO * 2 ** tentativa))
+            if self.log:
+                motivo = erro if erro is not None else f"HTTP {resp.status}"
+                self.log(f"{(data or {}).get('action') or url}: falha transitória ({motivo}); nova tentativa em {espera:.1f}s.")
+            await asyncio.sleep(espera)
+        return resp
+
+    async def post(self, data, ja_aplicada=None):
+        return await self.requisitar("POST", f"{ws.base_url}/index.php", data=data, ja_aplicada=ja_aplicada)
+
+    async def seguir_redirect_post(self, html, max_vezes=5):
+        for _ in range(max_vezes):
+            if "document.redir.submit()" not in html and len(html) > 500:
+                return html
+            resp = await self.post({})
+            resp.raise_for_status()
+            html = resp.texto
+        return html
+
+    async def login(self, formusuario, formsenha):
+        """Faz o login e retorna o HTML da tela de consulta de inventários."""
+        await self.requisitar("GET", f"{ws.base_url}/")
+        resp = await self.post({"action": "AbreTelaLogin"})
+        resp.raise_for_status()
+        resp = await self.post({
+            "action": "AutenticaUsuario",
+            "csrf_key": ws.analisar_pagina(resp.texto).csrf_key,
+            "formusuario": formusuario,
+            "formsenha": formsenha,
+        })
+        resp.raise_for_status()
+        await self.seguir_redirect_post(resp.texto)
+        resp = await self.post({"action": "AbreTelaConsultaInventarioBotanico"})
+        resp.raise_for_status()
+        return await self.seguir_redirect_post(resp.texto)
+
+    async def abrir_tela_edicao(self, id_inventario):
+        resp = await self.post({
+            "action": "AbreTelaCadastroInventarioBotanico",
+            "id_inventario_botanico": id_inventario,
+            "origem": "consulta",
+        })
+        resp.raise_for_status()
+        return await self.seguir_redirect_post(resp.texto)
+
+    async def excluir_arvore(self, id_inventario, id_esp):
+        """Exclui uma árvore; retorna (id, erro ou None)."""
+        try:
+            resp = await self.post({
+                "action": "ExcluiArvoreInventarioBotanico",
+                "id_inventario_botanico_especie": id_esp,
+                "origem": "consulta",
+                "id_inventario_botanico": id_inventario,
+            })
+            resp.raise_for_status()
+            return (id_esp, None)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            return (id_esp, e)
+
+
+async def _aguardar_com_cancelamento(tarefa, should_stop):
+    """Aguarda a tarefa, cancelando-a (com todas as subtarefas) assim que should_stop() retornar True."""
+    async def vigiar():
+        while not tarefa.done():
+            if should_stop():
+                tarefa.cancel()
+                return
+            await asyncio.sleep(INTERVALO_VERIFICACAO_PARADA)
+
+    vigia = asyncio.ensure_future(vigiar()) if should_stop is not None else None
+    try:
+        return await tarefa
+    except asyncio.CancelledError:
+        if vigia is None or not vigia.done() or vigia.cancelled():
+            raise
+        return (False, [], MENSAGEM_INTERROMPIDO)
+    finally:
+        if vigia is not None:
+            vigia.cancel()
+
+
+async def _excluir_em_lote(cliente, id_inventario, ids_arvores, log, progress_range_callback):
+    """
+    Exclui as árvores (concorrência limitada pelo semáforo do cliente) com progresso por árvore; relê a página de
+    edição e reexclui, até ws.TENTATIVAS_EXCLUSAO vezes, as que continuam na lista. Retorna a página relida.
+    """
+    telemetria = cliente.telemetria
+    total, erros, concluidas = len(ids_arvores), {}, 0
+    restantes = list(ids_arvores)
+    for tentativa in range(ws.TENTATIVAS_EXCLUSAO + 1):
+        for proxima in asyncio.as_completed([cliente.excluir_arvore(id_inventario, i) for i in restantes]):
+            id_esp, err = await proxima
+            if err is None:
+                erros.pop(id_esp, None)
+            else:
+                erros[id_esp] = err
+            concluidas = min(concluidas + 1, total)
+            telemetria.registrar_progresso(concluidas, total)
+            if progress_range_callback:
+                progress_range_callback(concluidas, total)
+        pagina = ws.analisar_pagina(await cliente.abrir_tela_edicao(id_inventario))
+        presentes = set(pagina.ids_arvores)
+        restantes = [id_esp for id_esp in ids_arvores if id_esp in presentes]
+        erros = {id_esp: err for id_esp, err in erros.items() if id_esp in presentes}
+        if not restantes or tentativa == ws.TENTATIVAS_EXCLUSAO:
+            break
+        concluidas -= len(restantes)
+        log(f"Verificação: {len(restantes)} árvore(s) ainda na lista; excluindo novamente...")
+    for id_esp in restantes:
+        erros.setdefault(id_esp, "continua na lista do inventário após a exclusão")
+    for id_esp, err in erros.items():
+        log(f"Erro ao excluir id_inventario_botanico_especie={id_esp}: {err}")
+    return pagina
+
+
+async def run_sisarv_async(formusuario, formsenha, df, progress_callback=None, should_stop=None,
+                           progress_range_callback=None, concorrencia=None, modo_sincronizacao=None,
+                           cache_catalogos=None, jornal=None, id_inventario=None, telemetria=None):
+    """
+    Versão assíncrona de ws.run_sisarv (caminho via requests): login, exclusão (ou sincronização diferencial)
+    e inclusão das linhas do df, com até `concorrencia` requisições simultâneas (padrão: CONCORRENCIA_ASYNC).
+    As inclusões são confirmadas por reconciliação com a lista do inventário ao final.
+    should_stop() é consultado a cada INTERVALO_VERIFICACAO_PARADA s; ao retornar True, todas as requisições
+    pendentes são canceladas. id_inventario opcional: inventário a editar (padrão: o primeiro da consulta).
+    telemetria opcional: ws.TelemetriaExecucao (exportada ao final, como em ws.run_sisarv).
+    Retorna: (sucesso: bool, arvores_nao_encontradas: list, mensagem_erro: str|None)
+    """
+    def log(msg):
+        if progress_callback:
+            progress_callback(msg)
+        else:
+            print(msg)
+
+    if isinstance(df, ws.PlanilhaEmBlocos):
+        # Todas as inclusões são disparadas de uma vez: não há ganho em ler em blocos
+        df = df.carregar()
+    cliente = ClienteSisArvAsync(concorrencia, log, telemetria)
+    try:
+        async with cliente:
+            tarefa = asyncio.ensure_future(_executar(
+                cliente, formusuario, formsenha, df, log, progress_range_callback,
+                modo_sincronizacao, cache_catalogos, jornal, id_inventario,
+            ))
+            resultado = await _aguardar_com_cancelamento(tarefa, should_stop)
+            if resultado[2] == MENSAGEM_INTERROMPIDO:
+                log(MENSAGEM_INTERROMPIDO)
+            return resultado
+    finally:
+        cliente.telemetria.encerrar()
+        if ws.EXPORTAR_TELEMETRIA:
+            cliente.telemetria.exportar()
+
+
+def run_sisarv_assincrono(*args, **kwargs):
+    """Executa run_sisarv_async em um event loop próprio (para chamar a partir de código síncrono/threads)."""
+    return asyncio.run(run_sisarv_async(*args, **kwargs))
+
+
+async def _executar(cliente, formusuario, formsenha, df, log, progress_range_callback,
+                    modo_sincronizacao, cache_catalogos, jornal, id_inventario):
+    telemetria = cliente.telemetria
+    telemetria.iniciar_fase("login")
+    log("Conectando ao SisArv (motor assíncrono)...")
+    ids_inventario = ws.analisar_pagina(await cliente.login(formusuario, formsenha)).ids_inventario
+    if id_inventario is not None:
+        id_inventario = str(id_inventario)
+        if id_inventario not in ids_inventario:
+            return (False, [], f"Inventário {id_inventario} não encontrado na lista da conta.")
+    elif not ids_inventario:
+        return (False, [], "Nenhum inventário encontrado na lista para editar.")
+    else:
+        id_inventario = ids_inventario[0]
+    telemetria.metadados["id_inventario"] = id_inventario
+    telemetria.iniciar_fase("preparacao")
+    pagina = ws.analisar_pagina(await cliente.abrir_tela_edicao(id_inventario))
+
+    if jornal is None and ws.USAR_JORNAL:
+        jornal = ws.jornal_padrao
+    chave_jornal, fase_anterior, concluidas_jornal = None, None, set()
+    if jornal is not None:
+        chave_jornal, fase_anterior = jornal.iniciar(formusuario, id_inventario, ws.hash_planilha(df))
+        if fase_anterior:
+            concluidas_jornal = jornal.linhas_concluidas(chave_jornal)
+            log(f"Retomando execução interrompida desta planilha ({len(concluidas_jornal)} árvore(s) já concluída(s)).")
+
+    def registrar_linha(n, situacao, detalhe=""):
+        if jornal is not None:
+            jornal.registrar_linha(chave_jornal, n, situacao, detalhe)
+
+    def registrar_payload(n, payload, id_arvore=None):
+        if jornal is not None:
+            id_arvore = id_arvore or payload.get("id_em_edicao") or None
+            jornal.registrar_payload(formusuario, id_inventario, n, id_arvore, ws.hash_payload(payload))
+
+    diferencial = (modo_sincronizacao or ws.MODO_SINCRONIZACAO) == "diferencial"
+    colunas_tabela = ws.colunas_tabela_arvores(pagina) if diferencial else None
+    if diferencial and colunas_tabela is None:
+        log("Cabeçalho da tabela de árvores não reconhecido "
+            f"({', '.join(pagina.cabecalho_arvores) or 'sem cabeçalho'}); usando a substituição completa.")
+        diferencial = False
+    arvores_existentes = ws.extrair_arvores_existentes(pagina) if diferencial else {}
+    payloads_registrados = {}
+    if diferencial:
+        if jornal is not None:
+            payloads_registrados = jornal.payloads_registrados(formusuario, id_inventario)
+        else:
+            log("Sem o jornal, os campos que a tabela não exibe não podem ser conferidos; árvores existentes serão editadas.")
+        numeros_planilha = ws.numeros_da_planilha(df)
+        ids_remover = []
+        for n, arvores in arvores_existentes.items():
+            ids_remover.extend(a["id"] for a in (arvores if n not in numeros_planilha else arvores[1:]))
+        log(f"Sincronização diferencial: {len(arvores_existentes)} Nº no inventário, {len(ids_remover)} árvore(s) a excluir.")
+    elif fase_anterior == "inclusao":
+        log("Exclusão já concluída na execução anterior; mantendo as árvores já incluídas.")
+        ids_remover = []
+    else:
+        if jornal is not None:
+            jornal.descartar_payloads(formusuario, id_inventario)
+        ids_remover = pagina.ids_arvores
+        if ids_remover:
+            log(f"Excluindo {len(ids_remover)} árvore(s) do inventário antes de incluir...")
+    if ids_remover:
+        if jornal is not None and not diferencial:
+            jornal.marcar_fase(chave_jornal, "exclusao")
+        telemetria.iniciar_fase("exclusao")
+        pagina = await _excluir_em_lote(cliente, id_inventario, ids_remover, log, progress_range_callback)
+        arvores_existentes = ws.extrair_arvores_existentes(pagina) if diferencial else {}
+        log("Árvores excluídas.")
+    if jornal is not None:
+        jornal.marcar_fase(chave_jornal, "inclusao")
+    telemetria.iniciar_fase("inclusao")
+
+    catalogo = (cache_catalogos or ws.cache_catalogos_padrao).catalogo_da_pagina(ws.base_url, id_inventario, pagina)
+    registros = ws.registros_arvores(ws.montar_tabela_payloads(df, catalogo))
+    textos_selects = {
+        id_form: {val: texto for texto, val in pagina.selects[id_form].items()}
+        for id_form in colunas_tabela if id_form and pagina.selects.get(id_form)
+    } if diferencial else {}
+    numeros_ja = set() if diferencial else pagina.numeros_arvores()
+
+    total = len(registros)
+    concluidas = [0]
+
+    def avancar():
+        concluidas[0] += 1
+        telemetria.registrar_progresso(concluidas[0], total)
+        if progress_range_callback:
+            progress_range_callback(concluidas[0], total)
+
+    # Classifica as linhas (sem rede) e separa as que precisam ser enviadas
+    arvores_nao_encontradas, envios, sem_alteracao = [], {}, 0
+    for registro in registros:
+        n = registro.numero
+        if n is None:
+            avancar()
+            continue
+        if n in concluidas_jornal or n in numeros_ja or n in envios:
+            avancar()
+            if n in numeros_ja and n not in concluidas_jornal:
+                registrar_linha(n, "ja_preenchida")
+            continue
+        if not registro.especie_encontrada:
+            avancar()
+            registrar_linha(n, "nao_encontrada")
+            arvores_nao_encontradas.append((n, registro.texto_popular, registro.texto_cientifico))
+            msg = (f"Nº {n}: nome não encontrado nos selects (vulgar={registro.texto_popular!r}, "
+                   f"científico={registro.texto_cientifico!r}). Pulando.")
+            for sugestoes, rotulo in ((registro.sugestoes_popular, "vulgar"), (registro.sugestoes_cientifico, "científico")):
+                if sugestoes:
+                    msg += f" Sugestões ({rotulo}): {ws.formatar_sugestoes(sugestoes)}."
+            log(msg)
+            continue
+        payload = registro.payload(
+            action="IncluiArvoreInventarioBotanico",
+            id_inventario_botanico=id_inventario,
+            origem="consulta",
+            id_em_edicao="",
+            area_interesse_social="SIM",
+        )
+        existentes = arvores_existentes.get(n)
+        if existentes:
+            id_arvore = existentes[0]["id"]
+            if (ws.payload_ja_aplicado(payloads_registrados.get(n), id_arvore, ws.hash_payload(payload))
+                    and not ws.arvore_alterada(payload, existentes[0]["celulas"], textos_selects, colunas_tabela)):
+                avancar()
+                registrar_linha(n, "sem_alteracao")
+                if payloads_registrados[n][0] is None:
+                    registrar_payload(n, payload, id_arvore)
+                sem_alteracao += 1
+                continue
+            payload["id_em_edicao"] = id_arvore
+        envios[n] = (registro.nome_vulgar, registro.nome_cientifico, payload)
+
+    async def ja_incluida(n):
+        return n in ws.extrair_numeros_ja_preenchidos(await cliente.abrir_tela_edicao(id_inventario))
+
+    async def enviar(n, reenvio=False):
+        nome_vulgar, nome_cientifico, payload = envios[n]
+        ja_aplicada = None if payload["id_em_edicao"] else (lambda: ja_incluida(n))
+        try:
+            resp = await cliente.post(payload, ja_aplicada=ja_aplicada)
+            if resp is not None:
+                resp.raise_for_status()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            registrar_linha(n, "erro", e)
+            log(f"Nº {n}: falha ao enviar ({e}). Pulando para a próxima árvore.")
+            return False
+        finally:
+            if not reenvio:
+                avancar()
+        registrar_linha(n, "enviada")
+        log(f"Nº {n} ({nome_vulgar} / {nome_cientifico}) enviada via motor assíncrono.")
+        return True
+
+    log(f"Enviando {len(envios)} árvore(s) com até {cliente.concorrencia} requisições simultâneas...")
+    enviados = await asyncio.gather(*(enviar(n) for n in envios))
+    aguardando = {n for n, ok in zip(envios, enviados) if ok}
+
+    # Reconciliação: uma leitura da lista confirma todos os envios; ausentes são reenviados em lote
+    telemetria.iniciar_fase("reconciliacao")
+    for tentativa in range(ws.TENTATIVAS_RECONCILIACAO + 1):
+        if not aguardando:
+            break
+        presentes = ws.extrair_numeros_ja_preenchidos(await cliente.abrir_tela_edicao(id_inventario))
+        for n in aguardando & presentes:
+            registrar_linha(n, "editada" if envios[n][2]["id_em_edicao"] else "incluida")
+            registrar_payload(n, envios[n][2])
+        aguardando -= presentes
+        log(f"Reconciliação: {len(envios) - len(aguardando)} envio(s) confirmado(s), {len(aguardando)} ausente(s).")
+        if aguardando and tentativa < ws.TENTATIVAS_RECONCILIACAO:
+            log(f"Reenviando em lote {len(aguardando)} árvore(s) ausente(s) da lista...")
+            reenviados = await asyncio.gather(*(enviar(n, reenvio=True) for n in sorted(aguardando)))
+            aguardando = {n for n, ok in zip(sorted(aguardando), reenviados) if ok}
+    for n in sorted(aguardando):
+        registrar_linha(n, "nao_confirmada")
+        log(f"Nº {n}: inclusão não confirmada na lista do inventário.")
+
+    if jornal is not None:
+        jornal.marcar_fase(chave_jornal, "concluida")
+    log("Preenchimento da linha 1 ao final concluído (motor assíncrono).")
+    if diferencial:
+        log(f"Sincronização diferencial: {sem_alteracao} árvore(s) sem alteração.")
+    if arvores_nao_encontradas:
+        log(f"Total: {len(arvores_nao_encontradas)} árvore(s) não encontrada(s).")
+    log(telemetria.resumo())
+    return (True, arvores_nao_encontradas, None)